@@ -0,0 +1,117 @@
+"""
+Benchmark: extracción de la tabla 'tDades' de AVAMET MeteoXarxa.
+Compara el árbol completo de BeautifulSoup con el parser por eventos que se
+detiene en </table>, en tiempo de parseo y pico de memoria.
+
+Uso:
+    python bench_avamet_parser.py [pagina1.html pagina2.html ...]
+    python bench_avamet_parser.py --save     # guarda la página actual como fixture
+    python bench_avamet_parser.py --synthetic
+
+Sin argumentos se usa la página guardada en data/fixtures (la misma que
+comprueba test_avamet_parser.py). --save la sustituye por la página actual de
+MeteoXarxa. --synthetic genera una página grande con la estructura de
+MeteoXarxa (cabecera con scripts, menú, tabla de estaciones y pie extenso).
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+import requests
+
+from utils.RealTimeValencianWeather import (WEATHER_URL, iter_weather_rows, parse_weather_html,
+                                            parse_weather_html_soup)
+
+REPEATS = 15
+FIXTURE = os.path.join("data", "fixtures", "avamet_meteoxarxa_c15.html")
+
+
+def synthetic_page(n_stations=180, seed=3):
+    """Página con el mismo esqueleto que mx-meteoxarxa.php."""
+    rng = random.Random(seed)
+    head = ["<html><head><meta charset='utf-8'><title>MeteoXarxa</title>"]
+    head += [f"<script>var cfg{i} = {{a: {i}, b: '{'x' * 200}'}};</script>" for i in range(40)]
+    head.append("<style>" + ".c{color:red}" * 2000 + "</style></head><body>")
+    menu = ["<div id='menu'><ul>"] + [f"<li><a href='/p{i}'>Opció {i}</a></li>" for i in range(300)] + ["</ul></div>"]
+
+    rows = ["<table class='tDades taula'><tr><th>Estació</th><th>Tmín</th><th>Tmit</th>"
+            "<th>Tmàx</th><th>HR</th><th>Prec</th><th>Vmit</th><th>Dir</th><th>Vmàx</th></tr>"]
+    for i in range(n_stations):
+        def v():
+            return f"{rng.uniform(0, 30):.1f}".replace(".", ",") if rng.random() > 0.1 else "-"
+        rows.append(
+            f"<tr><td><a href='/estacio/{i}'>València</a> <span>Barri {i}</span></td>"
+            + "".join(f"<td>{v()}</td>" for _ in range(6))
+            + f"<td>{rng.choice(['N', 'NE', 'E', 'SE', 'S', 'SO', 'O', 'NO'])}</td><td>{v()}</td></tr>")
+    rows.append("</table>")
+
+    footer = ["<div id='peu'>"] + [f"<p>Avís legal &amp; notes {i} " + "lorem " * 40 + "</p>" for i in range(600)]
+    footer.append("</div></body></html>")
+    return "".join(head + menu + rows + footer)
+
+
+def measure(fn, html):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(html)
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak, result
+
+
+def bench(name, html):
+    print(f"\n📄 {name}: {len(html) / 1024:,.0f} KiB")
+    soup_ms, soup_peak, soup_rows = measure(parse_weather_html_soup, html)
+    stream_ms, stream_peak, stream_rows = measure(parse_weather_html, html)
+
+    # Mismas filas por ambos caminos (repr para comparar también los NaN)
+    assert [repr(c) for c in soup_rows] == [repr(c) for c in stream_rows]
+
+    # Posición de </table>: lo que el parser por eventos deja sin leer
+    consumed = []
+    list(iter_weather_rows((html[i:i + 16384] for i in range(0, len(html), 16384)), consumed))
+    read_kib = sum(len(c) for c in consumed) / 1024
+
+    print(f"{'':<22}{'Mediana ms':>12}{'Pico KiB':>12}{'Filas':>8}")
+    print(f"{'BeautifulSoup':<22}{soup_ms:>12.2f}{soup_peak / 1024:>12,.0f}{len(soup_rows):>8}")
+    print(f"{'Eventos (HTMLParser)':<22}{stream_ms:>12.2f}{stream_peak / 1024:>12,.0f}{len(stream_rows):>8}")
+    print(f"⚡ x{soup_ms / stream_ms:.1f} más rápido, x{soup_peak / stream_peak:.1f} menos memoria; "
+          f"lee {read_kib:,.0f} KiB hasta </table>")
+
+
+def save_fixture():
+    """Descarga la página actual de MeteoXarxa y la guarda como fixture."""
+    response = requests.get(WEATHER_URL, timeout=15)
+    response.raise_for_status()
+    with open(FIXTURE, "w", encoding="utf-8") as f:
+        f.write(response.text)
+    print(f"💾 {WEATHER_URL} → {FIXTURE} ({len(response.text) / 1024:,.0f} KiB)")
+
+
+def main():
+    args = sys.argv[1:]
+    if args == ["--save"]:
+        save_fixture()
+        return
+    if args == ["--synthetic"]:
+        bench("página sintética MeteoXarxa", synthetic_page())
+        return
+    for path in args or [FIXTURE]:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            bench(os.path.basename(path), f.read())
+
+
+if __name__ == "__main__":
+    main()
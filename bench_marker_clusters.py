@@ -0,0 +1,116 @@
+"""
+Benchmark: agrupación de marcadores por nivel de zoom con 5.000 puntos sintéticos.
+
+Mide lo que cuesta precalcular los clústeres de todos los niveles
+(ClusterIndex) y, para cada zoom, cuántos marcadores hay que montar en el
+viewport y cuántos bytes envía Flet al montarlos, con y sin agrupación. El
+tamaño es el del mensaje de Flet (ObjectPatch) codificado con msgpack, igual
+que lo envía la sesión.
+
+Uso:
+    python bench_marker_clusters.py [--points 5000] [--width 1600] [--height 900]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import flet as ft
+import flet_map as mapa
+import msgpack
+import numpy as np
+from flet.controls.base_control import BaseControl
+from flet.controls.object_patch import ObjectPatch
+from flet.messaging.protocol import configure_encode_object_for_msgpack
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from components.marker_pool import MarkerPool, cluster_marker
+from config.performance import PERFORMANCE
+from utils.marker_clusters import ClusterIndex
+from utils.spatial_index import viewport_bounds
+
+ENCODE = configure_encode_object_for_msgpack(BaseControl)
+COLORS = ["#2E7D32", "#9CCC65", "#FFEB3B", "#FF9800", "#F44336", "#8E24AA"]
+CENTER = (39.4699, -0.3763)
+
+
+def synthetic_points(n, rng):
+    """Puntos concentrados en el centro de Valencia y dispersos hacia el área metropolitana."""
+    lat = CENTER[0] + rng.normal(0, 0.04, n)
+    lon = CENTER[1] + rng.normal(0, 0.05, n)
+    return lat, lon, rng.integers(0, len(COLORS), n)
+
+
+def mount_bytes(markers):
+    """Bytes del mensaje que monta una MarkerLayer con esos marcadores."""
+    layer = mapa.MarkerLayer(markers=markers)
+    patch, _, _ = ObjectPatch.from_diff(None, layer, control_cls=BaseControl)
+    return len(msgpack.packb(patch.to_message(), default=ENCODE))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=900)
+    args = parser.parse_args()
+
+    lat, lon, buckets = synthetic_points(args.points, np.random.default_rng(5))
+    items = [(f"P{i}", la, lo, COLORS[b], ft.Icons.TRAFFIC, f"Punto {i}", None)
+             for i, (la, lo, b) in enumerate(zip(lat.tolist(), lon.tolist(), buckets.tolist()))]
+
+    start = time.perf_counter()
+    index = ClusterIndex(lat, lon, buckets)
+    build_ms = (time.perf_counter() - start) * 1000
+    levels = range(index.min_zoom, index.max_zoom + 1)
+    start = time.perf_counter()
+    for level in levels:
+        index.clusters(level)
+    materialize_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📊 {args.points} puntos, viewport {args.width}x{args.height} px, "
+          f"celdas de {index.cell_px} px")
+    print(f"   ⏱️ Precálculo de los niveles {index.min_zoom}-{index.max_zoom}: {build_ms:.1f} ms "
+          f"(+{materialize_ms:.1f} ms al materializar todos los clústeres)\n")
+    print(f"{'zoom':>5}{'puntos':>10}{'marcadores':>12}{'clústeres':>11}"
+          f"{'KiB sin':>10}{'KiB con':>10}{'ms sin':>9}{'ms con':>9}")
+
+    for zoom in range(10, PERFORMANCE["cluster_max_zoom"] + 2):
+        south, west, north, east = viewport_bounds(*CENTER, zoom, args.width, args.height)
+        inside = np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+        start = time.perf_counter()
+        plain = MarkerPool().markers("plain", [items[i] for i in inside])
+        plain_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        level = index.level(zoom)
+        if level is None:
+            clustered, n_clusters = plain, 0
+        else:
+            ids = index.cluster_ids(level)
+            groups = index.clusters(level)
+            singles, clusters = [], []
+            for group_id in np.unique(ids[inside]).tolist():
+                group = groups[group_id]
+                if group.count == 1:
+                    singles.append(items[group.members[0]])
+                else:
+                    clusters.append(cluster_marker(group.lat, group.lon, group.count,
+                                                   COLORS[group.value]))
+            clustered = MarkerPool().markers("clustered", singles) + clusters
+            n_clusters = len(clusters)
+        cluster_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{zoom:>5}{len(inside):>10}{len(clustered):>12}{n_clusters:>11}"
+              f"{mount_bytes(plain) / 1024:>10.1f}{mount_bytes(clustered) / 1024:>10.1f}"
+              f"{plain_ms:>9.1f}{cluster_ms:>9.1f}")
+
+    print("\n✅ ms = construir los marcadores del viewport (con agrupación, incluye buscar sus clústeres)")
+    print(f"✅ Por encima del zoom {PERFORMANCE['cluster_max_zoom']} se montan los puntos sueltos")
+
+
+if __name__ == "__main__":
+    main()
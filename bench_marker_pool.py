@@ -0,0 +1,125 @@
+"""
+Benchmark: controles y bytes enviados al cliente al cambiar de mes en el mini-mapa.
+
+Compara la versión anterior (un mapa.Marker nuevo con su Container e Icon por
+estación en cada cambio) con MarkerPool, que reutiliza el marcador de cada
+(capa, estación) y solo modifica sus propiedades. El tamaño es el del parche
+de Flet (ObjectPatch) codificado con msgpack, igual que lo envía la sesión.
+
+Uso:
+    python bench_marker_pool.py [--months 24] [--atas 500]
+"""
+
+import argparse
+import random
+import os
+import statistics
+import sys
+import time
+
+import flet as ft
+import flet_map as mapa
+import msgpack
+from flet.controls.base_control import BaseControl
+from flet.controls.object_patch import ObjectPatch
+from flet.messaging.protocol import configure_encode_object_for_msgpack
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from components.marker_pool import MarkerPool, background_color
+
+ENCODE = configure_encode_object_for_msgpack(BaseControl)
+COLORS = ["#2E7D32", "#9CCC65", "#FFEB3B", "#FF9800", "#F44336", "#8E24AA"]
+
+
+def legacy_markers(layer, items):
+    """Versión anterior de RightPanel._create_marker: todo nuevo en cada cambio."""
+    return [mapa.Marker(
+        content=ft.Container(
+            width=30, height=30, bgcolor=background_color(color), border_radius=15,
+            alignment=ft.alignment.Alignment(0, 0),
+            content=ft.Icon(icon, color=color, size=18),
+            tooltip=tooltip, on_click=on_click),
+        coordinates=mapa.MapLatitudeLongitude(lat, lon),
+    ) for _, lat, lon, color, icon, tooltip, on_click in items]
+
+
+def pollution_steps(months, rng):
+    """12 estaciones con el mismo código todos los meses y NO2 variable."""
+    stations = [(f"46250{i:03d}", 39.45 + rng.random() / 20, -0.40 + rng.random() / 20) for i in range(12)]
+    for _ in range(months):
+        yield [(cod, lat, lon, rng.choice(COLORS[:3]), ft.Icons.CLOUD,
+                f"🍀 Estación: {cod}\n💨 Aire (NO2): {rng.uniform(5, 60):.1f} μg/m³", lambda e: None)
+               for cod, lat, lon in stations]
+
+
+def traffic_steps(months, atas, rng):
+    """ATAs de tráfico histórico: ~5 % entran o salen cada mes, la IMD cambia."""
+    pool = [(f"A{i}", 39.40 + rng.random() / 10, -0.42 + rng.random() / 10) for i in range(int(atas * 1.1))]
+    for _ in range(months):
+        month_atas = rng.sample(pool, atas)
+        month_atas.sort(key=lambda a: a[0])
+        items = []
+        for ata, lat, lon in month_atas:
+            imd = rng.randint(1000, 90000)
+            items.append((ata, lat, lon, COLORS[min(imd // 15000, 5)], ft.Icons.TRAFFIC,
+                          f"📍 {ata}\n🚗 {imd:,} vehículos diarios (Promedio)", lambda e: None))
+        yield items
+
+
+def weather_steps(months, rng):
+    """21 estaciones AEMET; cambia la seleccionada."""
+    stations = [(f"8{i:03d}A", 39.3 + rng.random() / 5, -0.6 + rng.random() / 5) for i in range(21)]
+    for _ in range(months):
+        selected = rng.choice(stations)[0]
+        yield [(ind, lat, lon, "#1565C0" if ind == selected else "#90CAF9", ft.Icons.GRAIN,
+                f"🌦️ Estación: {ind}" + (" (Seleccionada)" if ind == selected else ""), lambda e: None)
+               for ind, lat, lon in stations]
+
+
+def run(build, steps):
+    """Aplica cada paso a una MarkerLayer y mide el parche de Flet."""
+    layer = mapa.MarkerLayer(markers=[])
+    # Montaje inicial: la codificación deja en cada control el estado con el que se comparará
+    patch, _, _ = ObjectPatch.from_diff(None, layer, control_cls=BaseControl)
+    msgpack.packb(patch.to_message(), default=ENCODE)
+    sizes, added, build_ms = [], [], []
+    for i, items in enumerate(steps):
+        start = time.perf_counter()
+        layer.markers = build("layer", items)
+        build_ms.append((time.perf_counter() - start) * 1000)
+        patch, added_controls, _ = ObjectPatch.from_diff(layer, layer, control_cls=BaseControl)
+        payload = len(msgpack.packb(patch.to_message(), default=ENCODE))
+        if i > 0:  # La primera carga cuesta lo mismo en ambas versiones
+            sizes.append(payload)
+            added.append(len(added_controls))
+    return statistics.mean(added), statistics.mean(sizes) / 1024, statistics.mean(build_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--atas", type=int, default=500)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("Contaminación (12)", lambda: pollution_steps(args.months, random.Random(1))),
+        (f"Tráfico hist. ({args.atas})", lambda: traffic_steps(args.months, args.atas, random.Random(2))),
+        ("Meteorología (21)", lambda: weather_steps(args.months, random.Random(3))),
+    ]
+
+    print(f"📊 Media por cambio de periodo/selección ({args.months - 1} cambios)\n")
+    print(f"{'':<24}{'Controles nuevos':>34}{'KiB enviados':>26}{'ms construcción':>20}")
+    print(f"{'':<24}{'antes':>17}{'pool':>17}{'antes':>13}{'pool':>13}{'antes':>10}{'pool':>10}")
+    for name, steps in scenarios:
+        pool = MarkerPool()
+        before = run(legacy_markers, steps())
+        after = run(pool.markers, steps())
+        print(f"{name:<24}{before[0]:>17.0f}{after[0]:>17.0f}{before[1]:>13.1f}{after[1]:>13.1f}"
+              f"{before[2]:>10.1f}{after[2]:>10.1f}")
+    print("\n✅ Controles nuevos = Marker + Container + Icon que Flet serializa enteros")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark: agregación de los CSV mensuales de contaminación con 1–16 hilos.
+
+Compara la versión anterior (cada fila se añade a un years_data compartido
+dentro de un lock) con los parciales por mes sin lock (parse_month_csv en
+hilos) y con el parseo vectorizado parse_month_table en un pool de procesos,
+que es lo que usa la primera ejecución.
+
+Uso:
+    python bench_month_aggregation.py [directorio_con_csv]
+
+Sin argumentos se generan CSV sintéticos con el formato de la GVA
+(ver bench_streaming_conversion.write_fixtures).
+"""
+
+import csv
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from bench_streaming_conversion import write_fixtures
+from utils.optimized_data_downloader import (VALENCIA_KEYWORDS, get_station_coords, parse_month_csv,
+                                             parse_month_table)
+
+WORKERS = [1, 2, 4, 8, 16]
+REPEATS = 3
+
+
+def month_of(filepath):
+    """(año, mes) de contaminacion_YYYY_MM.csv."""
+    _, year, month = os.path.splitext(os.path.basename(filepath))[0].split('_')
+    return int(year), int(month)
+
+
+def locked_aggregation(csv_files, workers):
+    """Versión anterior: un lock por fila sobre la estructura compartida."""
+    years_data = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
+        'nombre': '', 'lat': '', 'lon': '', 'no2_values': [], 'o3_values': [], 'pm10_values': []})))
+    data_lock = threading.Lock()
+
+    def process(filepath):
+        year, month = month_of(filepath)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter=';'):
+                station_name = row.get('NOM_ESTACION', '').strip().upper()
+                if not any(kw in station_name for kw in VALENCIA_KEYWORDS):
+                    continue
+                if not any((row.get(p) or '').strip() not in ('', '-') for p in ('NO2', 'O3', 'PM10')):
+                    continue
+                cod = row.get('COD_ESTACION', '').strip()
+                if not cod:
+                    continue
+                with data_lock:
+                    sensor = years_data[year][month][cod]
+                    if not sensor['nombre']:
+                        sensor['nombre'] = row.get('NOM_ESTACION', '').strip()
+                        coords = get_station_coords(sensor['nombre'])
+                        sensor['lat'], sensor['lon'] = coords['lat'], coords['lon']
+                    for column, key in (('NO2', 'no2_values'), ('O3', 'o3_values'), ('PM10', 'pm10_values')):
+                        value = row.get(column, '-').strip()
+                        if value and value != '-':
+                            try:
+                                sensor[key].append(float(value))
+                            except ValueError:
+                                pass
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in as_completed([executor.submit(process, path) for path in csv_files]):
+            future.result()
+    return {y: {m: dict(s) for m, s in months.items()} for y, months in years_data.items()}
+
+
+def partial_aggregation(csv_files, workers):
+    """Versión actual: parciales por mes devueltos por el future, sin lock."""
+    years_data = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(parse_month_csv, path): month_of(path) for path in csv_files}
+        for future in as_completed(futures):
+            sensors = future.result()
+            if sensors:
+                year, month = futures[future]
+                years_data.setdefault(year, {})[month] = sensors
+    return years_data
+
+
+def process_aggregation(csv_files, workers):
+    """Parseo vectorizado en un pool de procesos (spawn, como la aplicación)."""
+    years_data = {}
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(parse_month_table, path): month_of(path) for path in csv_files}
+        for future in as_completed(futures):
+            sensors = future.result()
+            if sensors:
+                year, month = futures[future]
+                years_data.setdefault(year, {})[month] = sensors
+    return years_data
+
+
+def timed(fn, csv_files, workers):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(csv_files, workers)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    fixtures = None
+    if len(sys.argv) > 1:
+        csv_dir = sys.argv[1]
+    else:
+        fixtures = csv_dir = tempfile.mkdtemp(prefix="bench_aggregation_")
+        write_fixtures(csv_dir, years=12, stations=60)
+
+    try:
+        csv_files = sorted(os.path.join(csv_dir, name) for name in os.listdir(csv_dir)
+                           if name.startswith("contaminacion_") and name.endswith(".csv"))
+        size_mb = sum(os.path.getsize(p) for p in csv_files) / 1024 / 1024
+        print(f"📂 {len(csv_files)} CSV ({size_mb:.0f} MB) · {os.cpu_count()} CPU · "
+              f"mediana de {REPEATS} ejecuciones\n")
+
+        print(f"{'Workers':>8}{'Lock por fila s':>18}{'Parciales s':>14}{'Procesos s':>13}")
+        for workers in WORKERS:
+            locked_s, locked = timed(locked_aggregation, csv_files, workers)
+            partial_s, partial = timed(partial_aggregation, csv_files, workers)
+            process_s, processed = timed(process_aggregation, csv_files, workers)
+            assert locked == partial == processed, "Los resultados no coinciden"
+            print(f"{workers:>8}{locked_s:>18.2f}{partial_s:>14.2f}{process_s:>13.2f}")
+        print("\n✅ Mismo years_data con los tres métodos")
+    finally:
+        if fixtures:
+            shutil.rmtree(fixtures, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
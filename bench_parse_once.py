@@ -0,0 +1,225 @@
+"""
+Benchmark: parseo único de los registros en tiempo real.
+Compara un ciclo de refresco con los registros antiguos (todo cadenas con
+centinelas "-", cada consumidor repite float() dentro de try/except) con los
+registros dataclass(slots=True) que convierten los números una sola vez al
+ingerir el feed, y la memoria de ambos.
+
+La ingesta nueva incluye crear el Snapshot de cada feed (como get_snapshot(),
+una vez por ingesta); el consumo construye las columnas que usa. Cada
+repetición es un refresco completo con registros y Snapshots nuevos. La
+memoria de parse_number queda caliente entre repeticiones, igual que entre
+refrescos reales de la aplicación.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.RealTimeTrafficValencia import EstacionTrafico, get_estado_descripcion
+from utils.RealTimeAirValencia import EstacionContaminacionAtmosferica
+from utils.RealTimeValencianWeather import _clima_from_cells
+from utils.realtime_records import Snapshot, format_number, has_value
+
+N_TRAFFIC = 400
+N_AIR = 20
+N_WEATHER = 150
+REPEATS = 200
+
+
+def synthetic_payloads(seed=7):
+    """Registros con el formato de las APIs (números como cadenas o None)."""
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return None if rng.random() < 0.15 else value
+
+    traffic = [{
+        "idtramo": i,
+        "denominacion": f"TRAMO {i}",
+        "estado": rng.randint(0, 9),
+        "intensidad": maybe(str(rng.randint(0, 3000))),
+        "ocupacion": maybe(str(rng.randint(0, 100))),
+        "carga": maybe(str(rng.randint(0, 100))),
+        "velocidad": maybe(str(rng.randint(5, 80))),
+        "geo_point_2d": {"lat": 39.47 + rng.random() / 20, "lon": -0.37 + rng.random() / 20},
+    } for i in range(N_TRAFFIC)]
+    air = [{
+        "direccion": f"ESTACION {i}",
+        "no2": maybe(rng.randint(0, 120)),
+        "pm10": maybe(rng.randint(0, 60)),
+        "o3": maybe(rng.randint(0, 120)),
+        "calidad_am": "Razonablemente Buena",
+        "geo_point_2d": {"lat": 39.47, "lon": -0.37},
+    } for i in range(N_AIR)]
+    # AVAMET: celdas de texto, coma decimal y "-" si falta el dato
+    weather = [[f"Estación {i}"] + [
+        (f"{rng.uniform(0, 30):.1f}".replace(".", ",") if rng.random() > 0.15 else "-")
+        for _ in range(6)] + ["NE", "12"] for i in range(N_WEATHER)]
+    return traffic, air, weather
+
+
+class LegacyTraffic:
+    def __init__(self, data):
+        self.id = data.get("idtramo", "")
+        self.denominacion = data.get("denominacion", "")
+        self.estado = data.get("estado", "")
+        self.intensidad = data.get("intensidad", "-")
+        self.ocupacion = data.get("ocupacion", "-")
+        self.carga = data.get("carga", "-")
+        self.velocidad = data.get("velocidad", "-")
+        self.geo_point_2d = data.get("geo_point_2d")
+
+
+class LegacyAir:
+    direccion, no2, pm10, o3, fecha_carg, calidad_am = "-", "-", "-", "-", "-", "-"
+    geo_point_2d = None
+
+
+class LegacyClima:
+    def __init__(self):
+        self.estacion = self.tmin = self.tmed = self.tmax = ""
+        self.hr = self.prec = self.vmed = self.vdir = self.vmax = ""
+
+
+def legacy_ingest(traffic, air, weather):
+    t = [LegacyTraffic(r) for r in traffic]
+    a = []
+    for r in air:
+        e = LegacyAir()
+        e.direccion, e.no2, e.pm10, e.o3 = r["direccion"], r["no2"], r["pm10"], r["o3"]
+        e.calidad_am, e.geo_point_2d = r["calidad_am"], r["geo_point_2d"]
+        a.append(e)
+    w = []
+    for cells in weather:
+        c = LegacyClima()
+        (c.estacion, c.tmin, c.tmed, c.tmax, c.hr, c.prec,
+         c.vmed, c.vdir, c.vmax) = cells
+        w.append(c)
+    return t, a, w
+
+
+def legacy_consumers(t, a, w):
+    """Lo que hacían mapa y panel izquierdo en cada refresco (sin Flet)."""
+    out = []
+    # Mapa: colores por precipitación y NO2
+    for c in w:
+        if c.prec and c.prec != "-":
+            try:
+                v = float(c.prec)
+                out.append(v > 10)
+            except:
+                pass
+    for e in a:
+        if e.no2 and e.no2 != "-":
+            try:
+                out.append(float(e.no2) > 40)
+            except:
+                pass
+    for e in t:
+        out.append(get_estado_descripcion(e.estado))
+        for v in (e.velocidad, e.intensidad, e.ocupacion):
+            if v and v != "-":
+                out.append(f"{v}")
+    # Panel izquierdo: estaciones con lluvia, ranking de NO2 y alertas de tráfico
+    precip = []
+    for c in w:
+        if c.prec and c.prec != "-":
+            try:
+                if float(c.prec.replace(",", ".")) > 0:
+                    precip.append(c)
+            except:
+                pass
+    no2 = sorted([e for e in a if e.no2 and e.no2 != "-" and e.no2 is not None],
+                 key=lambda x: float(x.no2) if x.no2 != "-" else 0, reverse=True)[:2]
+    alerts = [e for e in t if get_estado_descripcion(e.estado)[1] in ["yellow", "red"]]
+    return out, precip[:2], no2, alerts[:2]
+
+
+def new_ingest(traffic, air, weather):
+    t = [EstacionTrafico.from_record(r) for r in traffic]
+    a = [EstacionContaminacionAtmosferica.from_record(r) for r in air]
+    w = [_clima_from_cells(cells) for cells in weather]
+    return Snapshot(t), Snapshot(a), Snapshot(w)
+
+
+def new_consumers(traffic, air_quality, weather):
+    """Mismo trabajo con los valores ya convertidos y los Snapshots de la ingesta."""
+    t, a, w = traffic.records, air_quality.records, weather.records
+    out = []
+    for c in w:
+        if has_value(c.prec):
+            out.append(c.prec > 10)
+    for e in a:
+        if has_value(e.no2):
+            out.append(e.no2 > 40)
+    for e in t:
+        out.append(get_estado_descripcion(e.estado))
+        for v in (e.velocidad, e.intensidad, e.ocupacion):
+            if has_value(v):
+                out.append(format_number(v))
+    precip = weather.where(weather["prec"] > 0)[:2]
+    no2 = air_quality.top("no2", 2)
+    alerts = traffic.where((traffic["estado"] >= 1) & (traffic["estado"] <= 3))[:2]
+    return out, precip, no2, alerts
+
+
+def timed_cycle(ingest, consume, *payloads):
+    """Media en ms de ingesta y consumo de REPEATS refrescos completos."""
+    ingest_s = consume_s = 0.0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        records = ingest(*payloads)
+        middle = time.perf_counter()
+        consume(*records)
+        ingest_s += middle - start
+        consume_s += time.perf_counter() - middle
+    return ingest_s * 1000 / REPEATS, consume_s * 1000 / REPEATS
+
+
+def memory_of(build, raw):
+    """Memoria que queda retenida tras decodificar el JSON y crear los registros."""
+    tracemalloc.start()
+    payload = json.loads(raw)
+    objs = build(payload)
+    del payload  # los registros antiguos siguen apuntando a sus cadenas
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return size
+
+
+def main():
+    traffic, air, weather = synthetic_payloads()
+    print(f"📡 Refresco sintético: {N_TRAFFIC} tramos, {N_AIR} estaciones de aire, "
+          f"{N_WEATHER} estaciones AVAMET ({REPEATS} repeticiones)\n")
+
+    ingest_old, consume_old = timed_cycle(legacy_ingest, legacy_consumers, traffic, air, weather)
+    ingest_new, consume_new = timed_cycle(new_ingest, new_consumers, traffic, air, weather)
+
+    print(f"{'':<26}{'Ingesta ms':>12}{'Consumo ms':>12}{'Total ms':>10}")
+    print(f"{'Cadenas + float() x uso':<26}{ingest_old:>12.3f}{consume_old:>12.3f}"
+          f"{ingest_old + consume_old:>10.3f}")
+    print(f"{'Parseo único (slots)':<26}{ingest_new:>12.3f}{consume_new:>12.3f}"
+          f"{ingest_new + consume_new:>10.3f}")
+    ratio = (ingest_new + consume_new) / (ingest_old + consume_old)
+    print(f"\n⚠️ Refresco con registros tipados: x{ratio:.1f} de CPU frente a las cadenas. "
+          f"Con estos tamaños de feed el parseo único no ahorra tiempo; aporta tipos "
+          f"(float/EstadoTrafico) y menos memoria retenida")
+
+    n = 10_000
+    raw = json.dumps([traffic[i % N_TRAFFIC] for i in range(n)])
+    old_mem = memory_of(lambda payload: [LegacyTraffic(r) for r in payload], raw)
+    new_mem = memory_of(lambda payload: [EstacionTrafico.from_record(r) for r in payload], raw)
+    print(f"\n🧠 Memoria de {n:,} EstacionTrafico: {old_mem / 1024:,.0f} KiB (__dict__) "
+          f"→ {new_mem / 1024:,.0f} KiB (slots)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: consulta en frío de un mes de contaminación.
+Compara el camino JSON (json.load del año completo) con el almacén columnar
+(lectura del row group del mes) en latencia y memoria del proceso.
+
+Cada consulta se ejecuta en un proceso hijo nuevo (en frío de verdad) y la
+memoria se mide como RSS del proceso, que incluye el pool de memoria de
+Arrow: el pico con ru_maxrss (os.wait4) y lo retenido mientras se conserva
+el resultado con /proc/self/statm. Lo retenido se da sobre el RSS del hijo
+justo antes de la consulta y el pico, sobre el de un hijo que solo hace los
+imports.
+
+Uso:
+    python bench_pollution_store.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.pollution_store import PollutionStore, STORE_FILENAME, json_to_store
+
+BASE_PATH = os.path.join("data", "pollution_historical")
+SAMPLE_MONTHS = [(1995, 6), (2003, 1), (2010, 7), (2016, 11), (2020, 3), (2024, 12)]
+PAGE_KIB = os.sysconf("SC_PAGE_SIZE") / 1024
+
+
+def json_lookup(year, month):
+    """Camino actual: parsear el año completo y quedarse con el mes."""
+    with open(os.path.join(BASE_PATH, f"{year}.json"), 'r', encoding='utf-8') as f:
+        year_data = json.load(f)
+    return year_data, year_data['months'].get(str(month))
+
+
+def store_lookup(year, month):
+    """Camino columnar: abrir el almacén en frío y leer solo el mes."""
+    store = PollutionStore(BASE_PATH)
+    return store, store.read_month(year, month)
+
+
+def rss_kib():
+    """RSS actual del proceso en KiB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_KIB
+
+
+def run_child(mode, year, month):
+    """Hace una consulta en este proceso e imprime 'ms KiB_antes KiB_después'."""
+    before = rss_kib()
+    start = time.perf_counter()
+    result = None
+    if mode == "json":
+        result = json_lookup(year, month)
+    elif mode == "store":
+        result = store_lookup(year, month)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{elapsed} {before} {rss_kib()}")
+    del result
+
+
+def measure(mode, year, month):
+    """
+    Lanza la consulta en un hijo.
+
+    Returns:
+        (ms, KiB de pico de RSS (ru_maxrss), KiB retenidos, KiB de RSS antes de consultar)
+    """
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", mode,
+                             str(year), str(month)], stdout=subprocess.PIPE, text=True)
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"La consulta {mode} {year}-{month:02d} falló")
+    elapsed, before, after = (float(v) for v in output.split())
+    # ru_maxrss está en KiB en Linux
+    return elapsed, usage.ru_maxrss, after - before, before
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    if not os.path.exists(os.path.join(BASE_PATH, STORE_FILENAME)):
+        print("ℹ️ Almacén columnar no encontrado, generándolo desde los JSON...")
+        json_to_store(BASE_PATH)
+
+    _, base_peak, _, base = measure("baseline", *SAMPLE_MONTHS[0])
+    print(f"📦 Hijo que solo hace los imports: {base / 1024:.1f} MiB de RSS, "
+          f"pico {base_peak / 1024:.1f} MiB (las columnas KiB se miden por encima)\n")
+    print(f"{'Mes':<10}{'JSON ms':>10}{'Store ms':>10}{'JSON pico KiB':>15}"
+          f"{'Store pico KiB':>16}{'JSON ret. KiB':>15}{'Store ret. KiB':>16}")
+
+    totals = [0.0] * 6
+    for year, month in SAMPLE_MONTHS:
+        j_ms, j_peak, j_ret, _ = measure("json", year, month)
+        s_ms, s_peak, s_ret, _ = measure("store", year, month)
+        # El pico de los imports puede tapar el de la consulta: nunca menos que lo retenido
+        j_peak, s_peak = max(j_peak - base_peak, j_ret), max(s_peak - base_peak, s_ret)
+        for i, v in enumerate((j_ms, s_ms, j_peak, s_peak, j_ret, s_ret)):
+            totals[i] += v
+        print(f"{year}-{month:02d}   {j_ms:>10.2f}{s_ms:>10.2f}{j_peak:>15.0f}"
+              f"{s_peak:>16.0f}{j_ret:>15.0f}{s_ret:>16.0f}")
+
+    n = len(SAMPLE_MONTHS)
+    print("-" * 92)
+    print(f"{'Media':<10}{totals[0] / n:>10.2f}{totals[1] / n:>10.2f}{totals[2] / n:>15.0f}"
+          f"{totals[3] / n:>16.0f}{totals[4] / n:>15.0f}{totals[5] / n:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark: pico de memoria (RSS) de la conversión CSV mensual → consolidado → almacén.
+
+Compara la versión anterior (todas las filas de 30 años en una lista y un
+years_data completo antes de escribir) con la conversión en streaming que
+vuelca cada año en cuanto termina. Cada variante se ejecuta en un proceso
+hijo y se mide su ru_maxrss con os.wait4.
+
+Uso:
+    python bench_streaming_conversion.py [--years 32] [--stations 60]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+import consolidate_historical_data as consolidate
+from utils.generate_json_indexed import csv_to_json_fragmented
+from utils.pollution_store import write_store
+
+HEADERS = ['FECHA', 'COD_ESTACION', 'NOM_ESTACION', 'SO2', 'CO', 'NO', 'NO2', 'NOX', 'O3', 'PM10', 'PM2.5']
+VALENCIA = ['VALÈNCIA - PISTA DE SILLA', 'VALÈNCIA - POLITÈCNIC', 'VALÈNCIA - VIVERS',
+            'VALÈNCIA - AVD. FRANÇA', 'VALÈNCIA - MOLÍ DEL SOL', 'VALÈNCIA - BULEVARD SUD',
+            'VALÈNCIA - CENTRE', 'VALÈNCIA - OLIVERETA', 'VALÈNCIA - PATRAIX', 'VALÈNCIA - CABANYAL']
+
+
+def write_fixtures(csv_dir, years, stations, seed=11):
+    """CSV mensuales con el formato de la GVA (todas las estaciones de la Comunitat)."""
+    rng = random.Random(seed)
+    names = VALENCIA + [f"MUNICIPI {i} - ESTACIÓ" for i in range(stations - len(VALENCIA))]
+    paths = []
+    for year in range(1994, 1994 + years):
+        for month in range(1, 13):
+            path = os.path.join(csv_dir, f"contaminacion_{year}_{month:02d}.csv")
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(HEADERS)
+                for day in range(1, 29):
+                    for cod, name in enumerate(names):
+                        values = [f"{rng.uniform(0, 90):.0f}" if rng.random() > 0.2 else '-'
+                                  for _ in HEADERS[3:]]
+                        writer.writerow([f"{year}-{month:02d}-{day:02d}", f"46{cod:06d}", name] + values)
+            paths.append(path)
+    return paths
+
+
+def legacy_consolidate(csv_files, output_file):
+    """Versión anterior: todas las filas en memoria y escritura al final."""
+    rows = []
+    for filepath in csv_files:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter=';'):
+                station_name = row.get('NOM_ESTACION', '').strip()
+                if not consolidate.is_valencia_station(station_name):
+                    continue
+                if not any((row.get(p) or '').strip() not in ('', '-') for p in consolidate.POLLUTANTS_TO_KEEP):
+                    continue
+                coords = consolidate.get_station_coords(station_name)
+                rows.append({
+                    'COD_ESTACION': row.get('COD_ESTACION', '').strip(),
+                    'NOM_ESTACION': station_name,
+                    'FECHA': row.get('FECHA', '').strip(),
+                    'NO2': row.get('NO2', '-').strip(),
+                    'O3': row.get('O3', '-').strip(),
+                    'PM10': row.get('PM10', '-').strip(),
+                    'LATITUD': coords['lat'],
+                    'LONGITUD': coords['lon'],
+                })
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()), delimiter=';')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def legacy_index(csv_path, output_dir):
+    """Versión anterior de generate_json_indexed: years_data completo y luego escritura."""
+    years_data = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
+        'nombre': '', 'lat': '', 'lon': '', 'no2_values': [], 'o3_values': [], 'pm10_values': []})))
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            year, month = (int(x) for x in row['FECHA'].split('-')[:2])
+            sensor = years_data[year][month][row['COD_ESTACION']]
+            if not sensor['nombre']:
+                sensor['nombre'], sensor['lat'], sensor['lon'] = row['NOM_ESTACION'], row['LATITUD'], row['LONGITUD']
+            for column, key in (('NO2', 'no2_values'), ('O3', 'o3_values'), ('PM10', 'pm10_values')):
+                if row[column] and row[column] != '-':
+                    sensor[key].append(float(row[column]))
+    for year in sorted(years_data):
+        months = {str(m): dict(years_data[year][m]) for m in sorted(years_data[year])}
+        with open(os.path.join(output_dir, f"{year}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'year': year, 'months': months}, f, ensure_ascii=False, indent=2)
+    write_store(years_data, output_dir)
+
+
+def load_year(work_dir, out, year=2000):
+    """JSON anual con las coordenadas normalizadas a float."""
+    with open(os.path.join(work_dir, out, f"{year}.json"), encoding='utf-8') as f:
+        data = json.load(f)
+    for sensors in data['months'].values():
+        for sensor in sensors.values():
+            sensor['lat'], sensor['lon'] = float(sensor['lat']), float(sensor['lon'])
+    return data
+
+
+def run_child(mode, work_dir):
+    """Ejecuta una variante en el proceso hijo."""
+    csv_dir = os.path.join(work_dir, "csv")
+    csv_files = sorted(os.path.join(csv_dir, name) for name in os.listdir(csv_dir))
+    consolidated = os.path.join(work_dir, f"consolidated_{mode}.csv")
+    out_dir = os.path.join(work_dir, f"out_{mode}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    if mode == "baseline":
+        # Coste fijo: imports + inicialización de Arrow/zstd al escribir un mes
+        write_store({1994: {1: {"0": {'nombre': '', 'lat': '', 'lon': '', 'no2_values': [1.0],
+                                      'o3_values': [], 'pm10_values': []}}}}, out_dir)
+        return
+    if mode == "legacy":
+        legacy_consolidate(csv_files, consolidated)
+        legacy_index(consolidated, out_dir)
+    elif mode == "streaming":
+        # Un solo recorrido: CSV consolidado + JSON anuales + almacén
+        consolidate.consolidate_data(csv_files, consolidated, out_dir)
+    elif mode == "streaming-index":
+        # Solo la segunda etapa, desde el CSV consolidado de la variante legacy
+        csv_to_json_fragmented(os.path.join(work_dir, "consolidated_legacy.csv"), out_dir)
+
+
+def measure(mode, work_dir):
+    """Lanza la variante en un proceso hijo y devuelve (segundos, pico RSS en MiB)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", mode, work_dir],
+                            stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"La variante {mode} falló")
+    # ru_maxrss está en KiB en Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=32)
+    parser.add_argument("--stations", type=int, default=60)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "DIR"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_streaming_")
+    try:
+        os.makedirs(os.path.join(work_dir, "csv"))
+        paths = write_fixtures(os.path.join(work_dir, "csv"), args.years, args.stations)
+        size_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+        print(f"📂 {len(paths)} CSV mensuales sintéticos ({args.years} años, "
+              f"{args.stations} estaciones, {size_mb:.0f} MB)\n")
+
+        results = [(name, measure(mode, work_dir)) for name, mode in (
+            ("Base (imports + Arrow)", "baseline"),
+            ("Anterior (todo en memoria)", "legacy"),
+            ("Streaming (un año)", "streaming"),
+            ("  solo etapa CSV → almacén", "streaming-index"),
+        )]
+
+        print(f"{'':<30}{'Tiempo s':>10}{'Pico RSS MiB':>15}")
+        for name, (elapsed, rss) in results:
+            print(f"{name:<30}{elapsed:>10.1f}{rss:>15.1f}")
+
+        base = results[0][1][1]
+        legacy, streaming = results[1][1][1], results[2][1][1]
+        print(f"\n🧠 Memoria retenida por los datos (sobre la base): "
+              f"{legacy - base:.1f} MiB → {streaming - base:.1f} MiB")
+
+        # Misma salida en ambas variantes (las coordenadas del CSV consolidado
+        # llegan como texto a la etapa de índice y como número al streaming)
+        assert load_year(work_dir, "out_legacy") == load_year(work_dir, "out_streaming"), \
+            "Los JSON anuales no coinciden"
+        print("✅ JSON anuales idénticos en ambas variantes")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
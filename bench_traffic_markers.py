@@ -0,0 +1,136 @@
+"""
+Benchmark: construcción de marcadores de tráfico histórico.
+Compara el camino antiguo (iterrows + cadena de if por fila) con el vectorizado
+(coordenadas unidas al cargar, índice mensual, np.digitize y arrays columnares)
+sobre una ciudad sintética con 10.000 ATAs.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.traffic_index import TrafficMonthIndex
+from utils.traffic_markers import merge_coordinates, marker_specs
+
+N_ATAS = 10_000
+MONTHS = [f"2024-{m:02d}" for m in range(1, 13)]
+COLORS = ["green", "lime", "amber", "orange", "red", "dark_red"]
+
+
+def synthetic_city(n_atas, seed=42):
+    """Genera tablas de tráfico y coordenadas con el mismo esquema que los parquet."""
+    rng = np.random.default_rng(seed)
+    atas = np.array([f"A{i}" for i in range(n_atas)], dtype=object)
+
+    lat = (39.47 + rng.normal(0, 0.03, n_atas)).round(7).astype(str)
+    lon = (-0.37 + rng.normal(0, 0.03, n_atas)).round(7).astype(str)
+    # ~10% de ATAs sin coordenadas, como en el fichero real
+    no_coords = rng.random(n_atas) < 0.1
+    lat = np.where(no_coords, None, lat)
+    lon = np.where(no_coords, None, lon)
+
+    coords = pd.DataFrame({
+        'ATA': atas,
+        'DESCRIPCION': [f"CALLE {i}" for i in range(n_atas)],
+        'LON': lon,
+        'LAT': lat,
+    })
+
+    traffic = pd.DataFrame({
+        'ATA': np.tile(atas, len(MONTHS)),
+        'FECHA_RAW': np.repeat(MONTHS, n_atas),
+        'IMD': rng.lognormal(9.5, 1.0, n_atas * len(MONTHS)).round(),
+        'FECHA': np.repeat(MONTHS, n_atas),
+    })
+    # Mezclar filas para no partir de una tabla ya ordenada
+    traffic = traffic.sample(frac=1, random_state=seed).reset_index(drop=True)
+    return traffic, coords
+
+
+def legacy_specs(traffic_df, coords_df, date_str):
+    """Camino antiguo de update_historical_traffic_markers (sin crear Markers)."""
+    df = traffic_df.copy()
+    df['FECHA'] = pd.to_datetime(df['FECHA'])
+    df_filtered = df[df['FECHA'] == date_str]
+
+    coords_dict = {}
+    for _, row_c in coords_df.iterrows():
+        coords_dict[row_c['ATA']] = {
+            'lat': row_c['LAT'],
+            'lon': row_c['LON'],
+            'desc': row_c['DESCRIPCION']
+        }
+
+    specs = []
+    for _, row in df_filtered.iterrows():
+        coord = coords_dict.get(row['ATA'])
+        if not coord or pd.isna(coord['lat']) or pd.isna(coord['lon']):
+            continue
+        imd_val = int(row['IMD'])
+        if imd_val < 5000:
+            color = COLORS[0]
+        elif imd_val < 15000:
+            color = COLORS[1]
+        elif imd_val < 30000:
+            color = COLORS[2]
+        elif imd_val < 50000:
+            color = COLORS[3]
+        elif imd_val < 80000:
+            color = COLORS[4]
+        else:
+            color = COLORS[5]
+        specs.append((row['ATA'], coord['lat'], coord['lon'], imd_val, color))
+    return specs
+
+
+def vectorised_specs(index, date_str):
+    """Camino nuevo: corte del índice + specs columnares + bucle final de zip."""
+    specs = marker_specs(index.month(date_str))
+    return [
+        (ata, lat, lon, imd, COLORS[bucket])
+        for ata, lat, lon, imd, bucket in zip(
+            specs['ata'], specs['lat'], specs['lon'], specs['imd'], specs['bucket'])
+    ]
+
+
+def main():
+    print(f"🏙️ Ciudad sintética: {N_ATAS:,} ATAs x {len(MONTHS)} meses")
+    traffic, coords = synthetic_city(N_ATAS)
+
+    start = time.perf_counter()
+    index = TrafficMonthIndex(merge_coordinates(traffic, coords))
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"⏱️ Preparación única al cargar (merge + índice): {load_ms:.1f} ms\n")
+
+    print(f"{'Mes':<10}{'Antiguo ms':>12}{'Vectorizado ms':>16}{'Marcadores':>12}{'x':>8}")
+    legacy_total = vector_total = 0.0
+    for date_str in MONTHS[:4]:
+        start = time.perf_counter()
+        old = legacy_specs(traffic, coords, date_str)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        new = vectorised_specs(index, date_str)
+        vector_ms = (time.perf_counter() - start) * 1000
+
+        # Mismo conjunto de marcadores y colores
+        assert sorted((a, c) for a, _, _, _, c in old) == sorted((a, c) for a, _, _, _, c in new)
+
+        legacy_total += legacy_ms
+        vector_total += vector_ms
+        print(f"{date_str:<10}{legacy_ms:>12.1f}{vector_ms:>16.1f}{len(new):>12,}"
+              f"{legacy_ms / vector_ms:>8.0f}")
+
+    print("-" * 58)
+    print(f"{'Total':<10}{legacy_total:>12.1f}{vector_total:>16.1f}{'':>12}"
+          f"{legacy_total / vector_total:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
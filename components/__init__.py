@@ -2,9 +2,11 @@
 Paquete de componentes UI para Data Detective.
 """
 
+from .data_detective_ui import DataDetectiveUI
 from .left_panel import LeftPanel
 from .map_container import MapContainer
+from .render_scheduler import RenderScheduler
 from .right_panel import RightPanel
 from .ui_elements import UIElements
 
-__all__ = ['LeftPanel', 'MapContainer', 'RightPanel', 'UIElements']
+__all__ = ['DataDetectiveUI', 'LeftPanel', 'MapContainer', 'RenderScheduler', 'RightPanel', 'UIElements']
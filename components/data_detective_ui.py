@@ -0,0 +1,60 @@
+"""
+Interfaz principal de Data Detective: panel izquierdo, mapa y panel derecho.
+"""
+
+import flet as ft
+from config import PERFORMANCE
+from utils import on_data_refreshed, refresh_feeds
+from utils.refresh_scheduler import RefreshScheduler
+from .left_panel import LeftPanel
+from .map_container import MapContainer
+from .render_scheduler import RenderScheduler
+from .right_panel import RightPanel
+
+
+class DataDetectiveUI(ft.Row):
+    """Interfaz principal de Data Detective."""
+
+    def __init__(self, page: ft.Page, render: RenderScheduler = None):
+        super().__init__(spacing=0, expand=True,vertical_alignment=ft.CrossAxisAlignment.STRETCH)
+
+        # Los tres paneles comparten planificador: sus cambios del mismo
+        # frame salen en un solo page.update()
+        self.render = render if render is not None else RenderScheduler(page)
+
+        # Crear MapContainer primero
+        self.map_container = MapContainer(page=page, render=self.render)
+
+        # Crear LeftPanel con callback al MapContainer
+        self.left_panel = LeftPanel(
+            page=page,
+            on_layer_change=self.map_container.on_layer_change,
+            render=self.render,
+        )
+
+        # Crear RightPanel
+        self.right_panel = RightPanel(page=page, render=self.render)
+
+        # Agregar los paneles a la fila
+        self.controls = [
+            self.left_panel,
+            self.map_container,
+            self.right_panel,
+        ]
+
+        # Refresco periódico de los feeds en tiempo real, con cadencia por feed.
+        # Los refrescos stale-while-revalidate del arranque usan el mismo camino.
+        self.refresher = RefreshScheduler(
+            PERFORMANCE["refresh_intervals"],
+            refresh_feeds,
+            on_refresh=self.apply_live_data,
+        )
+        on_data_refreshed(lambda key, data: self.apply_live_data({key: data}))
+        self.refresher.start()
+
+    def apply_live_data(self, feeds):
+        """Aplica datos refrescados al mapa y al panel izquierdo en un solo repintado."""
+        changed = self.map_container.update_live_data(feeds, update_page=False)
+        self.left_panel.load_sensor_data(update_page=False)
+        print(f"🔄 Refrescados {', '.join(feeds)}: {changed} marcadores cambiados")
+        self.render.request_update(self.map_container, self.left_panel)
@@ -3,7 +3,9 @@ Panel lateral izquierdo con capas de inteligencia y nodos de detección.
 """
 
 import flet as ft
+import numpy as np
 from config.theme import COLORS
+from .render_scheduler import RenderScheduler
 from .ui_elements import UIElements
 from datetime import datetime
 
@@ -11,8 +13,9 @@ from datetime import datetime
 class LeftPanel(ft.Container):
     """Panel lateral izquierdo con capas de inteligencia y nodos activos."""
     
-    def __init__(self, page: ft.Page = None, on_layer_change=None):
+    def __init__(self, page: ft.Page = None, on_layer_change=None, render=None):
         self._page_ref = page
+        self._render = render if render is not None or page is None else RenderScheduler(page)
         self.on_layer_change = on_layer_change  # Callback para notificar cambios de capa
         self.active_layer = "Precipitaciones"  # Capa activa por defecto
         self.nodes_column_ref = ft.Ref[ft.Column]()
@@ -128,8 +131,8 @@ class LeftPanel(ft.Container):
             row.controls[2].color = COLORS["text_white"] if is_active else COLORS["text_dark_gray"]
             row.controls[4].bgcolor = COLORS[self._get_layer_color(layer_name)] if is_active else "transparent"
         
-        if self._page_ref:
-            self._page_ref.update()
+        if self._render:
+            self._render.request_update(self)
     
     def _get_layer_color(self, layer_name):
         """Obtiene el color asociado a una capa."""
@@ -234,81 +237,71 @@ class LeftPanel(ft.Container):
             ]
         )
     
-    def load_sensor_data(self):
-        """Carga datos de sensores en tiempo real."""
+    def load_sensor_data(self, update_page=True):
+        """
+        Carga datos de sensores en tiempo real.
+
+        Args:
+            update_page: Pedir el repintado al terminar (False cuando el
+                refresco periódico agrupa varios cambios en un solo update)
+        """
         try:
-            from utils import get_cached_weather_data, get_cached_air_quality_data, get_cached_traffic_data
-            from utils.RealTimeTrafficValencia import get_estado_descripcion
+            from utils import get_snapshot
+            from utils.RealTimeTrafficValencia import get_estado_descripcion, ESTADOS_TRAFICO
+            from utils.realtime_records import format_number, has_value
             
-            weather_data = get_cached_weather_data()
-            air_quality_data = get_cached_air_quality_data()
-            traffic_data = get_cached_traffic_data()
+            # Snapshots compartidos: se construyen una vez por ingesta de cada feed
+            weather = get_snapshot("weather_data")
+            air_quality = get_snapshot("air_quality_data")
+            traffic = get_snapshot("traffic_data")
+            weather_data = weather.records
             
             nodes = []
             
             # Agregar datos meteorológicos destacados (primeras 2 estaciones con precipitación)
-            precip_stations = []
-            for c in weather_data:
-                if c.prec and c.prec != "-":
-                    try:
-                        prec_val = float(c.prec.replace(',', '.'))
-                        if prec_val > 0:
-                            precip_stations.append(c)
-                    except:
-                        pass
-            precip_stations = precip_stations[:2]
+            if weather_data:
+                precip_stations = weather.where(weather["prec"] > 0)[:2]
+            else:
+                precip_stations = []
             
             if not precip_stations:
                 precip_stations = weather_data[:2]
             
             for clima in precip_stations:
-                if clima.tmed and clima.tmed != "-":
+                if has_value(clima.tmed):
                     # Determinar si hay alerta por precipitación
                     alert_color = COLORS["primary"]
-                    if clima.prec and clima.prec != "-":
-                        try:
-                            prec_val = float(clima.prec.replace(',', '.'))
-                            if prec_val > 10:
-                                alert_color = COLORS["event_danger"]
-                            elif prec_val > 5:
-                                alert_color = COLORS["traffic"]
-                        except:
-                            pass
+                    if clima.prec > 10:
+                        alert_color = COLORS["event_danger"]
+                    elif clima.prec > 5:
+                        alert_color = COLORS["traffic"]
                     
                     nodes.append(
                         self._create_enhanced_node_card(
                             f"☔ {clima.estacion[:18]}",
-                            f"{clima.tmed}°C",
+                            f"{format_number(clima.tmed)}°C",
                             alert_color,
                             ft.icons.Icons.WATER_DROP,
-                            f"💧 {clima.prec}mm" if clima.prec != "-" else "Sin lluvia",
-                            f"💨 {clima.hr}%" if clima.hr != "-" else ""
+                            f"💧 {format_number(clima.prec)}mm" if has_value(clima.prec) else "Sin lluvia",
+                            f"💨 {format_number(clima.hr)}%" if has_value(clima.hr) else ""
                         )
                     )
             
             # Agregar datos de calidad del aire (estaciones con peor calidad)
-            no2_stations = sorted(
-                [e for e in air_quality_data if e.no2 and e.no2 != "-"],
-                key=lambda x: float(x.no2) if x.no2 != "-" else 0,
-                reverse=True
-            )[:2]
+            no2_stations = air_quality.top("no2", 2)
             
             for estacion in no2_stations:
                 # Determinar color según nivel de NO2
                 alert_color = COLORS["no2"]
-                try:
-                    no2_val = float(estacion.no2)
-                    if no2_val > 200:
-                        alert_color = COLORS["event_danger"]
-                    elif no2_val > 100:
-                        alert_color = COLORS["traffic"]
-                except:
-                    pass
+                if estacion.no2 > 200:
+                    alert_color = COLORS["event_danger"]
+                elif estacion.no2 > 100:
+                    alert_color = COLORS["traffic"]
                 
                 nodes.append(
                     self._create_enhanced_node_card(
                         f"🌫️ {estacion.direccion[:18]}",
-                        f"{estacion.no2} μg/m³",
+                        f"{format_number(estacion.no2)} μg/m³",
                         alert_color,
                         ft.icons.Icons.CLOUD,
                         f"NO2",
@@ -316,11 +309,14 @@ class LeftPanel(ft.Container):
                     )
                 )
             
-            # Agregar datos de tráfico (estaciones con problemas)
+            # Agregar datos de tráfico (estaciones con problemas): solo denso,
+            # congestionado o cortado, filtrando la columna de códigos de estado
+            alert_codes = [int(codigo) for codigo, (_, color) in ESTADOS_TRAFICO.items()
+                           if color in ["yellow", "red"]]
             traffic_alerts = []
-            for t in traffic_data:
-                estado_desc, color_sugerido = get_estado_descripcion(t.estado)
-                if color_sugerido in ["yellow", "red"]:  # Solo denso, congestionado o cortado
+            if traffic.records:
+                for t in traffic.where(np.isin(traffic["estado"], alert_codes)):
+                    estado_desc, color_sugerido = get_estado_descripcion(t.estado)
                     traffic_alerts.append((t, estado_desc, color_sugerido))
             
             # Mostrar primeras 2 alertas de tráfico
@@ -339,8 +335,8 @@ class LeftPanel(ft.Container):
                         estado_desc,
                         alert_color,
                         ft.icons.Icons.TRAFFIC,
-                        f"🚗 {t.intensidad} v/h" if t.intensidad != "-" else "",
-                        f"⚡ {t.velocidad} km/h" if t.velocidad != "-" else ""
+                        f"🚗 {format_number(t.intensidad)} v/h" if has_value(t.intensidad) else "",
+                        f"⚡ {format_number(t.velocidad)} km/h" if has_value(t.velocidad) else ""
                     )
                 )
             
@@ -348,14 +344,14 @@ class LeftPanel(ft.Container):
             if len(nodes) < 4:
                 # Agregar más estaciones meteorológicas
                 for clima in weather_data[len(precip_stations):4]:
-                    if clima.tmed and clima.tmed != "-":
+                    if has_value(clima.tmed):
                         nodes.append(
                             self._create_enhanced_node_card(
                                 f"🌡️ {clima.estacion[:18]}",
-                                f"{clima.tmed}°C",
+                                f"{format_number(clima.tmed)}°C",
                                 COLORS["primary"],
                                 ft.icons.Icons.THERMOSTAT,
-                                f"💨 {clima.hr}%" if clima.hr != "-" else "",
+                                f"💨 {format_number(clima.hr)}%" if has_value(clima.hr) else "",
                                 ""
                             )
                         )
@@ -389,8 +385,8 @@ class LeftPanel(ft.Container):
                 now = datetime.now().strftime("%H:%M:%S")
                 self.last_update_ref.current.value = f"Última actualización: {now}"
             
-            if self._page_ref:
-                self._page_ref.update()
+            if self._render and update_page:
+                self._render.request_update(self)
                 
         except Exception as e:
             print(f"❌ Error al cargar datos de sensores: {e}")
@@ -1,19 +1,49 @@
 """
 Contenedor del mapa central con selector de capas.
+
+Solo se montan en el MarkerLayer los marcadores que caen dentro del viewport
+(con margen); al desplazar o hacer zoom se añaden y quitan los que entran o
+salen de él. Hasta PERFORMANCE["cluster_max_zoom"] los marcadores cercanos se
+agrupan en un clúster por celda del nivel de zoom (utils.marker_clusters),
+con el número de puntos y el color del más grave; al pulsarlo se acerca el mapa.
 """
 
+import threading
+
 from flet import MouseCursor
 import flet as ft
 import flet_map as mapa
 from config.map_styles import MAP_STYLES
+from config.performance import PERFORMANCE
 from config.theme import COLORS
+from utils.marker_clusters import ClusterIndex, cluster_level
+from utils.realtime_records import format_number, has_value
+from utils.spatial_index import GridIndex, contains, viewport_bounds
+from .marker_pool import cluster_marker
+from .render_scheduler import RenderScheduler
+
+
+# Centro y zoom iniciales del mapa
+INITIAL_CENTER = (39.4699, -0.3763)
+INITIAL_ZOOM = 12
+
+# Colores de los marcadores de menor a mayor gravedad: un clúster toma el más grave
+SEVERITY_COLORS = [
+    COLORS["text_gray"],
+    COLORS["primary"],
+    COLORS["precipitation"],
+    COLORS["pollution"],
+    COLORS["traffic"],
+    COLORS["event_danger"],
+]
 
 
 class MapContainer(ft.Container):
     """Contenedor del mapa central con selector de capas y controles."""
 
-    def __init__(self, page: ft.Page = None):
+    def __init__(self, page: ft.Page = None, render=None):
         self._page_ref = page
+        self._render = render if render is not None or page is None else RenderScheduler(page)
         self.current_map_style = "Normal"
         self.current_layer = "Precipitaciones"  # Capa activa
         self.map_style_buttons_refs = {}
@@ -21,6 +51,7 @@ class MapContainer(ft.Container):
         # Referencias para las capas
         self.tile_layer_ref = ft.Ref[mapa.TileLayer]()
         self.marker_layer_ref = ft.Ref[mapa.MarkerLayer]()
+        self.map_ref = ft.Ref[mapa.Map]()
 
         # Almacenar todos los marcadores por tipo
         self.all_markers = {
@@ -29,6 +60,23 @@ class MapContainer(ft.Container):
             "Contaminación (O3, PM10)": [],
             "Flujo Tráfico DGT": [],
         }
+        # Por capa: id del registro → (firma, marcador), para reutilizar
+        # los marcadores que no cambian entre refrescos
+        self._marker_index = {layer: {} for layer in self.all_markers}
+
+        # Índice espacial por capa (id → coordenadas), zona consultada
+        # (viewport con margen) y marcadores montados ahora, por id
+        self._grid = {layer: GridIndex(PERFORMANCE["map_grid_cell_deg"]) for layer in self.all_markers}
+        self._query_bounds = viewport_bounds(*INITIAL_CENTER, INITIAL_ZOOM, *self._map_size(),
+                                             padding=PERFORMANCE["map_viewport_padding"])
+        self._query_zoom = INITIAL_ZOOM
+        self._mounted = {}
+        # Por capa: (id → posición, ClusterIndex) y marcadores de clúster
+        # por clave de celda → (firma, marcador)
+        self._clusters = {layer: None for layer in self.all_markers}
+        self._cluster_markers = {layer: {} for layer in self.all_markers}
+        # Los refrescos llegan desde otro hilo que los eventos del mapa
+        self._markers_lock = threading.Lock()
 
         # Estado para la tarjeta de información
         self.info_card_ref = ft.Ref[ft.Container]()
@@ -46,14 +94,17 @@ class MapContainer(ft.Container):
         self.current_layer = layer_name
         self.update_visible_markers()
 
-    def update_visible_markers(self):
-        """Actualiza los marcadores visibles según la capa activa."""
+    def update_visible_markers(self, update_page=True):
+        """Actualiza los marcadores montados según la capa activa y el viewport."""
         if self.marker_layer_ref.current:
-            visible_markers = self.all_markers.get(self.current_layer, [])
+            with self._markers_lock:
+                visible_markers, changed = self._cull_markers()
+            if not changed:
+                return
             self.marker_layer_ref.current.markers = visible_markers
             print(
-                f"✅ Mostrando {len(visible_markers)
-                                 } marcadores de {self.current_layer}"
+                f"✅ Mostrando {len(visible_markers)} de {len(self.all_markers.get(self.current_layer, []))
+                                                      } marcadores de {self.current_layer}"
             )
 
             # Debug: mostrar primeros marcadores
@@ -63,8 +114,120 @@ class MapContainer(ft.Container):
                       visible_markers[0].coordinates}"
                 )
 
-            if self._page_ref:
-                self._page_ref.update()
+            if self._render and update_page:
+                self._render.request_update(self)
+
+    def _cull_markers(self):
+        """
+        Marcadores de la capa activa dentro de la zona consultada.
+
+        Los que ya estaban montados conservan su posición en la lista y los
+        nuevos se añaden al final, así Flet solo envía altas y bajas.
+
+        Returns:
+            (lista de marcadores, True si difiere de la montada)
+        """
+        keys = self._grid[self.current_layer].query(self._query_bounds)
+        visible = self._display_markers(self.current_layer, keys)
+
+        mounted = {}
+        for key, marker in self._mounted.items():
+            if visible.get(key) is marker:
+                mounted[key] = marker
+        kept = len(mounted)
+        for key in visible.keys() - mounted.keys():
+            mounted[key] = visible[key]
+
+        changed = kept != len(self._mounted) or len(mounted) != kept
+        self._mounted = mounted
+        return list(mounted.values()), changed
+
+    def _display_markers(self, layer, keys):
+        """
+        Marcadores a montar para unos ids: los sueltos o el clúster que los agrupa.
+
+        Args:
+            layer: Nombre de la capa
+            keys: Ids de los marcadores dentro de la zona consultada
+
+        Returns:
+            Dict id (o clave de celda del clúster) → mapa.Marker
+        """
+        index = self._marker_index[layer]
+        clustered = self._clusters[layer]
+        level = clustered[1].level(self._query_zoom) if clustered is not None else None
+        if level is None:
+            return {key: index[key][1] for key in keys}
+
+        positions, clusters = clustered
+        ids = clusters.cluster_ids(level)
+        groups = clusters.clusters(level)
+        visible = {}
+        for key in keys:
+            group = groups[ids[positions[key]]]
+            if group.count == 1:
+                visible[key] = index[key][1]
+            elif group.key not in visible:
+                visible[group.key] = self._cluster_marker(layer, group, level)
+        return visible
+
+    def _cluster_marker(self, layer, group, level):
+        """Marcador de un clúster, reutilizado mientras no cambien su posición, tamaño o color."""
+        color = SEVERITY_COLORS[group.value]
+        signature = (group.lat, group.lon, group.count, color)
+        entry = self._cluster_markers[layer].get(group.key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        marker = cluster_marker(
+            group.lat,
+            group.lon,
+            group.count,
+            color,
+            tooltip=f"📍 {group.count} puntos\n🔍 Pulsa para acercar",
+            on_click=self._zoom_to_cluster(group.lat, group.lon, level),
+        )
+        self._cluster_markers[layer][group.key] = (signature, marker)
+        return marker
+
+    def _zoom_to_cluster(self, lat, lon, level):
+        """Manejador que acerca el mapa dos niveles sobre un clúster."""
+
+        async def on_click(e):
+            if self.map_ref.current:
+                await self.map_ref.current.move_to(
+                    destination=mapa.MapLatitudeLongitude(lat, lon),
+                    zoom=min(level + 2, PERFORMANCE["cluster_max_zoom"] + 1),
+                )
+
+        return on_click
+
+    def _map_size(self):
+        """
+        Tamaño del mapa en píxeles.
+
+        Se usa el de la ventana: sobrestima el mapa (sin los paneles laterales)
+        y deja la zona consultada del lado seguro.
+        """
+        width = getattr(self._page_ref, "width", None) or 1600
+        height = getattr(self._page_ref, "height", None) or 900
+        return width, height
+
+    def _on_position_change(self, e):
+        """Vuelve a consultar el índice cuando el viewport sale de la zona consultada."""
+        camera = e.camera
+        lat, lon = camera.center.latitude, camera.center.longitude
+        view = viewport_bounds(lat, lon, camera.zoom, *self._map_size())
+        # Dentro del margen, sin cambiar de nivel de zoom ni de nivel de agrupación
+        # no hace falta nada
+        if (contains(self._query_bounds, view) and abs(camera.zoom - self._query_zoom) < 1
+                and cluster_level(camera.zoom) == cluster_level(self._query_zoom)):
+            return
+        with self._markers_lock:
+            self._query_bounds = viewport_bounds(lat, lon, camera.zoom, *self._map_size(),
+                                                 padding=PERFORMANCE["map_viewport_padding"])
+            self._query_zoom = camera.zoom
+        self.update_visible_markers()
 
     def on_marker_click(self, marker_data):
         """Maneja el click en un marcador."""
@@ -82,16 +245,16 @@ class MapContainer(ft.Container):
         self.info_card_ref.current.visible = True
         self.info_card_ref.current.content = self._create_info_card_content(data)
 
-        if self._page_ref:
-            self._page_ref.update()
+        if self._render:
+            self._render.request_update(self)
 
     def _close_info_card(self, e):
         """Cierra la tarjeta de información."""
         if self.info_card_ref.current:
             self.info_card_ref.current.visible = False
             self.selected_marker_data = None
-            if self._page_ref:
-                self._page_ref.update()
+            if self._render:
+                self._render.request_update(self)
 
     def _create_info_card_content(self, data):
         """Crea el contenido de la tarjeta de información."""
@@ -230,12 +393,14 @@ class MapContainer(ft.Container):
     def _create_map(self):
         """Crea el componente del mapa."""
         return mapa.Map(
+            ref=self.map_ref,
             expand=True,
-            initial_center=mapa.MapLatitudeLongitude(39.4699, -0.3763),
-            initial_zoom=12,
+            initial_center=mapa.MapLatitudeLongitude(*INITIAL_CENTER),
+            initial_zoom=INITIAL_ZOOM,
             interaction_configuration=mapa.InteractionConfiguration(
                 flags=mapa.InteractionFlag.ALL
             ),
+            on_position_change=self._on_position_change,
             layers=[
                 mapa.TileLayer(
                     ref=self.tile_layer_ref,
@@ -347,7 +512,8 @@ class MapContainer(ft.Container):
                 ft.FontWeight.BOLD if is_active else ft.FontWeight.NORMAL
             )
 
-        self.update()
+        if self._render:
+            self._render.request_update(self)
         print(f"✅ Mapa actualizado a {style_name}")
 
     def _create_info_card(self):
@@ -415,6 +581,311 @@ class MapContainer(ft.Container):
             coordinates=mapa.MapLatitudeLongitude(lat, lon),
         )
 
+    def _marker_spec(self, key, lat, lon, color, icon, marker_data, tooltip):
+        """
+        Describe un marcador sin crearlo todavía.
+
+        La firma reúne todo lo que se ve del marcador (posición, color, tooltip
+        e información de la tarjeta): si no cambia entre dos refrescos, el
+        mapa.Marker existente se reutiliza tal cual.
+        """
+        return {
+            "id": key,
+            "lat": lat,
+            "lon": lon,
+            "color": color,
+            "icon": icon,
+            "marker_data": marker_data,
+            "tooltip": tooltip,
+            "signature": (lat, lon, color, tooltip, tuple(marker_data["info"].items())),
+        }
+
+    def _weather_marker_specs(self, weather_data):
+        """Especificaciones de los marcadores de precipitaciones (AVAMET)."""
+        from utils.avamet_coordinates import get_station_coordinates
+
+        specs = []
+        for clima in weather_data:
+            if has_value(clima.prec):
+                # Obtener coordenadas GPS de la estación
+                coords = get_station_coordinates(clima.estacion)
+
+                if coords:
+                    # Determinar color según precipitación
+                    color = COLORS["precipitation"]
+                    if clima.prec > 10:
+                        color = COLORS["event_danger"]
+                    elif clima.prec > 5:
+                        color = COLORS["traffic"]
+
+                    # Construir info dinámicamente
+                    prec = format_number(clima.prec)
+                    info_w = {"Lluvia caída": f"{prec} mm"}
+                    if has_value(clima.tmed):
+                        info_w["Temperatura"] = f"{format_number(clima.tmed)}°C"
+                    if has_value(clima.hr):
+                        info_w["Humedad del aire"] = f"{format_number(clima.hr)}%"
+
+                    marker_data = {
+                        "tipo": "precipitacion",
+                        "titulo": clima.estacion,
+                        "icon": ft.icons.Icons.WATER_DROP,
+                        "color": color,
+                        "info": info_w,
+                    }
+
+                    specs.append(self._marker_spec(
+                        clima.estacion,
+                        coords["lat"],
+                        coords["lon"],
+                        color,
+                        ft.icons.Icons.WATER_DROP,
+                        marker_data,
+                        tooltip=f"🌦️ {clima.estacion}\n💧 {prec} mm de lluvia",
+                    ))
+        return specs
+
+    def _no2_marker_specs(self, air_quality_data):
+        """Especificaciones de los marcadores de contaminación NO2."""
+        specs = []
+        for estacion in air_quality_data:
+            if estacion.geo_point_2d and has_value(estacion.no2):
+                lat = estacion.geo_point_2d.get("lat")
+                lon = estacion.geo_point_2d.get("lon")
+
+                if lat and lon:
+                    # Determinar color según nivel de NO2
+                    color = COLORS["primary"]
+                    if estacion.no2 > 40:
+                        color = COLORS["event_danger"]
+                    elif estacion.no2 > 20:
+                        color = COLORS["traffic"]
+
+                    # Construir info dinámicamente
+                    no2 = format_number(estacion.no2)
+                    info_aq = {"Estación de control": estacion.direccion,
+                               "Nivel de NO2": f"{no2} μg/m³"}
+                    if estacion.calidad_am:
+                        info_aq["Estado del aire"] = estacion.calidad_am
+
+                    marker_data = {
+                        "tipo": "no2",
+                        "titulo": estacion.direccion,
+                        "icon": ft.icons.Icons.CLOUD,
+                        "color": color,
+                        "info": info_aq,
+                    }
+
+                    specs.append(self._marker_spec(
+                        estacion.direccion,
+                        lat,
+                        lon,
+                        color,
+                        ft.icons.Icons.CLOUD,
+                        marker_data,
+                        tooltip=f"🍀 {estacion.direccion}\n💨 Aire (NO2): {no2} μg/m³",
+                    ))
+        return specs
+
+    def _o3_pm10_marker_specs(self, air_quality_data):
+        """Especificaciones de los marcadores de contaminación O3/PM10."""
+        specs = []
+        for estacion in air_quality_data:
+            if estacion.geo_point_2d and (
+                has_value(estacion.o3) or has_value(estacion.pm10)
+            ):
+                lat = estacion.geo_point_2d.get("lat")
+                lon = estacion.geo_point_2d.get("lon")
+
+                if lat and lon:
+
+                    # Construir info dinámicamente
+                    info_aq2 = {"Estación de control": estacion.direccion}
+                    if has_value(estacion.o3):
+                        info_aq2["Gas Ozono (O3)"] = f"{format_number(estacion.o3)} μg/m³"
+                    if has_value(estacion.pm10):
+                        info_aq2["Partículas (PM10)"] = f"{format_number(estacion.pm10)} μg/m³"
+
+                    marker_data = {
+                        "tipo": "o3_pm10",
+                        "titulo": estacion.direccion,
+                        "icon": ft.icons.Icons.GRAIN,
+                        "color": COLORS["pollution"],
+                        "info": info_aq2,
+                    }
+
+                    specs.append(self._marker_spec(
+                        estacion.direccion,
+                        lat,
+                        lon,
+                        COLORS["pollution"],
+                        ft.icons.Icons.GRAIN,
+                        marker_data,
+                        tooltip=f"🌫️ {estacion.direccion}\n📊 Pulsa para ver partículas en suspensión",
+                    ))
+        return specs
+
+    def _traffic_marker_specs(self, traffic_data):
+        """Especificaciones de los marcadores de tráfico DGT."""
+        from utils.RealTimeTrafficValencia import get_estado_descripcion
+
+        # Color según estado del tráfico
+        color_map = {
+            "green": COLORS["primary"],
+            "yellow": COLORS["traffic"],
+            "red": COLORS["event_danger"],
+            "gray": COLORS["text_gray"],
+        }
+
+        specs = []
+        for estacion in traffic_data:
+            if estacion.geo_point_2d:
+                lat = estacion.geo_point_2d.get("lat")
+                lon = estacion.geo_point_2d.get("lon")
+
+                if lat and lon:
+                    # Obtener descripción y color sugerido del estado
+                    estado_desc, color_sugerido = get_estado_descripcion(
+                        estacion.estado
+                    )
+                    color = color_map.get(color_sugerido, COLORS["traffic"])
+
+                    # Construir info solo con datos disponibles
+                    info = {"Estado actual": estado_desc}
+                    if estacion.estado >= 0:
+                        info["Código punto"] = str(int(estacion.estado))
+
+                    # Solo agregar campos si tienen datos reales
+                    if has_value(estacion.velocidad):
+                        info["Velocidad media"] = f"{format_number(estacion.velocidad)} km/h"
+                    if has_value(estacion.intensidad):
+                        info["Volumen tráfico"] = f"{format_number(estacion.intensidad)} veh/h"
+                    if has_value(estacion.ocupacion):
+                        info["Ocupación calzada"] = f"{format_number(estacion.ocupacion)}%"
+
+                    marker_data = {
+                        "tipo": "trafico",
+                        "titulo": estacion.denominacion,
+                        "icon": ft.icons.Icons.TRAFFIC,
+                        "color": color,
+                        "info": info,
+                    }
+
+                    specs.append(self._marker_spec(
+                        estacion.id or estacion.denominacion,
+                        lat,
+                        lon,
+                        color,
+                        ft.icons.Icons.TRAFFIC,
+                        marker_data,
+                        tooltip=f"🚗 {estacion.denominacion}\n📈 Estado: {estado_desc}",
+                    ))
+        return specs
+
+    def _apply_marker_specs(self, layer, specs):
+        """
+        Sustituye los marcadores de una capa reutilizando los que no cambian.
+
+        Compara cada especificación con el marcador anterior del mismo id y
+        solo crea un mapa.Marker nuevo si su firma ha cambiado; Flet únicamente
+        envía al cliente los marcadores nuevos o eliminados.
+
+        Args:
+            layer: Nombre de la capa
+            specs: Especificaciones de _marker_spec
+
+        Returns:
+            Número de marcadores creados o eliminados
+        """
+        previous = self._marker_index[layer]
+        index = {}
+        markers = []
+        moved = []
+        lats, lons, severity = [], [], []
+
+        for spec in specs:
+            key = spec["id"]
+            # Ids repetidos en el feed: se desambiguan por orden de aparición
+            n = 1
+            while key in index:
+                n += 1
+                key = f"{spec['id']}#{n}"
+
+            entry = previous.get(key)
+            if entry is not None and entry[0] == spec["signature"]:
+                marker = entry[1]
+            else:
+                marker = self._create_marker(
+                    spec["lat"],
+                    spec["lon"],
+                    spec["color"],
+                    spec["icon"],
+                    spec["marker_data"],
+                    tooltip=spec["tooltip"],
+                )
+                moved.append((key, spec["lat"], spec["lon"]))
+
+            index[key] = (spec["signature"], marker)
+            markers.append(marker)
+            lats.append(spec["lat"])
+            lons.append(spec["lon"])
+            severity.append(SEVERITY_COLORS.index(spec["color"])
+                            if spec["color"] in SEVERITY_COLORS else 0)
+
+        removed = previous.keys() - index.keys()
+        clusters = None
+        if moved or removed:
+            clusters = ClusterIndex(lats, lons, severity)
+        with self._markers_lock:
+            grid = self._grid[layer]
+            for key in removed:
+                grid.remove(key)
+            for key, lat, lon in moved:
+                grid.insert(key, lat, lon)
+            self._marker_index[layer] = index
+            self.all_markers[layer] = markers
+            if clusters is not None:
+                self._clusters[layer] = ({key: i for i, key in enumerate(index)}, clusters)
+                # Solo se conservan los marcadores de las celdas que siguen existiendo
+                level = clusters.level(self._query_zoom)
+                cells = {g.key for g in clusters.clusters(level)} if level is not None else set()
+                self._cluster_markers[layer] = {k: v for k, v in self._cluster_markers[layer].items()
+                                                if k in cells}
+        return len(moved) + len(removed)
+
+    def update_live_data(self, feeds, update_page=True):
+        """
+        Aplica datos nuevos de los feeds en tiempo real a sus capas.
+
+        Args:
+            feeds: Dict {clave_feed: registros} (weather_data, air_quality_data, traffic_data)
+            update_page: Pedir el repintado si la capa visible cambia
+
+        Returns:
+            Número de marcadores creados o eliminados
+        """
+        builders = {
+            "weather_data": [("Precipitaciones", self._weather_marker_specs)],
+            "air_quality_data": [
+                ("Contaminación (NO2)", self._no2_marker_specs),
+                ("Contaminación (O3, PM10)", self._o3_pm10_marker_specs),
+            ],
+            "traffic_data": [("Flujo Tráfico DGT", self._traffic_marker_specs)],
+        }
+
+        changed = 0
+        visible_changed = False
+        for feed, records in feeds.items():
+            for layer, build_specs in builders.get(feed, []):
+                layer_changed = self._apply_marker_specs(layer, build_specs(records))
+                changed += layer_changed
+                if layer_changed and layer == self.current_layer:
+                    visible_changed = True
+
+        if visible_changed:
+            self.update_visible_markers(update_page=update_page)
+        return changed
+
     def load_markers(self):
         """Carga marcadores de estaciones de sensores en el mapa."""
         try:
@@ -423,194 +894,12 @@ class MapContainer(ft.Container):
                 get_cached_air_quality_data,
                 get_cached_traffic_data,
             )
-            from utils.avamet_coordinates import get_station_coordinates
-
-            weather_data = get_cached_weather_data()
-            air_quality_data = get_cached_air_quality_data()
-            traffic_data = get_cached_traffic_data()
-
-            # Limpiar marcadores existentes
-            for key in self.all_markers:
-                self.all_markers[key] = []
-
-            # Marcadores de precipitaciones (AVAMET)
-            for clima in weather_data:
-                if clima.prec and clima.prec != "-":
-                    # Obtener coordenadas GPS de la estación
-                    coords = get_station_coordinates(clima.estacion)
-
-                    if coords:
-                        # Determinar color según precipitación
-                        color = COLORS["precipitation"]
-                        try:
-                            prec_value = float(clima.prec)
-                            if prec_value > 10:
-                                color = COLORS["event_danger"]
-                            elif prec_value > 5:
-                                color = COLORS["traffic"]
-                        except:
-                            pass
-
-                        # Construir info dinámicamente
-                        info_w = {}
-                        if clima.prec and str(clima.prec) not in ["-", "None", "nan"]:
-                            info_w["Lluvia caída"] = f"{clima.prec} mm"
-                        if clima.tmed and str(clima.tmed) not in ["-", "None", "nan"]:
-                            info_w["Temperatura"] = f"{clima.tmed}°C"
-                        if clima.hr and str(clima.hr) not in ["-", "None", "nan"]:
-                            info_w["Humedad del aire"] = f"{clima.hr}%"
-
-                        marker_data = {
-                            "tipo": "precipitacion",
-                            "titulo": clima.estacion,
-                            "icon": ft.icons.Icons.WATER_DROP,
-                            "color": color,
-                            "info": info_w,
-                        }
-
-                        marker = self._create_marker(
-                            coords["lat"],
-                            coords["lon"],
-                            color,
-                            ft.icons.Icons.WATER_DROP,
-                            marker_data,
-                            tooltip=f"🌦️ {clima.estacion}\n💧 {clima.prec} mm de lluvia",
-                        )
-                        self.all_markers["Precipitaciones"].append(marker)
-
-            # Marcadores de contaminación NO2
-            for estacion in air_quality_data:
-                if estacion.geo_point_2d and estacion.no2 and estacion.no2 != "-":
-                    lat = estacion.geo_point_2d.get("lat")
-                    lon = estacion.geo_point_2d.get("lon")
-
-                    if lat and lon:
-                        # Determinar color según nivel de NO2
-                        color = COLORS["primary"]
-                        try:
-                            no2_value = float(estacion.no2)
-                            if no2_value > 40:
-                                color = COLORS["event_danger"]
-                            elif no2_value > 20:
-                                color = COLORS["traffic"]
-                        except:
-                            pass
-
-                        # Construir info dinámicamente
-                        info_aq = {"Estación de control": estacion.direccion}
-                        if estacion.no2 and str(estacion.no2) not in ["-", "None", "nan"]:
-                            info_aq["Nivel de NO2"] = f"{estacion.no2} μg/m³"
-                        if hasattr(estacion, 'calidad_am') and estacion.calidad_am:
-                            info_aq["Estado del aire"] = estacion.calidad_am
-
-                        marker_data = {
-                            "tipo": "no2",
-                            "titulo": estacion.direccion,
-                            "icon": ft.icons.Icons.CLOUD,
-                            "color": color,
-                            "info": info_aq,
-                        }
-
-                        marker = self._create_marker(
-                            lat,
-                            lon,
-                            color,
-                            ft.icons.Icons.CLOUD,
-                            marker_data,
-                            tooltip=f"🍀 {estacion.direccion}\n💨 Aire (NO2): {estacion.no2} μg/m³",
-                        )
-                        self.all_markers["Contaminación (NO2)"].append(marker)
-
-            # Marcadores de contaminación O3/PM10
-            for estacion in air_quality_data:
-                if estacion.geo_point_2d and (
-                    estacion.o3 != "-" or estacion.pm10 != "-"
-                ):
-                    lat = estacion.geo_point_2d.get("lat")
-                    lon = estacion.geo_point_2d.get("lon")
-
-                    if lat and lon:
-
-                        # Construir info dinámicamente
-                        info_aq2 = {"Estación de control": estacion.direccion}
-                        if hasattr(estacion, 'o3') and estacion.o3 and str(estacion.o3) not in ["-", "None", "nan"]:
-                            info_aq2["Gas Ozono (O3)"] = f"{estacion.o3} μg/m³"
-                        if hasattr(estacion, 'pm10') and estacion.pm10 and str(estacion.pm10) not in ["-", "None", "nan"]:
-                            info_aq2["Partículas (PM10)"] = f"{estacion.pm10} μg/m³"
-
-                        marker_data = {
-                            "tipo": "o3_pm10",
-                            "titulo": estacion.direccion,
-                            "icon": ft.icons.Icons.GRAIN,
-                            "color": COLORS["pollution"],
-                            "info": info_aq2,
-                        }
-
-                        marker = self._create_marker(
-                            lat,
-                            lon,
-                            COLORS["pollution"],
-                            ft.icons.Icons.GRAIN,
-                            marker_data,
-                            tooltip=f"🌫️ {estacion.direccion}\n📊 Pulsa para ver partículas en suspensión",
-                        )
-                        self.all_markers["Contaminación (O3, PM10)"].append(marker)
-
-            # Marcadores de tráfico DGT
-            for estacion in traffic_data:
-                if estacion.geo_point_2d:
-                    lat = estacion.geo_point_2d.get("lat")
-                    lon = estacion.geo_point_2d.get("lon")
-
-                    if lat and lon:
-                        # Importar función de decodificación de estado
-                        from utils.RealTimeTrafficValencia import get_estado_descripcion
-
-                        # Obtener descripción y color sugerido del estado
-                        estado_desc, color_sugerido = get_estado_descripcion(
-                            estacion.estado
-                        )
-
-                        # Determinar color según estado del tráfico
-                        color_map = {
-                            "green": COLORS["primary"],
-                            "yellow": COLORS["traffic"],
-                            "red": COLORS["event_danger"],
-                            "gray": COLORS["text_gray"],
-                        }
-                        color = color_map.get(color_sugerido, COLORS["traffic"])
-
-                        # Construir info solo con datos disponibles
-                        info = {"Estado actual": estado_desc, "Código punto": f"{estacion.estado}"}
-
-                        # Solo agregar campos si tienen datos reales
-                        if estacion.velocidad and estacion.velocidad != "-":
-                            info["Velocidad media"] = f"{estacion.velocidad} km/h"
-                        if estacion.intensidad and estacion.intensidad != "-":
-                            info["Volumen tráfico"] = f"{estacion.intensidad} veh/h"
-                        if estacion.ocupacion and estacion.ocupacion != "-":
-                            info["Ocupación calzada"] = f"{estacion.ocupacion}%"
-
-                        marker_data = {
-                            "tipo": "trafico",
-                            "titulo": estacion.denominacion,
-                            "icon": ft.icons.Icons.TRAFFIC,
-                            "color": color,
-                            "info": info,
-                        }
-
-                        marker = self._create_marker(
-                            lat,
-                            lon,
-                            color,
-                            ft.icons.Icons.TRAFFIC,
-                            marker_data,
-                            tooltip=f"🚗 {estacion.denominacion}\n📈 Estado: {estado_desc}",
-                        )
-                        self.all_markers["Flujo Tráfico DGT"].append(marker)
-
-            # Actualizar marcadores visibles
-            self.update_visible_markers()
+
+            self.update_live_data({
+                "weather_data": get_cached_weather_data(),
+                "air_quality_data": get_cached_air_quality_data(),
+                "traffic_data": get_cached_traffic_data(),
+            })
 
             total_markers = sum(len(markers) for markers in self.all_markers.values())
             print(f"✅ {total_markers} marcadores cargados en total")
@@ -0,0 +1,183 @@
+"""
+Pool de marcadores del mini-mapa del panel derecho.
+
+Cambiar de mes o de estación seleccionada creaba un mapa.Marker nuevo (con su
+Container e Icon) por estación, aunque las estaciones fueran las mismas, y
+Flet reenviaba al cliente el subárbol completo de cada uno. El pool guarda un
+marcador por (capa, id de estación) y en los siguientes cambios solo modifica
+su color, tooltip, coordenadas y manejador de click: Flet envía únicamente las
+propiedades que han cambiado. Los clústeres (ver utils.marker_clusters) se
+guardan igual, por la clave de su celda.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import flet as ft
+import flet_map as mapa
+
+# (id, lat, lon, color, icono, tooltip, on_click)
+MarkerItem = Tuple[Any, float, float, str, Any, Optional[str], Optional[Callable]]
+# (clave de celda, lat, lon, color, número de puntos, tooltip, on_click)
+ClusterItem = Tuple[str, float, float, Any, int, Optional[str], Optional[Callable]]
+
+
+def background_color(color) -> str:
+    """Fondo semitransparente del marcador (solo si el color es un hex string)."""
+    if isinstance(color, str) and color.startswith("#"):
+        return color + "33"
+    return "#33333333"
+
+
+def cluster_size(count: int) -> int:
+    """Diámetro en píxeles del marcador de un clúster según sus puntos."""
+    if count < 10:
+        return 32
+    if count < 100:
+        return 40
+    return 48
+
+
+def cluster_label(count: int) -> str:
+    """Texto del marcador de un clúster (1.2k a partir de mil puntos)."""
+    return f"{count / 1000:.1f}k" if count >= 1000 else str(count)
+
+
+def cluster_marker(lat, lon, count, color, tooltip=None, on_click=None) -> mapa.Marker:
+    """
+    Crea el marcador de un clúster: un círculo del color agregado con el número de puntos.
+
+    Args:
+        lat: Latitud del centroide
+        lon: Longitud del centroide
+        count: Número de puntos agrupados
+        color: Color agregado del clúster
+        tooltip: Texto al pasar el ratón
+        on_click: Manejador del click (normalmente acercar el mapa)
+    """
+    size = cluster_size(count)
+    return mapa.Marker(
+        content=ft.Container(
+            width=size,
+            height=size,
+            bgcolor=color,
+            border=ft.Border.all(3, ft.Colors.with_opacity(0.35, ft.Colors.WHITE)),
+            border_radius=size / 2,
+            alignment=ft.alignment.Alignment(0, 0),
+            content=ft.Text(cluster_label(count), size=12, weight=ft.FontWeight.BOLD,
+                            color=ft.Colors.WHITE),
+            tooltip=tooltip,
+            on_click=on_click,
+        ),
+        coordinates=mapa.MapLatitudeLongitude(lat, lon),
+        width=size,
+        height=size,
+    )
+
+
+class MarkerPool:
+    """Marcadores reutilizables indexados por (capa, id de estación)."""
+
+    def __init__(self):
+        self._markers: Dict[Tuple[str, Any], mapa.Marker] = {}
+        self.stats: Dict[str, int] = {'created': 0, 'reused': 0}
+
+    def markers(self, layer: str, items: Iterable[MarkerItem]) -> List[mapa.Marker]:
+        """
+        Devuelve los marcadores de una capa, reutilizando los de llamadas anteriores.
+
+        Args:
+            layer: Nombre de la capa ('pollution', 'weather', ...)
+            items: Tuplas (id, lat, lon, color, icono, tooltip, on_click)
+
+        Returns:
+            Lista de mapa.Marker en el orden de items
+        """
+        result = []
+        seen = set()
+        for key, lat, lon, color, icon, tooltip, on_click in items:
+            # Ids repetidos: se desambiguan por orden de aparición
+            n, base = 1, key
+            while key in seen:
+                n += 1
+                key = f"{base}#{n}"
+            seen.add(key)
+            result.append(self._marker(layer, key, lat, lon, color, icon, tooltip, on_click))
+        return result
+
+    def cluster_markers(self, layer: str, items: Iterable[ClusterItem]) -> List[mapa.Marker]:
+        """
+        Devuelve los marcadores de los clústeres de una capa, reutilizando los de la misma celda.
+
+        Args:
+            layer: Nombre de la capa
+            items: Tuplas (clave de celda, lat, lon, color, número de puntos, tooltip, on_click)
+
+        Returns:
+            Lista de mapa.Marker en el orden de items
+        """
+        result = []
+        for key, lat, lon, color, count, tooltip, on_click in items:
+            marker = self._markers.get((layer, key))
+            if marker is None:
+                marker = cluster_marker(lat, lon, count, color, tooltip, on_click)
+                self._markers[(layer, key)] = marker
+                self.stats['created'] += 1
+            else:
+                size = cluster_size(count)
+                marker.width = marker.height = size
+                box = marker.content
+                box.width = box.height = size
+                box.border_radius = size / 2
+                box.bgcolor = color
+                box.tooltip = tooltip
+                box.on_click = on_click
+                box.content.value = cluster_label(count)
+                coords = marker.coordinates
+                if coords.latitude != lat or coords.longitude != lon:
+                    marker.coordinates = mapa.MapLatitudeLongitude(lat, lon)
+                self.stats['reused'] += 1
+            result.append(marker)
+        return result
+
+    def _marker(self, layer, key, lat, lon, color, icon, tooltip, on_click) -> mapa.Marker:
+        marker = self._markers.get((layer, key))
+        if marker is None:
+            marker = mapa.Marker(
+                content=ft.Container(
+                    width=30,
+                    height=30,
+                    bgcolor=background_color(color),
+                    border_radius=15,
+                    alignment=ft.alignment.Alignment(0, 0),
+                    content=ft.Icon(icon, color=color, size=18),
+                    tooltip=tooltip,
+                    on_click=on_click,
+                ),
+                coordinates=mapa.MapLatitudeLongitude(lat, lon),
+            )
+            self._markers[(layer, key)] = marker
+            self.stats['created'] += 1
+            return marker
+
+        # Los valores iguales a los anteriores no generan diff en Flet
+        box = marker.content
+        box.bgcolor = background_color(color)
+        box.tooltip = tooltip
+        box.on_click = on_click
+        box.content.icon = icon
+        box.content.color = color
+        coords = marker.coordinates
+        if coords.latitude != lat or coords.longitude != lon:
+            marker.coordinates = mapa.MapLatitudeLongitude(lat, lon)
+        self.stats['reused'] += 1
+        return marker
+
+    def clear(self, layer: Optional[str] = None):
+        """Olvida los marcadores de una capa (o de todas)."""
+        if layer is None:
+            self._markers.clear()
+        else:
+            self._markers = {k: m for k, m in self._markers.items() if k[0] != layer}
+
+    def __len__(self) -> int:
+        return len(self._markers)
@@ -0,0 +1,117 @@
+"""
+Planificador de repintado: agrupa las llamadas a page.update() de la interfaz.
+
+Cada page.update() serializa el árbol de controles modificado y lo envía al
+cliente Flutter. Un solo cambio de fecha disparaba varios (marcadores, panel
+de información, hilo de gráficos). Con RenderScheduler los componentes solo
+se marcan como pendientes; un hilo propio hace como mucho un volcado por
+intervalo de frame con todo lo acumulado en ese intervalo.
+"""
+
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from config.performance import PERFORMANCE
+
+
+class RenderScheduler:
+    """Agrupa las peticiones de repintado y las vuelca una vez por frame."""
+
+    def __init__(self, page, frame_ms: Optional[float] = None):
+        """
+        Args:
+            page: Página Flet sobre la que se hace update()
+            frame_ms: Intervalo mínimo entre volcados (por defecto PERFORMANCE["render_frame_ms"])
+        """
+        self._page = page
+        if frame_ms is None:
+            frame_ms = PERFORMANCE["render_frame_ms"]
+        self.frame_interval = frame_ms / 1000
+
+        self._cond = threading.Condition()
+        # Un solo volcado a la vez (el hilo del planificador o un flush() explícito)
+        self._flush_lock = threading.Lock()
+        self._dirty: Dict[int, Any] = {}
+        self._whole_page = False
+        self._pending_since: Optional[float] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats: Dict[str, int] = {'requested': 0, 'flushed': 0, 'errors': 0}
+
+    def request_update(self, *controls) -> None:
+        """
+        Marca controles como pendientes de repintar. Se puede llamar desde cualquier hilo.
+
+        Args:
+            *controls: Controles a actualizar; sin argumentos se repinta la página
+                entera (diálogos, snackbars, overlay)
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self.stats['requested'] += 1
+            if controls:
+                for control in controls:
+                    self._dirty[id(control)] = control
+            else:
+                self._whole_page = True
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="render-scheduler",
+                                                daemon=True)
+                self._thread.start()
+
+    def flush(self) -> bool:
+        """
+        Vuelca ya lo pendiente (p. ej. antes de un trabajo largo en el mismo hilo).
+
+        Returns:
+            True si había algo que repintar
+        """
+        with self._flush_lock:
+            with self._cond:
+                if self._pending_since is None:
+                    return False
+                controls = list(self._dirty.values())
+                whole_page = self._whole_page
+                self._dirty, self._whole_page, self._pending_since = {}, False, None
+
+            # Un control que aún no cuelga de la página no se puede parchear solo
+            if whole_page or any(getattr(c, 'parent', None) is None for c in controls):
+                controls = []
+            try:
+                self._page.update(*controls)
+                self.stats['flushed'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"❌ Error en page.update(): {e}")
+                traceback.print_exc()
+            return True
+
+    def close(self) -> None:
+        """Vuelca lo pendiente y detiene el hilo."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending_since is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Lo que llegue durante este intervalo sale en el mismo volcado
+                delay = self._pending_since + self.frame_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.flush()
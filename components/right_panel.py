@@ -5,6 +5,8 @@ Reescrito para mayor robustez y manejo de estado.
 
 import flet as ft
 from config.theme import COLORS
+from .marker_pool import MarkerPool
+from .render_scheduler import RenderScheduler
 from .ui_elements import UIElements
 import os
 import json
@@ -12,7 +14,15 @@ import datetime
 
 import flet_map as mapa
 from config.map_styles import MAP_STYLES
+from config.performance import PERFORMANCE
 from utils.async_data_loader import AsyncDataLoader
+from utils.pollution_store import PollutionStore, summarize_sensor
+from utils.year_cache import YearCache
+from utils.prefetcher import Prefetcher
+from utils.traffic_index import TrafficMonthIndex
+from utils.traffic_source import LazyTrafficSource, resolve_traffic_path
+from utils.traffic_markers import merge_coordinates, marker_specs
+from utils.marker_clusters import ClusterIndex, cluster_level
 import csv
 import io
 import base64
@@ -36,6 +46,16 @@ MONTH_NAMES = [
     "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"
 ]
 
+# Color de cada tramo de IMD (ver utils.traffic_markers.IMD_BINS)
+TRAFFIC_IMD_COLORS = [
+    ft.Colors.GREEN_400,
+    ft.Colors.LIME_500,
+    ft.Colors.AMBER_500,
+    ft.Colors.ORANGE_500,
+    ft.Colors.RED_500,
+    ft.Colors.RED_900,
+]
+
 
 class MonthYearPicker(ft.Row):
     """
@@ -52,7 +72,8 @@ class MonthYearPicker(ft.Row):
                  year_end: int = 2025,
                  month_start: int = 1,
                  month_end: int = 12,
-                 on_change=None):
+                 on_change=None,
+                 render=None):
         super().__init__()
         # Guardamos el estado en un dict para evitar que Flet intercepte
         # los setattr y llame a su _notify(name, value) interno.
@@ -65,6 +86,7 @@ class MonthYearPicker(ft.Row):
             'month_end': month_end,
             'on_change_cb': on_change,
             'page': page,
+            'render': render if render is not None or page is None else RenderScheduler(page),
         })
 
         # Label central clickable
@@ -126,8 +148,8 @@ class MonthYearPicker(ft.Row):
 
     def _refresh_label(self):
         self._label_text.value = self._format_label()
-        if self._state['page']:
-            self._state['page'].update()
+        if self._state['render']:
+            self._state['render'].request_update(self)
 
     def _clamp_month_to_range(self):
         s = self._state
@@ -237,7 +259,7 @@ class MonthYearPicker(ft.Row):
         object.__setattr__(self, '_active_dialog', dlg)
         page.overlay.append(dlg)
         dlg.open = True
-        page.update()
+        self._state['render'].request_update()
 
     def _populate_month_grid(self, grid: ft.GridView):
         """Rellena la cuadrícula con botones de mes."""
@@ -286,7 +308,7 @@ class MonthYearPicker(ft.Row):
             s['dialog_year'] -= 1
             self._dialog_year_text.value = str(s['dialog_year'])
             self._populate_month_grid(self._month_grid)
-            self._state['page'].update()
+            self._state['render'].request_update(self._active_dialog)
 
     def _dialog_next_year(self, e):
         s = self._state
@@ -294,7 +316,7 @@ class MonthYearPicker(ft.Row):
             s['dialog_year'] += 1
             self._dialog_year_text.value = str(s['dialog_year'])
             self._populate_month_grid(self._month_grid)
-            self._state['page'].update()
+            self._state['render'].request_update(self._active_dialog)
 
     def _select_month(self, month: int):
         print(
@@ -307,11 +329,10 @@ class MonthYearPicker(ft.Row):
             f"   Selección aplicada: {self._state['month']}/{self._state['year']}")
 
     def _close_dialog(self, e):
-        page = self._state['page']
         dlg = getattr(self, '_active_dialog', None)
         if dlg is not None:
             dlg.open = False
-            page.update()
+            self._state['render'].request_update()
 
     # ── public API ─────────────────────────────────────────────────────────
 
@@ -339,10 +360,20 @@ class RightPanel(ft.Container):
     Maneja la visualización de estadísticas históricas y navegación por fechas.
     """
 
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, year_cache=None, render=None):
+        """
+        Args:
+            page: Página de Flet
+            year_cache: Caché de años opcional (get/put/clear/stats); por defecto
+                una YearCache LRU con el presupuesto de PERFORMANCE
+            render: RenderScheduler compartido con el resto de la interfaz
+        """
         print("🔧 Inicializando RightPanel...")
         super().__init__()
         self._page = page
+        self._render = render if render is not None else RenderScheduler(page)
+        self.year_cache = year_cache if year_cache is not None else YearCache(
+            int(PERFORMANCE['year_cache_max_mb'] * 1024 * 1024))
         self.width = 500
         self.animate = ft.Animation(
             duration=300,
@@ -354,6 +385,8 @@ class RightPanel(ft.Container):
         self.btnRef = ft.Ref[ft.Row]()
         self.map_ref = ft.Ref[mapa.Map]()
         self.marker_layer_ref = ft.Ref[mapa.MarkerLayer]()
+        # Un marcador por (capa, estación), reutilizado entre meses y selecciones
+        self._marker_pool = MarkerPool()
 
         # Date picker de mes/año
         self.period_picker = MonthYearPicker(
@@ -364,6 +397,8 @@ class RightPanel(ft.Container):
             year_end=2025,
             month_start=4,
             month_end=11,
+            on_change=self._on_period_change,
+            render=self._render,
         )
 
         # Rangos de fechas por capa
@@ -389,11 +424,32 @@ class RightPanel(ft.Container):
         self.traffic_stations_info = {}
         self.traffic_markers = []
         self.selected_traffic_station = None  # Estación seleccionada en tráfico
-        # self.traffic_data_df será inicializado en on_data_loaded si hay parquet
+        # self.traffic_source será inicializado en on_data_loaded si hay parquet
 
         # Estado de carga
         self.data_loaded = False
 
+        # Meses ya filtrados de AEMET y marcadores de tráfico (los calienta el prefetcher)
+        period_cache_bytes = int(PERFORMANCE['period_cache_max_mb'] * 1024 * 1024)
+        self.weather_month_cache = YearCache(period_cache_bytes)
+        self.traffic_specs_cache = YearCache(period_cache_bytes)
+
+        # Vistas ya construidas por (capa, año, mes, estación seleccionada):
+        # marcadores, datos de gráficas/exportación e imagen de la gráfica
+        self.view_cache = YearCache(int(PERFORMANCE['view_cache_max_mb'] * 1024 * 1024))
+        # Por capa del pool: (clave de vista, lista de marcadores) que muestra ahora
+        self._shown_markers = {}
+        # Zoom del mini-mapa y clústeres de tráfico histórico de la última vista (clave, ClusterIndex)
+        self._mini_map_zoom = 12
+        self._traffic_clusters = None
+
+        # Precarga en segundo plano de los periodos vecinos
+        self.prefetcher = Prefetcher(max_workers=PERFORMANCE['prefetch_workers'],
+                                     lookahead=PERFORMANCE['prefetch_lookahead'])
+        self.prefetcher.register_year("pollution", self._prefetch_pollution_year)
+        self.prefetcher.register_month("traffic", self._prefetch_traffic_month)
+        self.prefetcher.register_month("aemet", self.get_weather_month)
+
         self.weather_info_text = ft.Text("", size=12, color=ft.Colors.BLUE_400)
         self.weather_container = ft.Container(
 
@@ -588,7 +644,7 @@ class RightPanel(ft.Container):
             self.width = 800
         else:
             self.width = 500
-        self.update()
+        self._render.request_update(self)
 
     def setup_event_handlers(self):
         """Configurar event handlers después de que la página esté lista."""
@@ -622,7 +678,7 @@ class RightPanel(ft.Container):
         elif self.current_layer == "rain":
             self.update_weather_markers()
         elif self.current_layer == "traffic":
-            if hasattr(self, 'traffic_data_df') and self.traffic_data_df is not None:
+            if getattr(self, 'traffic_source', None) is not None:
                 self.update_historical_traffic_markers()
 
         # Actualizar gráficos al cambiar de capa (en hilo separado)
@@ -630,7 +686,7 @@ class RightPanel(ft.Container):
         thread = threading.Thread(target=self._update_charts, daemon=True)
         thread.start()
 
-        self._page.update()
+        self._render.request_update(self)
 
     def _create_mini_map(self):
         """Crea un mapa simplificado para el panel derecho."""
@@ -644,6 +700,7 @@ class RightPanel(ft.Container):
             interaction_configuration=mapa.InteractionConfiguration(
                 flags=mapa.InteractionFlag.ALL
             ),
+            on_position_change=self._on_mini_map_position_change,
             layers=[
                 mapa.TileLayer(
                     url_template=MAP_STYLES["Normal"],
@@ -656,9 +713,9 @@ class RightPanel(ft.Container):
         """Inicia la carga asíncrona de datos históricos."""
         # Inicializar estructuras de datos
         self.metadata = {}
-        self.year_cache = {}
         self.json_base_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                            "data", "pollution_historical")
+        self.pollution_store = PollutionStore(self.json_base_path)
 
         # Rutas para AEMET
         aemet_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)),
@@ -667,6 +724,10 @@ class RightPanel(ft.Container):
                                      "utils", "valencia_stations.json")
         traffic_parquet_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                             "data", "trafico_valencia.parquet")
+        # Particiones por año de normalizerODS --incremental (si están al día, tienen prioridad)
+        traffic_partitions_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                               "data", "trafico_valencia")
+        traffic_parquet_path = resolve_traffic_path(traffic_parquet_path, traffic_partitions_path)
 
         def on_complete(success: bool):
             print(
@@ -698,7 +759,6 @@ class RightPanel(ft.Container):
         try:
             if pollution_data is not None:
                 self.metadata = pollution_data.get('metadata', {})
-                self.year_cache = pollution_data.get('year_cache', {})
         except Exception as e:
             print(f"❌ Error cargando pollution_data: {e}"); _tb.print_exc()
 
@@ -708,10 +768,8 @@ class RightPanel(ft.Container):
                 'weather_stations_info', {})
 
         if traffic_data is not None:
-            # Si es un DataFrame (parquet)
-            import pandas as pd
-            if isinstance(traffic_data, pd.DataFrame):
-                object.__setattr__(self, 'traffic_data_df', traffic_data)
+            # Si es el parquet (fuente perezosa o DataFrame ya cargado)
+            if isinstance(traffic_data, (LazyTrafficSource, pd.DataFrame)):
                 traffic_coords_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                    "data", "trafico_valencia_coords.parquet")
                 if os.path.exists(traffic_coords_path):
@@ -719,15 +777,33 @@ class RightPanel(ft.Container):
                         traffic_coords_path, engine='pyarrow'))
                 else:
                     object.__setattr__(self, 'traffic_coords_df', None)
+
+                if isinstance(traffic_data, LazyTrafficSource):
+                    # Cada mes se lee bajo demanda y se le unen las coordenadas
+                    traffic_data.set_coordinates(self.traffic_coords_df)
+                    traffic_source = traffic_data
+                else:
+                    # Unir coordenadas, ordenar e indexar por mes una sola vez
+                    traffic_source = TrafficMonthIndex(
+                        merge_coordinates(traffic_data, self.traffic_coords_df))
+                object.__setattr__(self, 'traffic_source', traffic_source)
             else:
                 object.__setattr__(self, 'traffic_data',
                                    traffic_data.get('traffic_data', {}))
                 object.__setattr__(self, 'traffic_stations_info', traffic_data.get(
                     'traffic_stations_info', {}))
 
+        # Lo construido antes de tener los datos no vale como vista
+        self.view_cache.clear()
+        self._shown_markers.clear()
+        self._traffic_clusters = None
+
         # Marcar como cargado
         self.data_loaded = True
 
+        # Calentar los periodos vecinos del seleccionado al arrancar
+        self._notify_prefetcher(*self.period_picker.value)
+
         # Actualizar UI con datos
         try:
             if self.current_layer == "pollution":
@@ -736,11 +812,7 @@ class RightPanel(ft.Container):
         except Exception as e:
             print(f"❌ Error actualizando UI: {e}"); _tb.print_exc()
 
-        try:
-            if self._page:
-                self._page.update()
-        except Exception as e:
-            print(f"❌ Error en page.update(): {e}"); _tb.print_exc()
+        self._render.request_update(self)
 
         print("✅ UI actualizada con datos cargados")
 
@@ -752,63 +824,148 @@ class RightPanel(ft.Container):
         pass
 
     def load_year_data(self, year):
-        """Carga datos de un año específico bajo demanda."""
+        """Carga datos de un año específico bajo demanda (caché LRU acotada)."""
         year = int(year)
 
-        if year not in self.year_cache:
-            json_path = os.path.join(self.json_base_path, f"{year}.json")
+        year_data = self.year_cache.get(year)
+        if year_data is not None:
+            return year_data
+
+        json_path = os.path.join(self.json_base_path, f"{year}.json")
+
+        if not os.path.exists(json_path):
+            print(f"⚠️ Archivo no encontrado: {json_path}")
+            return None
 
-            if not os.path.exists(json_path):
-                print(f"⚠️ Archivo no encontrado: {json_path}")
-                return None
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                year_data = json.load(f)
+        except Exception as e:
+            print(f"❌ Error al cargar {year}.json: {e}")
+            return None
 
+        self.year_cache.put(year, year_data)
+        stats = self.year_cache.stats()
+        print(f"📖 Año {year} cargado en caché "
+              f"({stats['entries']} años, {stats['bytes'] / 1024 / 1024:.1f}/"
+              f"{stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+              f"{stats['hits']} aciertos, {stats['misses']} fallos, "
+              f"{stats['evictions']} expulsiones)")
+        return year_data
+
+    def load_month_data(self, year, month):
+        """Carga los sensores de un mes: del almacén columnar si existe, si no del JSON anual."""
+        if self.pollution_store.is_available():
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    self.year_cache[year] = json.load(f)
-                print(f"📖 Año {year} cargado en caché")
+                return self.pollution_store.read_month(year, month)
             except Exception as e:
-                print(f"❌ Error al cargar {year}.json: {e}")
-                return None
+                print(f"⚠️ Error leyendo almacén columnar, usando JSON: {e}")
 
-        return self.year_cache[year]
+        year_data = self.load_year_data(year)
+        if not year_data:
+            return None
+        return year_data['months'].get(str(int(month)))
+
+    def get_traffic_month(self, year, month):
+        """
+        Devuelve las filas de tráfico histórico de un mes (FECHA como 'YYYY-MM').
+        Se lee bajo demanda del parquet (o del índice mensual si está en memoria).
+        """
+        return self.traffic_source.month_of(year, month)
+
+    def get_traffic_marker_specs(self, year, month):
+        """Devuelve las especificaciones columnares de los marcadores de tráfico de un mes."""
+        key = f"{int(year)}-{int(month):02}"
+        specs = self.traffic_specs_cache.get(key)
+        if specs is None:
+            specs = marker_specs(self.get_traffic_month(year, month))
+            self.traffic_specs_cache.put(key, specs)
+        return specs
+
+    def get_weather_month(self, year, month):
+        """
+        Devuelve {indicativo: registro AEMET} del mes indicado, cacheado.
+        AEMET usa formato YYYY-MM (con cero inicial si es necesario).
+        """
+        month_int = int(month)
+        date_key_long = f"{year}-{month_int:02}"
+        date_key_short = f"{year}-{month_int}"
+
+        records = self.weather_month_cache.get(date_key_long)
+        if records is not None:
+            return records
+
+        records = {}
+        for indicativo, station_data in self.aemet_data.items():
+            if not isinstance(station_data, dict):
+                continue
+            weather = station_data.get(date_key_long) or station_data.get(date_key_short)
+            if weather:
+                records[indicativo] = weather
+
+        if self.data_loaded:
+            self.weather_month_cache.put(date_key_long, records)
+        return records
+
+    # ── PRECARGA ──────────────────────────────────────────────────────────
+
+    def _on_period_change(self, month, year):
+        """Callback del MonthYearPicker: precarga los vecinos y refresca la capa."""
+        if not self.data_loaded:
+            return
+
+        self._notify_prefetcher(month, year)
+        self.on_date_change(None)
+
+    def _notify_prefetcher(self, month, year):
+        """Informa al prefetcher del periodo actual dentro del rango del picker."""
+        picker = self.period_picker
+        self.prefetcher.notify(
+            month, year,
+            limits=((picker.month_start, picker.year_start),
+                    (picker.month_end, picker.year_end)))
+
+    def _prefetch_pollution_year(self, year):
+        """Calienta los datos de contaminación de un año vecino."""
+        if self.pollution_store.has_aggregates():
+            # Los resúmenes salen de la tabla de agregados (se carga una vez)
+            self.pollution_store.month_summary(year, 1)
+        else:
+            self.load_year_data(year)
+
+    def _prefetch_traffic_month(self, month, year):
+        """Calienta el mes de tráfico histórico si el parquet está cargado."""
+        if getattr(self, 'traffic_source', None) is not None:
+            self.get_traffic_marker_specs(year, month)
 
     def filter_sensors_by_date(self, month, year):
-        """Filtra sensores únicos por mes y año usando datos JSON indexados."""
+        """
+        Devuelve el resumen por sensor (media, mín, máx, recuento, p50, p95) de un mes.
+        Usa la tabla de agregados precalculada; los valores diarios solo se leen
+        si no existe (o al profundizar en un sensor con load_month_data).
+        """
         if not month or not year:
             return []
 
         try:
-            month_str = str(int(month))
+            month_int = int(month)
             year_int = int(year)
 
-            # Cargar datos del año (bajo demanda, con caché)
-            year_data = self.load_year_data(year_int)
-
-            if not year_data:
-                print(f"⚠️ No hay datos para el año {year}")
-                return []
-
-            # Buscar mes en los datos del año
-            if month_str not in year_data['months']:
+            if self.pollution_store.has_aggregates():
+                filtered_sensors = self.pollution_store.month_summary(
+                    year_int, month_int)
+            else:
+                # Sin agregados: calcular a partir de los valores diarios del mes
+                sensors_data = self.load_month_data(year_int, month_int)
+                filtered_sensors = [
+                    summarize_sensor(cod_estacion, sensor)
+                    for cod_estacion, sensor in sensors_data.items()
+                ] if sensors_data else None
+
+            if not filtered_sensors:
                 print(f"⚠️ No hay datos para {month}/{year}")
                 return []
 
-            sensors_data = year_data['months'][month_str]
-            filtered_sensors = []
-
-            # Calcular promedios para cada sensor
-            for cod_estacion, sensor in sensors_data.items():
-                sensor_info = {
-                    'cod': cod_estacion,
-                    'nombre': sensor['nombre'],
-                    'lat': sensor['lat'],
-                    'lon': sensor['lon'],
-                    'no2_avg': sum(sensor['no2_values']) / len(sensor['no2_values']) if sensor['no2_values'] else None,
-                    'o3_avg': sum(sensor['o3_values']) / len(sensor['o3_values']) if sensor['o3_values'] else None,
-                    'pm10_avg': sum(sensor['pm10_values']) / len(sensor['pm10_values']) if sensor['pm10_values'] else None,
-                }
-                filtered_sensors.append(sensor_info)
-
             print(f"🔍 Encontrados {len(filtered_sensors)
                                    } sensores para {month}/{year}")
             return filtered_sensors
@@ -831,13 +988,25 @@ class RightPanel(ft.Container):
             print("  ⚠️ No hay mes o año seleccionado")
             return
 
-        # Filtrar sensores por fecha
-        sensors = self.filter_sensors_by_date(month, year)
+        # Periodo ya visitado: sin volver a filtrar ni formatear los sensores
+        key = self._view_key("pollution")
+        view = self._view(key)
+        if 'items' not in view:
+            sensors = self.filter_sensors_by_date(month, year)
+            view = self._store_view(key, view, items=self._pollution_marker_items(sensors),
+                                    data=sensors)
+        self.pollution_markers = self._layer_markers("pollution", key, view['items'])
 
-        # Limpiar marcadores anteriores
-        self.pollution_markers = []
+        # Actualizar capa de marcadores
+        if self.marker_layer_ref.current:
+            self.marker_layer_ref.current.markers = self.pollution_markers
+            print(
+                f"✅ {len(self.pollution_markers)} marcadores de contaminación agregados al mapa")
+            self._render.request_update(self)
 
-        # Crear nuevos marcadores
+    def _pollution_marker_items(self, sensors):
+        """Marcadores (id, lat, lon, color, icono, tooltip, on_click) de los sensores de un mes."""
+        items = []
         for sensor in sensors:
             try:
                 lat = float(sensor['lat'])
@@ -851,90 +1020,127 @@ class RightPanel(ft.Container):
                     elif sensor['no2_avg'] > 20:
                         color = COLORS["traffic"]
 
-                # Crear datos del marcador con información detallada
-                # Construir info solo con datos válidos
-                info_p = {
-                    "Estación": sensor['nombre'],
-                    "Código": sensor['cod'],
-                    "Período": f"{month}/{year}"
-                }
-
-                # Añadir métricas solo si existen y son válidas
-                for label, key in [("NO2 Promedio", 'no2_avg'), ("O3 Promedio", 'o3_avg'), ("PM10 Promedio", 'pm10_avg')]:
-                    val = sensor.get(key)
-                    if val is not None and str(val).lower() not in ["none", "nan", "n/a", "-"]:
-                        try:
-                            info_p[label] = f"{float(val):.1f} μg/m³"
-                        except:
-                            pass
-
-                marker_data = {
-                    "tipo": "contaminacion_historica",
-                    "titulo": sensor['nombre'],
-                    "icon": ft.icons.Icons.CLOUD,
-                    "color": color,
-                    "info": info_p
-                }
-
                 # Crear tooltip simplificado y amigable
                 no2_text = f"{sensor['no2_avg']:.1f} μg/m³" if sensor['no2_avg'] else "N/A"
                 tooltip_text = f"🍀 Estación: {sensor['nombre']}\n💨 Aire (NO2): {no2_text}"
 
-                # Crear marcador
-                marker = self._create_marker(
-                    lat,
-                    lon,
-                    color,
-                    ft.icons.Icons.CLOUD,
-                    marker_data,
-                    tooltip_text,
-                    on_click=lambda e, s=sensor: self.on_pollution_sensor_click(
-                        s)
-                )
-                self.pollution_markers.append(marker)
+                items.append((
+                    sensor['cod'], lat, lon, color, ft.icons.Icons.CLOUD, tooltip_text,
+                    lambda e, s=sensor: self.on_pollution_sensor_click(s)
+                ))
 
             except (ValueError, TypeError) as e:
                 print(f"⚠️ Error con coordenadas del sensor {
                       sensor['cod']}: {e}")
                 continue
 
-        # Actualizar capa de marcadores
-        if self.marker_layer_ref.current:
-            self.marker_layer_ref.current.markers = self.pollution_markers
-            print(
-                f"✅ {len(self.pollution_markers)} marcadores de contaminación agregados al mapa")
-            if self._page:
-                self._page.update()
+        return items
 
-    def _create_marker(self, lat, lon, color, icon, marker_data=None, tooltip_text=None, on_click=None):
-        """Crea un marcador para el mini-mapa."""
-        # Color de fondo con transparencia (solo si es un hex string)
-        if isinstance(color, str) and color.startswith("#"):
-            bg_color = color + "33"
-        else:
-            bg_color = "#33333333"  # fallback semitransparente
+    # ── VISTAS CACHEADAS ──────────────────────────────────────────────────
 
-        # Usar tooltip personalizado o por defecto
-        if tooltip_text is None and marker_data:
-            tooltip_text = marker_data.get("titulo", "Sensor")
+    def _view_key(self, layer=None):
+        """Clave (capa, año, mes, estación seleccionada) de lo que muestra el panel."""
+        layer = layer or self.current_layer
+        month, year = self.period_picker.value
+        station = self.selected_weather_station if layer == "rain" else None
+        return (layer, int(year), int(month), station)
+
+    def _view(self, key):
+        """
+        Devuelve la vista cacheada de una clave o un dict vacío.
+
+        Una vista guarda lo derivado de (capa, periodo, estación): 'items' de los
+        marcadores, 'data' para gráficas y exportación y 'chart' (imagen ya generada).
+        """
+        view = self.view_cache.get(key)
+        return view if view is not None else {}
+
+    def _store_view(self, key, view, **fields):
+        """Añade campos a una vista y la (re)guarda para que la caché mida su tamaño."""
+        view.update(fields)
+        if self.data_loaded:
+            self.view_cache.put(key, view)
+        return view
+
+    def _layer_markers(self, pool_layer, key, items):
+        """
+        Marcadores de una capa del pool para la vista key.
+
+        Si los marcadores de esa capa ya muestran la vista (p. ej. al volver de
+        otra capa sin cambiar de mes) se devuelve la misma lista; si no, el pool
+        los ajusta en el sitio.
+        """
+        shown = self._shown_markers.get(pool_layer)
+        if shown is not None and shown[0] == key:
+            return shown[1]
+        markers = self._marker_pool.markers(pool_layer, items)
+        self._shown_markers[pool_layer] = (key, markers)
+        return markers
+
+    def _clustered_markers(self, pool_layer, key, view, colors):
+        """
+        Marcadores de una capa agrupados según el zoom del mini-mapa.
+
+        Los puntos de cada celda del nivel de zoom se sustituyen por un clúster
+        con su número y el color del tramo más alto (view['buckets']); por encima
+        de PERFORMANCE["cluster_max_zoom"] se muestran los puntos sueltos.
+
+        Args:
+            pool_layer: Capa del pool
+            key: Clave de la vista
+            view: Vista con 'items' y 'buckets'
+            colors: Color de cada tramo
+        """
+        level = cluster_level(self._mini_map_zoom)
+        if level is None:
+            return self._layer_markers(pool_layer, key, view['items'])
+
+        shown = self._shown_markers.get(pool_layer)
+        if shown is not None and shown[0] == (key, level):
+            return shown[1]
+
+        if self._traffic_clusters is None or self._traffic_clusters[0] != key:
+            items = view['items']
+            self._traffic_clusters = (key, ClusterIndex([item[1] for item in items],
+                                                        [item[2] for item in items],
+                                                        view['buckets']))
+        clusters = self._traffic_clusters[1]
+
+        singles, groups = [], []
+        for group in clusters.clusters(level):
+            if group.count == 1:
+                singles.append(view['items'][group.members[0]])
+            else:
+                groups.append((
+                    group.key, group.lat, group.lon, colors[group.value], group.count,
+                    f"📍 {group.count} puntos de medida\n🔍 Pulsa para acercar",
+                    self._zoom_mini_map(group.lat, group.lon, level)
+                ))
+        markers = (self._marker_pool.markers(pool_layer, singles)
+                   + self._marker_pool.cluster_markers(pool_layer, groups))
+        self._shown_markers[pool_layer] = ((key, level), markers)
+        return markers
+
+    def _zoom_mini_map(self, lat, lon, level):
+        """Manejador que acerca el mini-mapa dos niveles sobre un clúster."""
+
+        async def on_click(e):
+            if self.map_ref.current:
+                await self.map_ref.current.move_to(
+                    destination=mapa.MapLatitudeLongitude(lat, lon),
+                    zoom=min(level + 2, PERFORMANCE["cluster_max_zoom"] + 1),
+                )
 
-        return mapa.Marker(
-            content=ft.Container(
-                width=30,
-                height=30,
-                bgcolor=bg_color,
-                border_radius=15,
-                alignment=ft.alignment.Alignment(0, 0),
-                content=ft.Icon(
-                    icon,
-                    color=color,
-                    size=18
-                ),
-                tooltip=tooltip_text,
-                on_click=on_click
-            ),
-            coordinates=mapa.MapLatitudeLongitude(lat, lon),
-        )
+        return on_click
+
+    def _on_mini_map_position_change(self, e):
+        """Reagrupa el tráfico histórico cuando el mini-mapa cambia de nivel de zoom."""
+        previous = cluster_level(self._mini_map_zoom)
+        self._mini_map_zoom = e.camera.zoom
+        if cluster_level(self._mini_map_zoom) == previous:
+            return
+        if self.current_layer == "traffic" and getattr(self, 'traffic_source', None) is not None:
+            self.update_historical_traffic_markers()
 
     def _dms_to_decimal(self, dms_str):
         """Convierte coordenadas de formato AEMET (DDMMSSX) a decimal."""
@@ -975,14 +1181,8 @@ class RightPanel(ft.Container):
             self.selected_weather_station, {})
         station_name = station_info.get('nombre', 'Desconocida')
 
-        # AEMET usa formato YYYY-MM (con cero inicial si es necesario)
-        month_int = int(month)
-        date_key_long = f"{year}-{month_int:02}"
-        date_key_short = f"{year}-{month_int}"
-
-        station_data = self.aemet_data.get(self.selected_weather_station, {})
-        weather = station_data.get(
-            date_key_long) or station_data.get(date_key_short)
+        weather = self.get_weather_month(year, month).get(
+            self.selected_weather_station)
 
         if weather:
             tm_mes = weather.get('tm_mes')
@@ -1028,8 +1228,7 @@ class RightPanel(ft.Container):
         else:
             self.weather_container.visible = False
 
-        if self._page:
-            self._page.update()
+        self._render.request_update(self)
 
     def update_traffic_markers(self):
         """Actualiza los marcadores de tráfico en el mini-mapa."""
@@ -1039,61 +1238,35 @@ class RightPanel(ft.Container):
             print("  ⚠️ No hay información de estaciones de tráfico para tiempo real")
             return
 
-        self.traffic_markers = []
-
+        items = []
         for indicativo, info in self.traffic_stations_info.items():
             if not info['lat'] or not info['lon']:
                 continue
 
             color = "#1E88E5" if indicativo == self.selected_traffic_station else "#90CAF9"
 
-            marker_data = {
-                "tipo": "trafico_historico",
-                "indicativo": indicativo,
-                "titulo": info['nombre']
-            }
-
             tooltip = f"📍 {info['nombre']}\n🚗 Pulsa para ver datos de tráfico"
             if indicativo == self.selected_traffic_station:
                 tooltip += " (Seleccionada)"
 
-            # Crear marcador interactivo
-            marker_content = ft.Container(
-                width=30,
-                height=30,
-                bgcolor=color + "33",
-                border_radius=15,
-                alignment=ft.alignment.Alignment(0, 0),
-                content=ft.Icon(
-                    ft.icons.Icons.TRAFFIC,
-                    color=color,
-                    size=18
-                ),
-                tooltip=tooltip,
-                on_click=lambda e, ind=indicativo: self.on_traffic_station_click(
-                    ind)
-            )
+            items.append((
+                indicativo, info['lat'], info['lon'], color, ft.icons.Icons.TRAFFIC, tooltip,
+                lambda e, ind=indicativo: self.on_traffic_station_click(ind)
+            ))
 
-            marker = mapa.Marker(
-                content=marker_content,
-                coordinates=mapa.MapLatitudeLongitude(
-                    info['lat'], info['lon']),
-            )
-            self.traffic_markers.append(marker)
+        self.traffic_markers = self._marker_pool.markers("traffic", items)
 
         if self.marker_layer_ref.current:
             self.marker_layer_ref.current.markers = self.traffic_markers
             print(
                 f"✅ {len(self.traffic_markers)} marcadores de tráfico agregados al mapa")
-            if self._page:
-                self._page.update()
+            self._render.request_update(self)
 
     def update_historical_traffic_markers(self):
         """Actualiza los marcadores de tráfico usando datos históricos del parquet."""
         print("\n🚗 update_historical_traffic_markers llamado")
-        import pandas as pd
 
-        if not hasattr(self, 'traffic_data_df') or self.traffic_data_df is None:
+        if getattr(self, 'traffic_source', None) is None:
             print("  ⚠️ No hay datos de tráfico históricos cargados")
             return
         if not hasattr(self, 'traffic_coords_df') or self.traffic_coords_df is None:
@@ -1107,13 +1280,10 @@ class RightPanel(ft.Container):
             return
 
         # Filtrar por fecha (YYYY-MM)
-        # Convertir columna FECHA a string por si es Period o datetime
         month_int = int(month)
         date_str = f"{year}-{month_int:02}"
 
-        df = self.traffic_data_df.copy()
-        df['FECHA'] = pd.to_datetime(df['FECHA'])
-        df_filtered = df[df['FECHA'] == date_str]
+        df_filtered = self.get_traffic_month(year, month)
         print(
             f"  🔍 Registros encontrados para {date_str}: {df_filtered.shape}")
 
@@ -1122,72 +1292,33 @@ class RightPanel(ft.Container):
             # Mostrar mensaje informativo en el contenedor
             self.traffic_info_text.value = f"Sin datos disponibles para {date_str}"
             self.traffic_container.visible = True
-            if self._page:
-                self._page.update()
+            self._render.request_update(self)
             return
 
-        self.traffic_markers = []
-
-        # Guardar en un dict para acceso rapido (ATA -> {lat, lon, desc})
-        coords_dict = {}
-        for _, row_c in self.traffic_coords_df.iterrows():
-            coords_dict[row_c['ATA']] = {
-                'lat': row_c['LAT'],
-                'lon': row_c['LON'],
-                'desc': row_c['DESCRIPCION']
-            }
-
-        # Bug fix: usar hex string en lugar de ft.Colors.RED para permitir concatenación "33"
-        COLOR_TRAFFIC = "#E53935"
-
-        for _, row in df_filtered.iterrows():
-            ata_id = row['ATA']
-            imd = row['IMD']
-
-            coord = coords_dict.get(ata_id)
-            if not coord or pd.isna(coord['lat']) or pd.isna(coord['lon']):
-                continue
-
-            lat = coord['lat']
-            lon = coord['lon']
-            desc = coord.get('desc', f"ATA {ata_id}")
-
-            # Asignar color dinámico según intensidad (IMD)
-            imd_val = int(imd)
-            if imd_val < 5000:
-                color = ft.Colors.GREEN_400
-            elif imd_val < 15000:
-                color = ft.Colors.LIME_500
-            elif imd_val < 30000:
-                color = ft.Colors.AMBER_500
-            elif imd_val < 50000:
-                color = ft.Colors.ORANGE_500
-            elif imd_val < 80000:
-                color = ft.Colors.RED_500
-            else:
-                color = ft.Colors.RED_900
-
-            marker_data = {
-                "tipo": "trafico_historico",
-                "titulo": desc,
-                "info": {
-                    "ID ATA": ata_id,
-                    "Ubicación": desc,
-                    "IMD (Intensidad)": f"{int(imd)} veh/día",
-                    "Período": date_str
-                }
-            }
-
-            tooltip = f"📍 {desc}\n🚗 {int(imd):,} vehículos diarios (Promedio)"
-
-            marker = self._create_marker(
-                lat, lon, color, ft.icons.Icons.TRAFFIC,
-                marker_data, tooltip,
-                on_click=lambda e: self.on_historical_traffic_click(row, desc)
-            )
-            self.traffic_markers.append(marker)
-
-        matched = len(self.traffic_markers)
+        key = self._view_key("traffic")
+        view = self._view(key)
+        if 'items' not in view:
+            # Coordenadas, IMD y tramo de color ya calculados por columnas
+            specs = self.get_traffic_marker_specs(year, month)
+
+            items = []
+            # El tramo de IMD de cada punto da el color de los clústeres
+            buckets = specs['bucket'].tolist()
+            for ata_id, lat, lon, imd_val, bucket, desc in zip(
+                    specs['ata'], specs['lat'], specs['lon'],
+                    specs['imd'], specs['bucket'], specs['desc']):
+                tooltip = f"📍 {desc}\n🚗 {imd_val:,} vehículos diarios (Promedio)"
+                items.append((
+                    ata_id, lat, lon, TRAFFIC_IMD_COLORS[bucket], ft.icons.Icons.TRAFFIC, tooltip,
+                    lambda e, row={'ATA': ata_id, 'IMD': imd_val, 'FECHA': date_str}, desc=desc:
+                        self.on_historical_traffic_click(row, desc)
+                ))
+            view = self._store_view(key, view, items=items, buckets=buckets)
+
+        self.traffic_markers = self._clustered_markers("traffic_historical", key, view,
+                                                       TRAFFIC_IMD_COLORS)
+
+        matched = len(view['items'])
         total = len(df_filtered)
         print(f"  📍 {matched}/{total} ubicaciones con coordenadas para {date_str}")
 
@@ -1195,8 +1326,7 @@ class RightPanel(ft.Container):
             self.marker_layer_ref.current.markers = self.traffic_markers
             print(
                 f"✅ {len(self.traffic_markers)} marcadores históricos de tráfico agregados")
-            if self._page:
-                self._page.update()
+            self._render.request_update(self)
 
     def on_historical_traffic_click(self, row, desc=None):
         """Manejador al hacer clic en un punto de tráfico histórico con info amigable."""
@@ -1217,10 +1347,14 @@ class RightPanel(ft.Container):
         else:
             estado = "🔴 Saturado (Tráfico intenso)"
 
-        # Formatear fecha
+        # Formatear fecha (el índice mensual la guarda como 'YYYY-MM')
         fecha = row['FECHA']
-        fecha_str = f"{MONTH_NAMES[fecha.month-1]} {fecha.year}" if hasattr(
-            fecha, 'month') else str(fecha)
+        if hasattr(fecha, 'month'):
+            fecha_str = f"{MONTH_NAMES[fecha.month-1]} {fecha.year}"
+        else:
+            fecha_year, _, fecha_month = str(fecha).partition('-')
+            fecha_str = (f"{MONTH_NAMES[int(fecha_month[:2]) - 1]} {fecha_year}"
+                         if fecha_month[:2].isdigit() else str(fecha))
 
         self.pollution_info_text.value = (
             f"📍 Punto de medida:\n   {final_desc}\n\n"
@@ -1231,8 +1365,7 @@ class RightPanel(ft.Container):
         )
         self.pollution_container.visible = True
 
-        if self._page:
-            self._page.update()
+        self._render.request_update(self)
 
     # ── EXPORT LOGIC ──────────────────────────────────────────────────────
 
@@ -1336,14 +1469,11 @@ class RightPanel(ft.Container):
             return results
 
         elif self.current_layer == "traffic":
-            if not hasattr(self, 'traffic_data_df') or self.traffic_data_df is None:
+            if getattr(self, 'traffic_source', None) is None:
                 return []
 
             month_int = int(month)
-            date_str = f"{year}-{month_int:02}"
-
-            df = self.traffic_data_df
-            df_filtered = df[df['FECHA'] == date_str].copy()
+            df_filtered = self.get_traffic_month(year, month).copy()
 
             # Limpiar nombres de columnas (quitar saltos de línea \r\n)
             df_filtered.columns = [c.strip() for c in df_filtered.columns]
@@ -1351,16 +1481,11 @@ class RightPanel(ft.Container):
             # Formatear fecha para el PDF/JSON: dd-MM-YYYY (usamos dia 01)
             df_filtered['Fecha_Formato'] = f"01-{month_int:02}-{year}"
 
-            # Enriquecer con descripciones si están disponibles
-            if hasattr(self, 'traffic_coords_df') and self.traffic_coords_df is not None:
-                coords_map = self.traffic_coords_df.set_index(
-                    'ATA')['DESCRIPCION'].to_dict()
-                # Si no hay descripción, usar el ID de ATA para que no salga 'nan'
-                df_filtered['Descripcion'] = df_filtered['ATA'].map(coords_map).fillna(
-                    "Punto tráfico " + df_filtered['ATA'].astype(str))
-            else:
-                df_filtered['Descripcion'] = "Punto tráfico " + \
-                    df_filtered['ATA'].astype(str)
+            # Enriquecer con descripciones (unidas al cargar la tabla)
+            # Si no hay descripción, usar el ID de ATA para que no salga 'nan'
+            df_filtered['Descripcion'] = df_filtered['DESCRIPCION'].fillna(
+                "Punto tráfico " + df_filtered['ATA'].astype(str))
+            df_filtered = df_filtered.drop(columns=['LAT', 'LON', 'DESCRIPCION'])
 
             # Arreglar error de JSON: Convertir Timestamps de pandas a strings
             for col in df_filtered.columns:
@@ -1599,60 +1724,42 @@ class RightPanel(ft.Container):
         if self._page:
             self._page.snack_bar = ft.SnackBar(ft.Text(message))
             self._page.snack_bar.open = True
-            self._page.update()
+            self._render.request_update()
 
     def update_weather_markers(self):
         """Actualiza los marcadores de estaciones meteorológicas."""
         print("\n🌧️ update_weather_markers llamado")
 
-        self.weather_markers = []
+        key = self._view_key("rain")
+        view = self._view(key)
+        if 'items' not in view:
+            view = self._store_view(key, view, items=self._weather_marker_items())
+        self.weather_markers = self._layer_markers("weather", key, view['items'])
+
+        if self.marker_layer_ref.current:
+            self.marker_layer_ref.current.markers = self.weather_markers
+            print(f"✅ {len(self.weather_markers)
+                       } marcadores meteorológicos agregados")
+            self._render.request_update(self)
 
+    def _weather_marker_items(self):
+        """Marcadores (id, lat, lon, color, icono, tooltip, on_click) de las estaciones AEMET."""
+        items = []
         for indicativo, info in self.weather_stations_info.items():
             if not info['lat'] or not info['lon']:
                 continue
 
             color = "#1565C0" if indicativo == self.selected_weather_station else "#90CAF9"
 
-            marker_data = {
-                "tipo": "clima_historico",
-                "indicativo": indicativo,
-                "titulo": info['nombre']
-            }
-
             tooltip = f"🌦️ Estación: {info['nombre']}\n📍 Toca para ver datos del clima"
             if indicativo == self.selected_weather_station:
                 tooltip += " (Seleccionada)"
 
-            # Crear marcador interactivo
-            marker_content = ft.Container(
-                width=30,
-                height=30,
-                bgcolor=color + "33",
-                border_radius=15,
-                alignment=ft.alignment.Alignment(0, 0),
-                content=ft.Icon(
-                    ft.icons.Icons.GRAIN,
-                    color=color,
-                    size=18
-                ),
-                tooltip=tooltip,
-                on_click=lambda e, ind=indicativo: self.on_weather_station_click(
-                    ind)
-            )
-
-            marker = mapa.Marker(
-                content=marker_content,
-                coordinates=mapa.MapLatitudeLongitude(
-                    info['lat'], info['lon']),
-            )
-            self.weather_markers.append(marker)
-
-        if self.marker_layer_ref.current:
-            self.marker_layer_ref.current.markers = self.weather_markers
-            print(f"✅ {len(self.weather_markers)
-                       } marcadores meteorológicos agregados")
-            if self._page:
-                self._page.update()
+            items.append((
+                indicativo, info['lat'], info['lon'], color, ft.icons.Icons.GRAIN, tooltip,
+                lambda e, ind=indicativo: self.on_weather_station_click(ind)
+            ))
+        return items
 
     def on_weather_station_click(self, indicativo):
         """Manejador al hacer clic en una estación meteorológica."""
@@ -1706,6 +1813,16 @@ class RightPanel(ft.Container):
         if has_metrics:
             info_text += metrics_block
 
+        # Picos del mes servidos desde los agregados (sin leer valores diarios)
+        peaks = []
+        for label, p in [("NO2", "no2"), ("O3", "o3"), ("PM10", "pm10")]:
+            p95, p_max = sensor.get(f"{p}_p95"), sensor.get(f"{p}_max")
+            if p95 is not None and p_max is not None:
+                peaks.append(
+                    f"   • {label}: p95 {p95:.1f} | máx {p_max:.1f} μg/m³ ({sensor.get(f'{p}_count', 0)} días)\n")
+        if peaks:
+            info_text += "\n📈 Picos del mes:\n" + "".join(peaks)
+
         self.pollution_info_text.value = info_text
         self.pollution_container.visible = True
 
@@ -1715,14 +1832,13 @@ class RightPanel(ft.Container):
                 float(sensor['lat']), float(sensor['lon']))
             self.map_ref.current.zoom = 13
 
-        if self._page:
-            self._page.update()
+        self._render.request_update(self)
 
     def on_search_click(self, e):
         """Manejador del botón de búsqueda."""
         if not self.data_loaded:
             missing = []
-            if not hasattr(self, 'traffic_data_df') and not hasattr(self, 'traffic_data'):
+            if not hasattr(self, 'traffic_source') and not hasattr(self, 'traffic_data'):
                 missing.append('Traffic Data')
             if not hasattr(self, 'aemet_data'):
                 missing.append('AEMET Data')
@@ -1734,7 +1850,7 @@ class RightPanel(ft.Container):
                 self._page.snack_bar = ft.SnackBar(
                     ft.Text(f"Los datos aún se están cargando... (Falta: {', '.join(missing)})"))
                 self._page.snack_bar.open = True
-                self._page.update()
+                self._render.request_update()
             return
 
         month, year = self.period_picker.value
@@ -1753,7 +1869,7 @@ class RightPanel(ft.Container):
             self.update_weather_markers()
         else:
             print("  → Actualizando marcadores de tráfico...")
-            if hasattr(self, 'traffic_data_df'):
+            if hasattr(self, 'traffic_source'):
                 self.update_historical_traffic_markers()
             else:
                 self.update_traffic_markers()
@@ -1802,27 +1918,44 @@ class RightPanel(ft.Container):
             month_end=range_config["month_end"],
         )
 
-        if self._page:
-            self._page.update()
+        self._render.request_update(self)
 
-    def _get_current_data_list(self):
-        """Obtiene la lista de datos filtrados para la capa actual."""
-        try:
+    def _get_current_data_list(self, key=None):
+        """
+        Lista de datos de una vista (cacheada por capa, periodo y estación).
+
+        Args:
+            key: Clave de _view_key(); por defecto la de la selección actual.
+                 Quien ya tiene la clave la pasa para que datos y gráfica
+                 correspondan a la misma vista aunque el picker cambie entretanto.
+
+        Returns:
+            Lista de registros (vacía si no hay periodo seleccionado)
+        """
+        if key is None:
             month, year = self.period_picker.value
             if not month or not year:
                 return []
-                
-            month_int = int(month)
-            year_int = int(year)
+            key = self._view_key()
+        view = self._view(key)
+        if 'data' not in view:
+            view = self._store_view(key, view, data=self._build_current_data_list(key))
+        return view['data']
+
+    def _build_current_data_list(self, key):
+        """Obtiene la lista de datos filtrados de la capa y periodo de key."""
+        try:
+            layer, year_int, month_int, _ = key
+            month, year = str(month_int), str(year_int)
             
-            print(f"📊 Buscando datos para gráficos: {month_int}/{year_int} (Capa: {self.current_layer})")
+            print(f"📊 Buscando datos para gráficos: {month_int}/{year_int} (Capa: {layer})")
             
-            if self.current_layer == "pollution":
+            if layer == "pollution":
                 data = self.filter_sensors_by_date(month, year)
                 print(f"📊 Polución: {len(data) if data else 0} registros encontrados")
                 return data if isinstance(data, list) else []
             
-            elif self.current_layer == "rain":
+            elif layer == "rain":
                 if hasattr(self, 'aemet_data') and isinstance(self.aemet_data, dict) and 'aemet_data' in self.aemet_data:
                     filtered_data = []
                     target_date = f"{year_int}-{month_int:02d}"
@@ -1838,21 +1971,19 @@ class RightPanel(ft.Container):
                     print(f"📊 Clima: {len(filtered_data)} registros encontrados para {target_date}")
                     return filtered_data
             
-            elif self.current_layer == "traffic":
-                if hasattr(self, 'traffic_data_df') and self.traffic_data_df is not None:
-                    df = self.traffic_data_df
+            elif layer == "traffic":
+                if getattr(self, 'traffic_source', None) is not None:
                     target_date = f"{year_int}-{month_int:02d}"
-                    if 'FECHA' in df.columns:
-                        mask = df['FECHA'] == target_date
-                        df_filtered = df[mask].copy()
-                        
-                        if hasattr(self, 'traffic_coords_df') and self.traffic_coords_df is not None:
-                            coords_map = self.traffic_coords_df.set_index('ATA')['DESCRIPCION'].to_dict()
-                            df_filtered['Descripcion'] = df_filtered['ATA'].map(coords_map).fillna(df_filtered['ATA'])
-                        
-                        data_list = df_filtered.to_dict('records')
-                        print(f"📊 Tráfico: {len(data_list)} registros encontrados para {target_date}")
-                        return data_list
+                    df_filtered = self.get_traffic_month(year_int, month_int)
+                    
+                    if hasattr(self, 'traffic_coords_df') and self.traffic_coords_df is not None:
+                        df_filtered = df_filtered.assign(
+                            Descripcion=df_filtered['DESCRIPCION'].fillna(df_filtered['ATA']))
+                    df_filtered = df_filtered.drop(columns=['LAT', 'LON', 'DESCRIPCION'])
+                    
+                    data_list = df_filtered.to_dict('records')
+                    print(f"📊 Tráfico: {len(data_list)} registros encontrados para {target_date}")
+                    return data_list
         except Exception as e:
             print(f"❌ Error en _get_current_data_list: {e}")
                 
@@ -1862,15 +1993,25 @@ class RightPanel(ft.Container):
         """Genera y muestra gráficos de Matplotlib basados en los datos actuales."""
         if not self.data_ready_for_charts():
             self.charts_container.visible = False
-            if self._page:
-                self._page.update()
+            self._render.request_update(self)
+            return
+
+        # La imagen de un periodo ya visitado se reutiliza sin pasar por Matplotlib
+        key = self._view_key()
+        chart = self._view(key).get('chart')
+        if chart is not None:
+            self.chart_image.src = chart
+            self.chart_image.visible = True
+            self.charts_container.visible = True
+            self._render.request_update(self)
             return
 
         try:
-            data = self._get_current_data_list()
+            data = self._get_current_data_list(key)
             if not data:
                 self.charts_container.visible = False
                 return
+            layer = key[0]
 
             # Configuración de estilo Matplotlib (Dark Mode compatible)
             plt.style.use('dark_background')
@@ -1879,7 +2020,7 @@ class RightPanel(ft.Container):
             
             fig, ax = plt.subplots(figsize=(7, 4))
 
-            if self.current_layer == "pollution":
+            if layer == "pollution":
                 # Gráfica de barras comparativa (Top 8 estaciones)
                 data_subset = [d for d in data if isinstance(d, dict) and 'nombre' in d][:8]
                 if not data_subset: 
@@ -1900,7 +2041,7 @@ class RightPanel(ft.Container):
                 ax.set_xticklabels(stations, rotation=45, ha='right', color='white')
                 ax.legend()
 
-            elif self.current_layer == "rain":
+            elif layer == "rain":
                 # Gráfica de precipitaciones
                 data_subset = [d for d in data if isinstance(d, dict) and 'Estación' in d][:10]
                 if not data_subset:
@@ -1914,7 +2055,7 @@ class RightPanel(ft.Container):
                 ax.set_title('Precipitación Mensual por Estación', color='white')
                 plt.xticks(rotation=45, ha='right', color='white')
 
-            elif self.current_layer == "traffic":
+            elif layer == "traffic":
                 # Asegurar que IMD sea numérico y filtrar dicts
                 clean_data = []
                 for d in data:
@@ -1957,6 +2098,7 @@ class RightPanel(ft.Container):
             self.chart_image.src = f"data:image/png;base64,{img_b64}"
             self.chart_image.visible = True
             self.charts_container.visible = True
+            self._store_view(key, self._view(key), chart=self.chart_image.src)
             
         except Exception as e:
             print(f"❌ Error al generar gráfico en UI: {e}")
@@ -1964,8 +2106,7 @@ class RightPanel(ft.Container):
             traceback.print_exc()
             self.charts_container.visible = False
         
-        if self._page:
-            self._page.update()
+        self._render.request_update(self)
 
     def data_ready_for_charts(self):
         """Verifica si hay datos suficientes para mostrar gráficos."""
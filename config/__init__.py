@@ -5,5 +5,6 @@ Contiene estilos de mapas, temas y constantes de la aplicación.
 
 from .map_styles import MAP_STYLES
 from .theme import COLORS
+from .performance import PERFORMANCE
 
-__all__ = ['MAP_STYLES', 'COLORS']
+__all__ = ['MAP_STYLES', 'COLORS', 'PERFORMANCE']
@@ -0,0 +1,58 @@
+"""
+Parámetros de rendimiento y uso de memoria.
+Se pueden sobrescribir con variables de entorno (útil en equipos kiosko con poca RAM).
+"""
+
+import os
+
+PERFORMANCE = {
+    # Presupuesto de memoria para los años de contaminación cacheados en RightPanel
+    "year_cache_max_mb": float(os.environ.get("DATA_DETECTIVE_YEAR_CACHE_MB", "32")),
+
+    # Precarga especulativa de periodos vecinos al navegar con el MonthYearPicker
+    "prefetch_workers": 2,
+    "prefetch_lookahead": 1,
+    # Presupuesto para los meses de tráfico/AEMET ya filtrados
+    "period_cache_max_mb": 8,
+    # Vistas del panel derecho ya construidas (marcadores, datos de gráficas
+    # y exportación, imagen de la gráfica) por capa, periodo y estación
+    "view_cache_max_mb": float(os.environ.get("DATA_DETECTIVE_VIEW_CACHE_MB", "16")),
+
+    # Cadencia (segundos) del refresco en segundo plano de cada feed en tiempo real
+    "refresh_intervals": {
+        "traffic_data": int(os.environ.get("DATA_DETECTIVE_REFRESH_TRAFFIC_S", "180")),
+        "air_quality_data": int(os.environ.get("DATA_DETECTIVE_REFRESH_AIR_S", "900")),
+        "weather_data": int(os.environ.get("DATA_DETECTIVE_REFRESH_WEATHER_S", "600")),
+    },
+
+    # Descarga de datasets de Valencia OpenData: páginas de 100 registros en
+    # paralelo (hasta N a la vez) o, si se activa, un único /exports/json
+    "opendata_page_size": 100,
+    "opendata_max_concurrency": int(os.environ.get("DATA_DETECTIVE_OPENDATA_CONCURRENCY", "4")),
+    "opendata_bulk_export": os.environ.get("DATA_DETECTIVE_OPENDATA_EXPORT", "0") == "1",
+
+    # Descarga de los CSV históricos de CKAN (GVA): hilos y reintentos por fichero
+    "ckan_download_workers": int(os.environ.get("DATA_DETECTIVE_CKAN_WORKERS", "6")),
+    "ckan_download_retries": 4,
+
+    # Procesos que parsean los CSV mensuales en la primera ejecución (1 = sin pool).
+    # Cada proceso spawn paga sus imports: por defecto CPUs - 1, como mucho 4
+    "historical_parse_workers": int(os.environ.get("DATA_DETECTIVE_PARSE_WORKERS",
+                                                   str(max(1, min(4, (os.cpu_count() or 1) - 1))))),
+
+    # Mapa principal: margen del viewport (fracción de su tamaño por lado) dentro
+    # del cual se montan marcadores, y lado de las celdas del índice espacial
+    "map_viewport_padding": 0.5,
+    "map_grid_cell_deg": 0.02,
+
+    # Agrupación de marcadores (mapa principal y tráfico histórico del mini-mapa):
+    # celdas de N píxeles por nivel de zoom; por encima de cluster_max_zoom
+    # se muestran los puntos sueltos
+    "cluster_cell_px": int(os.environ.get("DATA_DETECTIVE_CLUSTER_CELL_PX", "64")),
+    "cluster_min_zoom": 8,
+    "cluster_max_zoom": int(os.environ.get("DATA_DETECTIVE_CLUSTER_MAX_ZOOM", "15")),
+
+    # Intervalo mínimo (ms) entre dos page.update() de la interfaz: los cambios
+    # pedidos dentro del mismo intervalo se envían al cliente en un solo volcado
+    "render_frame_ms": float(os.environ.get("DATA_DETECTIVE_RENDER_FRAME_MS", "33")),
+}
@@ -1,14 +1,16 @@
 """
 Script para descargar y consolidar datos históricos de contaminación de Valencia.
 Descarga todos los meses desde 1994-04 hasta 2025-11 y crea un CSV consolidado
-con solo NO2, O3 y PM10.
+con solo NO2, O3 y PM10, junto con los JSON anuales y el almacén columnar.
 """
 
 import csv
 import os
 import time
 from datetime import datetime
-from utils.GetContaminacio import get_historical_data
+from utils.GetContaminacio import get_downloader
+from utils.ckan_downloader import month_range
+from utils.historical_pipeline import YearPartitionWriter, append_values
 
 # Configuración
 START_YEAR = 1994
@@ -17,6 +19,7 @@ END_YEAR = 2025
 END_MONTH = 11
 
 OUTPUT_FILE = "valencia_pollution_consolidated.csv"
+STORE_DIR = os.path.join("data", "pollution_historical")
 POLLUTANTS_TO_KEEP = ['NO2', 'O3', 'PM10']
 
 # Estaciones de Valencia (puedes ajustar según necesites)
@@ -58,57 +61,29 @@ def download_all_data():
     print(f"Contaminantes: {', '.join(POLLUTANTS_TO_KEEP)}")
     print("=" * 60)
     
-    downloaded_files = []
-    failed_downloads = []
-    
-    current_year = START_YEAR
-    current_month = START_MONTH
-    
-    total_months = (END_YEAR - START_YEAR) * 12 + (END_MONTH - START_MONTH) + 1
-    month_count = 0
-    
-    while current_year < END_YEAR or (current_year == END_YEAR and current_month <= END_MONTH):
-        month_count += 1
-        print(f"\n[{month_count}/{total_months}] Descargando {current_year}-{current_month:02d}...", end=" ")
-        # Comprobar si el fichero ya existe para saltar la descarga
-        expected_filename = f"contaminacion_{current_year}_{current_month:02d}.csv"
-        if os.path.exists("csv_contaminacion/" + expected_filename):
-            print(f"✅ Ya existe")
-            downloaded_files.append("csv_contaminacion/" + expected_filename)
-            
-            # Avanzar al siguiente mes
-            current_month += 1
-            if current_month > 12:
-                current_month = 1
-                current_year += 1
-            continue
-        
-        try:
-            filepath = get_historical_data(current_year, current_month)
-            
-            if filepath and os.path.exists(filepath):
-                downloaded_files.append(filepath)
-                print(f"✅ OK")
-            else:
-                failed_downloads.append(f"{current_year}-{current_month:02d}")
-                print(f"⚠️ No disponible")
-        
-        except Exception as e:
-            failed_downloads.append(f"{current_year}-{current_month:02d}")
-            print(f"❌ Error: {e}")
-        
-        # Avanzar al siguiente mes
-        current_month += 1
-        if current_month > 12:
-            current_month = 1
-            current_year += 1
-        
-        # Pequeña pausa para no saturar el servidor
-        time.sleep(0.5)
+    months = month_range(START_YEAR, START_MONTH, END_YEAR, END_MONTH)
+    total_months = len(months)
+    completed = 0
+
+    def on_done(year, month, filepath):
+        nonlocal completed
+        completed += 1
+        status = "✅ OK" if filepath else "⚠️ No disponible"
+        print(f"[{completed}/{total_months}] {year}-{month:02d} {status}")
+
+    # Un package_search por año, descargas en paralelo con reanudación y reintentos
+    downloader = get_downloader()
+    results = downloader.download_many(months, on_done=on_done)
+
+    # Orden cronológico (el pool termina los meses en cualquier orden)
+    downloaded_files = [results[key] for key in months if results[key]]
+    failed_downloads = [f"{year}-{month:02d}" for year, month in months if not results[(year, month)]]
     
     print("\n" + "=" * 60)
     print(f"✅ Descargados: {len(downloaded_files)} archivos")
     print(f"⚠️ Fallidos: {len(failed_downloads)} archivos")
+    print(f"🔎 Búsquedas CKAN: {downloader.catalog.searches} · "
+          f"reanudados: {downloader.stats['resumed']} · reintentos: {downloader.stats['retries']}")
     
     if failed_downloads:
         print(f"\nMeses sin datos: {', '.join(failed_downloads[:10])}")
@@ -148,121 +123,157 @@ def get_station_coords(station_name):
     
     return {'lat': '', 'lon': ''}
 
-def consolidate_data(csv_files):
-    """Consolida todos los CSVs en uno solo con filtros aplicados."""
+def _file_year(filepath):
+    """Año de un CSV mensual (contaminacion_YYYY_MM.csv) o None si el nombre no lo indica."""
+    parts = os.path.basename(filepath).split('_')
+    return int(parts[1]) if len(parts) > 2 and parts[1].isdigit() else None
+
+
+def consolidate_data(csv_files, output_file=OUTPUT_FILE, store_dir=STORE_DIR):
+    """
+    Consolida todos los CSVs en uno solo con filtros aplicados.
+
+    Las filas se escriben en el CSV consolidado según se leen y cada año se
+    vuelca al almacén (JSON anual + row groups) en cuanto se procesa su
+    último mes, así que en memoria solo vive un año.
+
+    Args:
+        csv_files: CSV mensuales en orden cronológico
+        output_file: Ruta del CSV consolidado
+        store_dir: Directorio de los JSON anuales y el almacén (None para no generarlo)
+
+    Returns:
+        Resumen {'rows', 'years': {año: filas}, 'stations': set} o None si falla
+    """
     print("\n" + "=" * 60)
     print("🔄 CONSOLIDANDO DATOS")
     print("=" * 60)
     
-    consolidated_rows = []
     total_rows_processed = 0
     total_rows_kept = 0
+    summary = {'rows': 0, 'years': {}, 'stations': set()}
     
     # Encabezados del CSV consolidado
     headers = ['COD_ESTACION', 'NOM_ESTACION', 'FECHA', 'NO2', 'O3', 'PM10', 'LATITUD', 'LONGITUD']
     
-    for i, filepath in enumerate(csv_files, 1):
-        print(f"[{i}/{len(csv_files)}] Procesando {os.path.basename(filepath)}...", end=" ")
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f, delimiter=';')
-                file_rows_kept = 0
-                
-                for row in reader:
-                    total_rows_processed += 1
-                    
-                    # Filtrar solo estaciones de Valencia
-                    station_name = row.get('NOM_ESTACION', '').strip()
-                    if not is_valencia_station(station_name):
-                        continue
-                    
-                    # Verificar si tiene al menos uno de los contaminantes
-                    has_data = False
-                    for pollutant in POLLUTANTS_TO_KEEP:
-                        value = row.get(pollutant, '').strip()
-                        if value and value != '-':
-                            has_data = True
-                            break
-                    
-                    if not has_data:
-                        continue
-                    
-                    # Obtener coordenadas
-                    coords = get_station_coords(station_name)
-                    
-                    # Crear fila consolidada
-                    consolidated_row = {
-                        'COD_ESTACION': row.get('COD_ESTACION', '').strip(),
-                        'NOM_ESTACION': station_name,
-                        'FECHA': row.get('FECHA', '').strip(),
-                        'NO2': row.get('NO2', '-').strip(),
-                        'O3': row.get('O3', '-').strip(),
-                        'PM10': row.get('PM10', '-').strip(),
-                        'LATITUD': coords['lat'],
-                        'LONGITUD': coords['lon']
-                    }
-                    
-                    consolidated_rows.append(consolidated_row)
-                    file_rows_kept += 1
-                    total_rows_kept += 1
+    partitions = YearPartitionWriter(store_dir) if store_dir else None
+    tmp_file = output_file + ".tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=headers, delimiter=';')
+            writer.writeheader()
+
+            for i, filepath in enumerate(csv_files, 1):
+                print(f"[{i}/{len(csv_files)}] Procesando {os.path.basename(filepath)}...", end=" ")
                 
-                print(f"✅ {file_rows_kept} filas")
-        
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            continue
+                try:
+                    rows_processed, rows_kept = _consolidate_file(filepath, writer, partitions, summary)
+                    total_rows_processed += rows_processed
+                    total_rows_kept += rows_kept
+                    print(f"✅ {rows_kept} filas")
+                except Exception as e:
+                    print(f"❌ Error: {e}")
+
+                # Último mes del año: se vuelca sin esperar al año siguiente
+                is_last_of_year = (i == len(csv_files)
+                                   or _file_year(csv_files[i]) != _file_year(filepath))
+                if partitions and is_last_of_year:
+                    partitions.finish_year()
+
+        os.replace(tmp_file, output_file)
+        if partitions:
+            # Filas, como generate_json_indexed (no estaciones-mes)
+            partitions.close(total_records=total_rows_kept)
+    except Exception as e:
+        print(f"❌ Error al guardar: {e}")
+        if partitions:
+            partitions.abort()
+        return None
     
+    summary['rows'] = total_rows_kept
+    file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
     print("=" * 60)
     print(f"📊 Total procesado: {total_rows_processed:,} filas")
     print(f"✅ Total consolidado: {total_rows_kept:,} filas")
     print(f"📉 Filtrado: {total_rows_processed - total_rows_kept:,} filas")
+    print(f"💾 Archivo guardado: {output_file} ({file_size:.2f} MB)")
+    if store_dir:
+        print(f"📁 JSON anuales y almacén en: {store_dir}")
     print("=" * 60)
     
-    return headers, consolidated_rows
+    return summary
 
 
-def save_consolidated_csv(headers, rows):
-    """Guarda el CSV consolidado."""
-    print(f"\n💾 Guardando archivo consolidado: {OUTPUT_FILE}")
-    
-    try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=headers, delimiter=';')
-            writer.writeheader()
-            writer.writerows(rows)
-        
-        file_size = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)  # MB
-        print(f"✅ Archivo guardado: {OUTPUT_FILE}")
-        print(f"📦 Tamaño: {file_size:.2f} MB")
-        print(f"📝 Filas: {len(rows):,}")
+def _consolidate_file(filepath, writer, partitions, summary):
+    """Filtra un CSV mensual; devuelve (filas leídas, filas conservadas)."""
+    rows_processed = 0
+    rows_kept = 0
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter=';')
         
-        return True
-    
-    except Exception as e:
-        print(f"❌ Error al guardar: {e}")
-        return False
+        for row in reader:
+            rows_processed += 1
+            
+            # Filtrar solo estaciones de Valencia
+            station_name = row.get('NOM_ESTACION', '').strip()
+            if not is_valencia_station(station_name):
+                continue
+            
+            # Verificar si tiene al menos uno de los contaminantes
+            has_data = False
+            for pollutant in POLLUTANTS_TO_KEEP:
+                value = row.get(pollutant, '').strip()
+                if value and value != '-':
+                    has_data = True
+                    break
+            
+            if not has_data:
+                continue
+            
+            # Obtener coordenadas
+            coords = get_station_coords(station_name)
+            
+            # Crear fila consolidada
+            consolidated_row = {
+                'COD_ESTACION': row.get('COD_ESTACION', '').strip(),
+                'NOM_ESTACION': station_name,
+                'FECHA': row.get('FECHA', '').strip(),
+                'NO2': row.get('NO2', '-').strip(),
+                'O3': row.get('O3', '-').strip(),
+                'PM10': row.get('PM10', '-').strip(),
+                'LATITUD': coords['lat'],
+                'LONGITUD': coords['lon']
+            }
+            writer.writerow(consolidated_row)
+            rows_kept += 1
+            
+            # Resumen incremental (sin retener las filas)
+            year = consolidated_row['FECHA'].split('-')[0]
+            if year:
+                summary['years'][year] = summary['years'].get(year, 0) + 1
+            summary['stations'].add(station_name)
+            
+            parts = consolidated_row['FECHA'].split('-')
+            if partitions and len(parts) >= 2 and consolidated_row['COD_ESTACION']:
+                sensor = partitions.sensor(int(parts[0]), int(parts[1]),
+                                           consolidated_row['COD_ESTACION'])
+                if not sensor['nombre']:
+                    sensor['nombre'] = station_name
+                    sensor['lat'] = coords['lat']
+                    sensor['lon'] = coords['lon']
+                append_values(sensor, consolidated_row)
+    
+    return rows_processed, rows_kept
 
 
-def generate_summary(rows):
+def generate_summary(summary):
     """Genera un resumen estadístico del dataset consolidado."""
     print("\n" + "=" * 60)
     print("📈 RESUMEN ESTADÍSTICO")
     print("=" * 60)
     
-    # Contar por año
-    years = {}
-    stations = set()
-    
-    for row in rows:
-        fecha = row.get('FECHA', '')
-        if fecha:
-            year = fecha.split('-')[0]
-            years[year] = years.get(year, 0) + 1
-        
-        station = row.get('NOM_ESTACION', '')
-        if station:
-            stations.add(station)
+    years = summary['years']
+    stations = summary['stations']
     
     print(f"\n📅 Años con datos: {len(years)}")
     print(f"🏢 Estaciones únicas: {len(stations)}")
@@ -294,17 +305,17 @@ def main():
         print("\n❌ No se descargaron archivos. Abortando.")
         return
     
-    # Paso 2: Consolidar datos
-    headers, consolidated_rows = consolidate_data(csv_files)
+    # Paso 2: Consolidar datos (CSV consolidado + JSON anuales y almacén en streaming)
+    summary = consolidate_data(csv_files)
     
-    if not consolidated_rows:
+    if summary is None:
+        return
+    if not summary['rows']:
         print("\n⚠️ No se encontraron datos de Valencia para consolidar.")
         return
     
-    # Paso 3: Guardar CSV consolidado
-    if save_consolidated_csv(headers, consolidated_rows):
-        # Paso 4: Generar resumen
-        generate_summary(consolidated_rows)
+    # Paso 3: Generar resumen
+    generate_summary(summary)
     
     # Tiempo total
     elapsed_time = time.time() - start_time
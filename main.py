@@ -1,36 +1,15 @@
-import flet as ft
+import multiprocessing
 import os
-from components import LeftPanel, MapContainer, RightPanel
 
+# Solo la biblioteca estándar a nivel de módulo: los procesos de parseo (spawn)
+# vuelven a importar este fichero y no deben cargar Flet ni los componentes
 
-class DataDetectiveUI(ft.Row):
-    """Interfaz principal de Data Detective."""
 
-    def __init__(self, page: ft.Page):
-        super().__init__(spacing=0, expand=True,vertical_alignment=ft.CrossAxisAlignment.STRETCH)
-
-        # Crear MapContainer primero
-        self.map_container = MapContainer(page=page)
-
-        # Crear LeftPanel con callback al MapContainer
-        self.left_panel = LeftPanel(
-            page=page,
-            on_layer_change=self.map_container.on_layer_change
-        )
-
-        # Crear RightPanel
-        self.right_panel = RightPanel(page=page)
-
-        # Agregar los paneles a la fila
-        self.controls = [
-            self.left_panel,
-            self.map_container,
-            self.right_panel,
-        ]
-
-
-def main(page: ft.Page):
+def main(page):
     """Función principal de la aplicación."""
+    import flet as ft
+    from components import DataDetectiveUI, RenderScheduler
+
     page.title = "Data Detective - VLC Urban Intel"
     page.padding = 0
     page.window.maximized = True
@@ -62,70 +41,33 @@ def main(page: ft.Page):
         bgcolor="#0a0e1a"
     )
     page.add(splash)
-    page.update()
+    render = RenderScheduler(page)
 
     # Verificar datos (puede mostrar diálogo de generación)
     data_ready = verify_and_generate_data(page)
 
     # Si los datos están listos, pre-cargar datos de APIs en paralelo
     if data_ready:
-        import threading
-        import time
-        
+        from utils import preload_realtime_data
+
         # Actualizar mensaje del splash
         splash_progress_text.value = "Cargando datos en tiempo real..."
-        page.update()
-        
-        # Variables para rastrear progreso
-        loading_status = {
-            "weather": False,
-            "air_quality": False,
-            "traffic": False
-        }
-        
-        # Pre-cargar datos de APIs en threads paralelos
-        def preload_weather():
-            from utils import get_cached_weather_data
-            get_cached_weather_data()
-            loading_status["weather"] = True
-            update_progress()
-        
-        def preload_air_quality():
-            from utils import get_cached_air_quality_data
-            get_cached_air_quality_data()
-            loading_status["air_quality"] = True
-            update_progress()
-        
-        def preload_traffic():
-            from utils import get_cached_traffic_data
-            get_cached_traffic_data()
-            loading_status["traffic"] = True
-            update_progress()
-        
-        def update_progress():
-            completed = sum(loading_status.values())
-            total = len(loading_status)
+        render.request_update(splash_progress_text)
+
+        def update_progress(key, completed, total):
+            # Llega desde los hilos de descarga: los avances seguidos se agrupan
             splash_progress_text.value = f"Cargando datos... ({completed}/{total})"
-            page.update()
-        
-        # Iniciar threads paralelos
-        weather_thread = threading.Thread(target=preload_weather, daemon=True)
-        air_quality_thread = threading.Thread(target=preload_air_quality, daemon=True)
-        traffic_thread = threading.Thread(target=preload_traffic, daemon=True)
-        
-        weather_thread.start()
-        air_quality_thread.start()
-        traffic_thread.start()
-        
-        # Esperar a que todos terminen (máximo 15 segundos)
-        start_time = time.time()
-        while not all(loading_status.values()) and (time.time() - start_time) < 15:
-            time.sleep(0.1)
-        
+            render.request_update(splash_progress_text)
+
+        # Los tres feeds se descargan a la vez con el cliente HTTP compartido;
+        # la espera queda acotada por el feed más lento (timeouts por feed)
+        preload_realtime_data(on_progress=update_progress)
+
+        render.flush()  # No dejar parches pendientes del splash
         page.clean()  # Limpiar splash screen
 
         # Agregar la UI principal
-        ui = DataDetectiveUI(page)
+        ui = DataDetectiveUI(page, render)
         page.add(ui)
 
         # Configurar event handlers después de que la página esté lista
@@ -146,14 +88,18 @@ def main(page: ft.Page):
 
             if os.path.exists(metadata_path):
                 page.clean()
-                ui = DataDetectiveUI(page)
+                ui = DataDetectiveUI(page, render)
                 page.add(ui)
                 ui.right_panel.setup_event_handlers()
-                page.update()
+                render.request_update()
 
         thread = threading.Thread(target=wait_and_load, daemon=True)
         thread.start()
 
 
 if __name__ == "__main__":
+    # El parseo de la primera ejecución usa un pool de procesos (spawn)
+    multiprocessing.freeze_support()
+    import flet as ft
+
     ft.run(main, assets_dir="assets")
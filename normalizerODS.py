@@ -2,21 +2,41 @@ import pandas as pd
 import os
 import glob
 import re
+import json
+import time
+import hashlib
+import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+
+from utils.traffic_source import write_traffic_parquet
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(os.path.dirname(__file__), "normalizer.log"), mode='w', encoding='utf-8')
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def configurar_logging():
+    """
+    Configuración de logging. Se llama solo desde __main__ para que los
+    procesos del pool (--jobs) no vuelvan a truncar normalizer.log al importar.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler(os.path.join(os.path.dirname(__file__), "normalizer.log"), mode='w', encoding='utf-8')
+        ]
+    )
+
+COLUMNAS_SALIDA = ['ATA', 'FECHA_RAW', 'IMD', 'FECHA']
+
 dir_ods = os.path.join(os.path.dirname(__file__), "data", "ods")
 archivo_salida = os.path.join(os.path.dirname(__file__), "data", "trafico_valencia.parquet")
+# Modo incremental: una partición por libro (año) y manifest de huellas
+dir_particiones = os.path.join(os.path.dirname(__file__), "data", "trafico_valencia")
+# (el prefijo "_" hace que pyarrow.dataset ignore el manifest al leer el directorio)
+archivo_manifest = os.path.join(dir_particiones, "_manifest.json")
 
 def extraer_mes(hoja):
     """Mapea nombres de hojas a formato MM (01-12)"""
@@ -40,113 +60,403 @@ def extraer_mes(hoja):
             return str(num).zfill(2)
     return None
 
-def procesar_imds():
-    ficheros = glob.glob(os.path.join(dir_ods, "*.ods"))
-    lista_acumulada = []
+def procesar_libro(f):
+    """
+    Lee un libro ODS de IMDs y lo normaliza a formato largo.
 
-    for f in ficheros:
-        nombre_fichero = os.path.basename(f)
-        logger.info(f"--- Procesando: {nombre_fichero} ---")
+    Args:
+        f: Ruta al fichero .ods
+
+    Returns:
+        DataFrame con columnas ATA, IMD, FECHA (y FECHA_RAW en el formato antiguo)
+        o None si el libro no contiene datos válidos
+    """
+    nombre_fichero = os.path.basename(f)
+    lista_libro = []
+
+    # Extraer el año del nombre del archivo (ej: 2016)
+    anio_match = re.search(r'(\d{4})', nombre_fichero)
+    anio_doc = anio_match.group(1) if anio_match else "0000"
+
+    try:
+        # Leemos todas las hojas del libro
+        # Usamos engine="calamine" para eficiencia
+        dict_dfs = pd.read_excel(f, engine="calamine", sheet_name=None)
+        logger.info(f"Hojas encontradas: {list(dict_dfs.keys())}")
+    except Exception as e:
+        logger.error(f"Error leyendo fichero {nombre_fichero}: {e}")
+        return None
+    for sheet_name, df in dict_dfs.items():
+        df.columns = df.columns.astype(str).str.strip()
+        # Normalizar columnas identificadoras: Renombrar 'Nombre' a 'ATA' si es necesario
+        if 'ATA' not in df.columns:
+            # Buscar alternativas como 'Nombre'
+            at_alt = [c for c in df.columns if c.lower() == 'nombre']
+            if at_alt:
+                df = df.rename(columns={at_alt[0]: 'ATA'})
+
+        # No necesitamos normalizar DESCRIPCION ya que no se guardará
+
+        # 2. Identificar columnas de datos (meses o IMD general)
+        # Formato antiguo: tramos_imd 2016-01.IMD
+        cols_meses = [c for c in df.columns if '.IMD' in c and '-' in c]
         
-        # Extraer el año del nombre del archivo (ej: 2016)
-        anio_match = re.search(r'(\d{4})', nombre_fichero)
-        anio_doc = anio_match.group(1) if anio_match else "0000"
-
-        try:
-            # Leemos todas las hojas del libro
-            # Usamos engine="calamine" para eficiencia
-            dict_dfs = pd.read_excel(f, engine="calamine", sheet_name=None)
-            logger.info(f"Hojas encontradas: {list(dict_dfs.keys())}")
-        except Exception as e:
-            logger.error(f"Error leyendo fichero {nombre_fichero}: {e}")
-            continue
-        for sheet_name, df in dict_dfs.items():
-            df.columns = df.columns.astype(str).str.strip()
-            # Normalizar columnas identificadoras: Renombrar 'Nombre' a 'ATA' si es necesario
-            if 'ATA' not in df.columns:
-                # Buscar alternativas como 'Nombre'
-                at_alt = [c for c in df.columns if c.lower() == 'nombre']
-                if at_alt:
-                    df = df.rename(columns={at_alt[0]: 'ATA'})
-
-            # No necesitamos normalizar DESCRIPCION ya que no se guardará
-
-            # 2. Identificar columnas de datos (meses o IMD general)
-            # Formato antiguo: tramos_imd 2016-01.IMD
-            cols_meses = [c for c in df.columns if '.IMD' in c and '-' in c]
+        # Formato nuevo: 'IMD Laborables', 'IMD Lab.', 'Lab.', etc.
+        cols_generales = [c for c in df.columns if ('IMD' in c.upper() or 'LAB.' in c.upper()) and '-' not in c]
+
+        if cols_meses:
+            # Caso archivos viejos (<2019): unión por meses en columnas dentro de una hoja
+            logger.info(f"  [Formato Antiguo] Meses en columnas -> Hoja: {sheet_name}")
+            df_largo = df.melt(
+                id_vars=['ATA'],
+                value_vars=cols_meses,
+                var_name='FECHA_RAW',
+                value_name='IMD'
+            )
+            df_largo['FECHA'] = df_largo['FECHA_RAW'].str.extract(r'(\d{4}-\d{2})')
+            lista_libro.append(df_largo)
+            break 
+        
+        elif cols_generales:
+            # Caso archivos nuevos (>=2019): una hoja por cada mes
+            mes = extraer_mes(sheet_name)
+            if not mes:
+                if len(dict_dfs) > 1:
+                    logger.debug(f"  Saltando hoja '{sheet_name}' (no identificada como mes)")
+                    continue
+                else:
+                    mes = "01"
+
+            logger.info(f"  [Formato Nuevo] Procesando hoja: {sheet_name} -> {anio_doc}-{mes}")
             
-            # Formato nuevo: 'IMD Laborables', 'IMD Lab.', 'Lab.', etc.
-            cols_generales = [c for c in df.columns if ('IMD' in c.upper() or 'LAB.' in c.upper()) and '-' not in c]
-
-            if cols_meses:
-                # Caso archivos viejos (<2019): unión por meses en columnas dentro de una hoja
-                logger.info(f"  [Formato Antiguo] Meses en columnas -> Hoja: {sheet_name}")
-                df_largo = df.melt(
-                    id_vars=['ATA'],
-                    value_vars=cols_meses,
-                    var_name='FECHA_RAW',
-                    value_name='IMD'
-                )
-                df_largo['FECHA'] = df_largo['FECHA_RAW'].str.extract(r'(\d{4}-\d{2})')
-                lista_acumulada.append(df_largo)
-                break 
+            # Identificar columnas disponibles
+            has_ata = 'ATA' in df.columns
+            col_valor = cols_generales[0]
+
+            if not has_ata:
+                logger.warning(f"  ⚠️ Hoja '{sheet_name}' NO TIENE columna 'ATA' o 'Nombre'. Columnas: {list(df.columns)}")
+                continue
             
-            elif cols_generales:
-                # Caso archivos nuevos (>=2019): una hoja por cada mes
-                mes = extraer_mes(sheet_name)
-                if not mes:
-                    if len(dict_dfs) > 1:
-                        logger.debug(f"  Saltando hoja '{sheet_name}' (no identificada como mes)")
-                        continue
-                    else:
-                        mes = "01"
-
-                logger.info(f"  [Formato Nuevo] Procesando hoja: {sheet_name} -> {anio_doc}-{mes}")
-                
-                # Identificar columnas disponibles
-                has_ata = 'ATA' in df.columns
-                col_valor = cols_generales[0]
-
-                if not has_ata:
-                    logger.warning(f"  ⚠️ Hoja '{sheet_name}' NO TIENE columna 'ATA' o 'Nombre'. Columnas: {list(df.columns)}")
-                    continue
-                
-                df_largo = df.copy()
-                df_largo = df_largo.rename(columns={col_valor: 'IMD'})
-                df_largo['FECHA'] = f"{anio_doc}-{mes}"
-                
-                # Seleccionar solo lo necesario
-                df_largo = df_largo[['ATA', 'IMD', 'FECHA']]
-                lista_acumulada.append(df_largo)
-
-    if lista_acumulada:
-        df_final = pd.concat(lista_acumulada, ignore_index=True)
-        # Limpieza inicial
-        num_antes = len(df_final)
-        df_final = df_final.dropna(subset=['ATA'])
-        num_despues = len(df_final)
-        
-        logger.info(f"Registros eliminados por ATA nulo: {num_antes - num_despues}")
+            df_largo = df.copy()
+            df_largo = df_largo.rename(columns={col_valor: 'IMD'})
+            df_largo['FECHA'] = f"{anio_doc}-{mes}"
+            
+            # Seleccionar solo lo necesario
+            df_largo = df_largo[['ATA', 'IMD', 'FECHA']]
+            lista_libro.append(df_largo)
 
-        # Limpieza final de nulos, tipos y duplicados
-        df_final['IMD'] = pd.to_numeric(df_final['IMD'], errors='coerce').fillna(0)
-        
-        # --- LOGS DE CALIDAD ---
-        logger.info("=== RESUMEN DE CALIDAD DE DATOS ===")
-        logger.info(f"Total registros finales: {len(df_final)}")
-        logger.info(f"Rango de FECHA: {df_final['FECHA'].min()} a {df_final['FECHA'].max()}")
-        logger.info(f"IMD medio: {df_final['IMD'].mean():.2f}")
-        logger.info(f"IMD máximo: {df_final['IMD'].max()}")
-        logger.info(f"Registros con IMD = 0: {len(df_final[df_final['IMD'] == 0])}")
-        
-        # Verificar si hay meses faltantes (opcional, pero útil)
-        meses_unicos = df_final['FECHA'].unique()
-        logger.info(f"Número de meses únicos procesados: {len(meses_unicos)}")
-        
-        df_final.to_parquet(archivo_salida, index=False)
-        logger.info(f"✅ Datos guardados en: {archivo_salida}")
-    else:
+    if not lista_libro:
+        return None
+    return pd.concat(lista_libro, ignore_index=True)
+
+def limpiar(df_final):
+    """Elimina registros sin ATA y normaliza IMD a numérico (nulos → 0)."""
+    num_antes = len(df_final)
+    df_final = df_final.dropna(subset=['ATA'])
+    num_despues = len(df_final)
+    
+    logger.info(f"Registros eliminados por ATA nulo: {num_antes - num_despues}")
+
+    # Limpieza final de nulos, tipos y duplicados
+    df_final = df_final.assign(
+        ATA=df_final['ATA'].astype(str),
+        IMD=pd.to_numeric(df_final['IMD'], errors='coerce').fillna(0).astype(float))
+    # Mismo esquema en todos los libros (FECHA_RAW vacío en el formato nuevo)
+    df_final = df_final.reindex(columns=COLUMNAS_SALIDA)
+    return df_final.astype({'FECHA_RAW': 'string', 'FECHA': 'string'})
+
+def resumen_calidad(df_final):
+    """Registra en el log el resumen de calidad de los datos normalizados."""
+    logger.info("=== RESUMEN DE CALIDAD DE DATOS ===")
+    logger.info(f"Total registros finales: {len(df_final)}")
+    logger.info(f"Rango de FECHA: {df_final['FECHA'].min()} a {df_final['FECHA'].max()}")
+    logger.info(f"IMD medio: {df_final['IMD'].mean():.2f}")
+    logger.info(f"IMD máximo: {df_final['IMD'].max()}")
+    logger.info(f"Registros con IMD = 0: {len(df_final[df_final['IMD'] == 0])}")
+    
+    # Verificar si hay meses faltantes (opcional, pero útil)
+    meses_unicos = df_final['FECHA'].unique()
+    logger.info(f"Número de meses únicos procesados: {len(meses_unicos)}")
+    return meses_unicos
+
+def procesar_libro_arrow(f):
+    """
+    Procesa y limpia un libro y lo devuelve como tabla Arrow (unidad de trabajo del pool).
+
+    Returns:
+        (nombre_fichero, tabla Arrow o None, segundos)
+    """
+    inicio = time.perf_counter()
+    df_libro = procesar_libro(f)
+    tabla = None
+    if df_libro is not None:
+        # Las tablas Arrow viajan entre procesos como buffers columnares
+        tabla = pa.Table.from_pandas(limpiar(df_libro), preserve_index=False)
+    return os.path.basename(f), tabla, time.perf_counter() - inicio
+
+def parsear_libros(ficheros, jobs=1):
+    """
+    Procesa varios libros, en serie o en un pool de procesos.
+
+    Args:
+        ficheros: Rutas de los .ods
+        jobs: Número de procesos (1 = en serie en este proceso)
+
+    Returns:
+        Dict {nombre_fichero: tabla Arrow o None}
+    """
+    resultados = {}
+
+    def registrar(nombre_fichero, tabla, segundos):
+        registros = tabla.num_rows if tabla is not None else 0
+        logger.info(f"⏱️ {nombre_fichero}: {segundos:.2f} s ({registros} registros)")
+        resultados[nombre_fichero] = tabla
+
+    if jobs <= 1:
+        for f in ficheros:
+            logger.info(f"--- Procesando: {os.path.basename(f)} ---")
+            registrar(*procesar_libro_arrow(f))
+        return resultados
+
+    logger.info(f"--- Procesando {len(ficheros)} libros con {jobs} procesos ---")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(procesar_libro_arrow, f): f for f in ficheros}
+        for future in as_completed(futures):
+            try:
+                registrar(*future.result())
+            except Exception as e:
+                nombre_fichero = os.path.basename(futures[future])
+                logger.error(f"Error procesando {nombre_fichero}: {e}")
+                resultados[nombre_fichero] = None
+    return resultados
+
+def procesar_imds(jobs=1, escribir=True):
+    """
+    Reconstruye el Parquet completo desde todos los libros ODS.
+
+    Args:
+        jobs: Procesos para leer los libros en paralelo (1 = en serie)
+        escribir: Si es False solo se procesa (útil para --compare)
+
+    Returns:
+        DataFrame final o None si no hay datos válidos
+    """
+    ficheros = sorted(glob.glob(os.path.join(dir_ods, "*.ods")))
+    resultados = parsear_libros(ficheros, jobs)
+
+    # Un único concat + escritura, en orden de fichero para que la salida sea estable
+    tablas = [resultados[os.path.basename(f)] for f in ficheros
+              if resultados.get(os.path.basename(f)) is not None]
+
+    if not tablas:
         logger.error("❌ No se encontraron datos válidos para procesar.")
+        return None
+
+    df_final = pa.concat_tables(tablas).to_pandas()
+    meses_unicos = resumen_calidad(df_final)
+
+    if escribir:
+        # Ordenado por FECHA y un row group por mes para que la app lea solo el mes pedido
+        write_traffic_parquet(df_final, archivo_salida)
+        logger.info(f"✅ Datos guardados en: {archivo_salida} ({len(meses_unicos)} row groups)")
+    return df_final
+
+def comparar_modos(jobs):
+    """Mide el tiempo total en serie frente a --jobs N y comprueba que la salida coincide."""
+    inicio = time.perf_counter()
+    df_serie = procesar_imds(jobs=1, escribir=False)
+    t_serie = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df_paralelo = procesar_imds(jobs=jobs, escribir=False)
+    t_paralelo = time.perf_counter() - inicio
+
+    # La escritura es la misma en ambos modos: se hace una vez fuera de la medida
+    if df_paralelo is not None:
+        write_traffic_parquet(df_paralelo, archivo_salida)
+        logger.info(f"✅ Datos guardados en: {archivo_salida}")
+
+    iguales = (df_serie is not None and df_paralelo is not None
+               and df_serie.equals(df_paralelo))
+    logger.info("=== COMPARATIVA SERIE vs PARALELO ===")
+    logger.info(f"En serie:            {t_serie:.2f} s")
+    logger.info(f"Con {jobs} procesos:     {t_paralelo:.2f} s")
+    logger.info(f"Aceleración:         x{t_serie / t_paralelo:.2f}")
+    logger.info(f"Salida idéntica:     {'sí' if iguales else 'NO'}")
+
+# ── MODO INCREMENTAL ──────────────────────────────────────────────────────
+
+def huella_fichero(f, calcular_hash=True):
+    """
+    Calcula la huella de un libro: fecha de modificación, tamaño y SHA-256.
+
+    Args:
+        f: Ruta al fichero
+        calcular_hash: Si es False solo se devuelven mtime y size
+
+    Returns:
+        Dict con 'mtime', 'size' y opcionalmente 'sha256'
+    """
+    stat = os.stat(f)
+    huella = {'mtime': stat.st_mtime, 'size': stat.st_size}
+    if calcular_hash:
+        sha = hashlib.sha256()
+        with open(f, 'rb') as fh:
+            for bloque in iter(lambda: fh.read(1024 * 1024), b''):
+                sha.update(bloque)
+        huella['sha256'] = sha.hexdigest()
+    return huella
+
+def cargar_manifest():
+    """Carga el manifest de libros procesados ({} si no existe)."""
+    if not os.path.exists(archivo_manifest):
+        return {}
+    try:
+        with open(archivo_manifest, 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except Exception as e:
+        logger.warning(f"Manifest ilegible, se reprocesa todo: {e}")
+        return {}
+
+def guardar_manifest(manifest):
+    """Guarda el manifest de forma atómica."""
+    tmp = archivo_manifest + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp, archivo_manifest)
+
+def libro_sin_cambios(f, entrada):
+    """
+    Indica si un libro coincide con su entrada del manifest.
+    Si mtime y tamaño coinciden no se lee el fichero; si solo cambió el mtime
+    se compara el hash para no reprocesar libros simplemente tocados.
+    """
+    if not entrada or not os.path.exists(os.path.join(dir_particiones, entrada.get('particion', ''))):
+        return False
+    huella = huella_fichero(f, calcular_hash=False)
+    if huella['size'] != entrada.get('size'):
+        return False
+    if huella['mtime'] == entrada.get('mtime'):
+        return True
+    if huella_fichero(f)['sha256'] != entrada.get('sha256'):
+        return False
+    # Mismo contenido: actualizar el mtime para no volver a calcular el hash
+    entrada['mtime'] = huella['mtime']
+    return True
+
+def nombre_particion(nombre_fichero):
+    """Partición de un libro: <año>.parquet según su nombre (o el nombre del libro si no lleva año)."""
+    anio_match = re.search(r'(\d{4})', nombre_fichero)
+    return f"{anio_match.group(1) if anio_match else os.path.splitext(nombre_fichero)[0]}.parquet"
+
+def asignar_particiones(ficheros, manifest):
+    """
+    Asigna una partición a cada libro y rechaza los que repiten año.
+
+    Dos libros del mismo año escribirían el mismo fichero y uno pisaría al
+    otro: se queda el que ya figura en el manifest con esa partición (o el
+    primero por nombre) y el resto se descarta con un error en el log.
+
+    Returns:
+        Dict {nombre_fichero: partición} solo con los libros aceptados
+    """
+    nombres = [os.path.basename(f) for f in ficheros]
+    # Primero los libros que ya tienen esa partición en el manifest (orden estable)
+    nombres.sort(key=lambda n: manifest.get(n, {}).get('particion') != nombre_particion(n))
+
+    asignadas = {}
+    duenos = {}
+    for nombre_fichero in nombres:
+        particion = nombre_particion(nombre_fichero)
+        if particion in duenos:
+            logger.error(f"❌ {nombre_fichero}: {particion} ya corresponde a {duenos[particion]}; "
+                         f"se ignora (renombra o elimina uno de los dos libros)")
+            continue
+        duenos[particion] = nombre_fichero
+        asignadas[nombre_fichero] = particion
+    return asignadas
+
+def procesar_imds_incremental(jobs=1):
+    """
+    Procesa solo los libros nuevos o modificados y escribe una partición
+    Parquet por libro (año) en data/trafico_valencia/. Las particiones de
+    libros sin cambios no se tocan.
+
+    Args:
+        jobs: Procesos para leer los libros pendientes en paralelo
+    """
+    os.makedirs(dir_particiones, exist_ok=True)
+    manifest = cargar_manifest()
+    ficheros = sorted(glob.glob(os.path.join(dir_ods, "*.ods")))
+    particiones = asignar_particiones(ficheros, manifest)
+    inicio_total = time.perf_counter()
+    procesados = 0
+
+    # Libros eliminados (o rechazados): primero, para que un libro renombrado
+    # no pierda la partición que se va a escribir ahora con su nombre nuevo
+    for nombre_fichero in sorted(set(manifest) - set(particiones)):
+        particion = manifest.pop(nombre_fichero)['particion']
+        # Solo se borra si ningún otro libro del manifest la usa
+        if all(entrada['particion'] != particion for entrada in manifest.values()):
+            ruta = os.path.join(dir_particiones, particion)
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            logger.info(f"🗑️ {nombre_fichero}: eliminado, partición {particion} borrada")
+        else:
+            logger.info(f"🗑️ {nombre_fichero}: eliminado del manifest ({particion} sigue en uso)")
+        guardar_manifest(manifest)
+
+    pendientes = []
+    for f in ficheros:
+        nombre_fichero = os.path.basename(f)
+        if nombre_fichero not in particiones:
+            continue
+        entrada = manifest.get(nombre_fichero)
+
+        inicio = time.perf_counter()
+        if libro_sin_cambios(f, entrada):
+            logger.info(f"⏭️ {nombre_fichero}: sin cambios ({time.perf_counter() - inicio:.3f} s)")
+            continue
+        pendientes.append(f)
+
+    resultados = parsear_libros(pendientes, jobs)
+
+    for f in pendientes:
+        nombre_fichero = os.path.basename(f)
+        tabla = resultados.get(nombre_fichero)
+        if tabla is None:
+            logger.error(f"❌ {nombre_fichero}: sin datos válidos")
+            continue
+
+        df_libro = tabla.to_pandas()
+        particion = particiones[nombre_fichero]
+        write_traffic_parquet(df_libro, os.path.join(dir_particiones, particion))
+
+        manifest[nombre_fichero] = dict(
+            huella_fichero(f), particion=particion,
+            registros=len(df_libro), meses=int(df_libro['FECHA'].nunique()))
+        guardar_manifest(manifest)
+        procesados += 1
+        logger.info(f"💾 {nombre_fichero} → {particion} ({len(df_libro)} registros)")
+
+    guardar_manifest(manifest)
+    logger.info(f"✅ {procesados}/{len(ficheros)} libros procesados en "
+                f"{time.perf_counter() - inicio_total:.2f} s → {dir_particiones}")
 
 if __name__ == "__main__":
-    procesar_imds()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Normaliza los ODS de IMDs de tráfico a Parquet.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Procesa solo los libros nuevos o modificados y escribe particiones por año")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Procesos para leer los libros en paralelo (por defecto 1, en serie)")
+    parser.add_argument("--compare", action="store_true",
+                        help="Mide el tiempo en serie frente a --jobs N (por defecto, un proceso por CPU)")
+    args = parser.parse_args()
+
+    configurar_logging()
+    if args.compare:
+        comparar_modos(args.jobs if args.jobs > 1 else (os.cpu_count() or 2))
+    elif args.incremental:
+        procesar_imds_incremental(args.jobs)
+    else:
+        procesar_imds(args.jobs)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.RealTimeValencianWeather import (CHUNK_SIZE, _trozos, iter_weather_rows,
+                                            parse_weather_html, parse_weather_html_soup)
+
+FIXTURE = os.path.join("data", "fixtures", "avamet_meteoxarxa_c15.html")
+
+
+def test():
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+
+    # repr para comparar también los NaN de los valores que faltan
+    soup_rows = [repr(c) for c in parse_weather_html_soup(html)]
+    assert soup_rows, "La página guardada no tiene filas en 'tDades'"
+    assert [repr(c) for c in parse_weather_html(html)] == soup_rows
+    print(f"✅ {os.path.basename(FIXTURE)}: {len(soup_rows)} estaciones iguales con "
+          f"BeautifulSoup y con el parser por eventos")
+
+    # Cualquier corte entre trozos (también dentro de un nombre o un valor)
+    for size in sorted({CHUNK_SIZE, 4096, 1000, 333, 64, 7, 1}):
+        rows = [repr(c) for c in iter_weather_rows(_trozos(html, size))]
+        assert rows == soup_rows, f"Filas distintas con trozos de {size} caracteres"
+    print("✅ Mismas filas con trozos de 1 a 16.384 caracteres")
+
+    # Deja de leer en </table>: el pie de la página no se consume
+    consumed = []
+    list(iter_weather_rows(_trozos(html), consumed))
+    assert sum(len(c) for c in consumed) < len(html)
+    print("✅ El parser por eventos se detiene al cerrar la tabla")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.ckan_downloader import CKANCatalog, CKANDownloader, month_range
+
+YEARS = (2022, 2023)
+# CSV de ~200 KiB por mes para que la descarga vaya en varios trozos
+CSVS = {f"/csv/{y}_{m:02d}.csv": (f"FECHA;NOM_ESTACION;NO2\n" +
+                                   f"{y}-{m:02d}-01;VALENCIA PISTA;{m}\n" * 8000).encode()
+        for y in YEARS for m in range(1, 13)}
+TRUNCATED = "/csv/2022_03.csv"   # Primera respuesta cortada a la mitad
+FLAKY = "/csv/2023_07.csv"       # Primera respuesta 503
+
+state = {"searches": 0, "ranges": [], "served": {}}
+lock = threading.Lock()
+
+
+class CKANStub(BaseHTTPRequestHandler):
+    """Imita package_search de CKAN y un servidor de ficheros con Range."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/3/action/package_search":
+            with lock:
+                state["searches"] += 1
+            year = int(parse_qs(url.query)["q"][0].rsplit(":", 1)[1])
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            resources = [{"url": f"{base}/csv/{year}_{m:02d}.csv", "size": len(CSVS[f'/csv/{year}_{m:02d}.csv'])}
+                         for m in range(1, 13)] if year in YEARS else []
+            results = [{"resources": resources}] if resources else []
+            return self._send(200, json.dumps({"success": True, "result": {"results": results}}).encode())
+
+        body = CSVS.get(url.path)
+        if body is None:
+            return self._send(404, b"")
+        with lock:
+            n = state["served"][url.path] = state["served"].get(url.path, 0) + 1
+        if url.path == FLAKY and n == 1:
+            return self._send(503, b"busy")
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            with lock:
+                state["ranges"].append((url.path, start))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        if url.path == TRUNCATED and n == 1:
+            # Se anuncia el fichero entero pero se corta la conexión a la mitad
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CKANStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    search_url = f"http://127.0.0.1:{server.server_port}/api/3/action/package_search"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_path = os.path.join(tmp, "ckan_resources.json")
+        downloader = CKANDownloader(os.path.join(tmp, "csv"), max_workers=6, backoff=0.01)
+        downloader.catalog = CKANCatalog(downloader.session, catalog_path, search_url)
+
+        months = month_range(2022, 1, 2024, 2)
+        results = downloader.download_many(months)
+
+        # Un package_search por año (2024 no existe) en lugar de uno por mes
+        assert state["searches"] == 3, state["searches"]
+        print(f"✅ {len(months)} meses resueltos con {state['searches']} búsquedas CKAN")
+
+        for (year, month), path in results.items():
+            if year in YEARS:
+                with open(path, "rb") as f:
+                    assert f.read() == CSVS[f"/csv/{year}_{month:02d}.csv"], path
+            else:
+                assert path is None
+        assert not [f for f in os.listdir(os.path.join(tmp, "csv")) if f.endswith(".part")]
+        print(f"✅ {downloader.stats['downloaded']} CSV completos y con el tamaño anunciado")
+
+        # El fichero cortado se reanuda desde lo que llegó a escribirse en el .part
+        half = len(CSVS[TRUNCATED]) // 2
+        starts = [start for path, start in state["ranges"] if path == TRUNCATED]
+        assert len(starts) == 1 and 0 < starts[0] <= half, state["ranges"]
+        assert downloader.stats["resumed"] == 1 and downloader.stats["retries"] >= 2
+        print(f"✅ Reanudado con Range: bytes={starts[0]}- y {downloader.stats['retries']} reintentos (503 + corte)")
+
+        # Segunda ejecución: años cerrados desde el JSON y CSV ya en disco
+        again = CKANDownloader(os.path.join(tmp, "csv"))
+        again.catalog = CKANCatalog(again.session, catalog_path, search_url)
+        again.download_many(month_range(2022, 1, 2023, 12))
+        assert again.catalog.searches == 0 and again.stats["skipped"] == 24
+        print("✅ Relanzar no repite búsquedas ni descargas")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+# AEMETDataService se importa como script de utils/ (igual que AEMET_downloader)
+sys.path.append(os.path.join(os.getcwd(), "utils"))
+
+from utils.conditional_fetch import ConditionalFetcher
+from AEMETDataService import AEMETDataService
+
+# Fixtures que sirve el servidor local: ruta → (cuerpo, cabeceras de validación)
+FIXTURES = {}
+# Endpoints al estilo AEMET: ruta → ruta de datos; cada llamada entrega una URL
+# 'datos' nueva y la anterior deja de existir (404)
+ONE_TIME_DATA = {}
+ISSUED = []
+
+
+def set_fixture(path, payload, etag=None, last_modified=None, encoding="utf-8"):
+    FIXTURES[path] = (json.dumps(payload, ensure_ascii=False).encode(encoding),
+                      etag, last_modified)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Sirve FIXTURES y responde 304 si los validadores coinciden."""
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path in ONE_TIME_DATA:
+            for old in ISSUED:
+                FIXTURES.pop(old, None)
+            ISSUED.append(f"/datos/{len(ISSUED)}")
+            FIXTURES[ISSUED[-1]] = FIXTURES[ONE_TIME_DATA[path]]
+            body = json.dumps({"estado": 200, "datos": (f"http://{self.headers['Host']}"
+                                                        f"{ISSUED[-1]}")}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if path not in FIXTURES:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body, etag, last_modified = FIXTURES[path]
+        if (etag and self.headers.get("If-None-Match") == etag) or \
+                (last_modified and not etag and self.headers.get("If-Modified-Since") == last_modified):
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fetcher = ConditionalFetcher(os.path.join(tmp, "http_cache.sqlite"))
+
+        # 1) OpenData con ETag: 200 → 304 → 200 al cambiar el contenido
+        set_fixture("/traffic", {"results": [{"idtramo": 1, "estado": 0}] * 50}, etag='"v1"')
+        body, status = fetcher.get(base + "/traffic", feed="traffic_data", params={"limit": 100})
+        assert status == "miss"
+        body2, status = fetcher.get(base + "/traffic", feed="traffic_data", params={"limit": 100})
+        assert status == "hit" and body2 == body
+        set_fixture("/traffic", {"results": [{"idtramo": 1, "estado": 3}]}, etag='"v2"')
+        body3, status = fetcher.get(base + "/traffic", feed="traffic_data", params={"limit": 100})
+        assert status == "miss" and json.loads(body3)["results"][0]["estado"] == 3
+        stats = fetcher.stats["traffic_data"]
+        assert stats["requests"] == 3 and stats["not_modified"] == 1
+        assert stats["bytes_saved"] == len(body)
+        print(f"✅ ETag: 304 servido desde caché ({stats['bytes_saved']} bytes ahorrados)")
+
+        # 2) Solo Last-Modified, con httpx.AsyncClient (camino de utils/async_http)
+        set_fixture("/air", {"results": [{"direccion": "Pista de Silla"}]},
+                    last_modified="Sat, 17 Oct 2026 10:00:00 GMT")
+
+        async def fetch_air_twice():
+            async with httpx.AsyncClient() as client:
+                first = await fetcher.aget(client, base + "/air", feed="air_quality_data")
+                second = await fetcher.aget(client, base + "/air", feed="air_quality_data")
+                return first, second
+
+        (body, first), (body2, second) = asyncio.run(fetch_air_twice())
+        assert (first, second) == ("miss", "hit") and body == body2
+        print("✅ If-Modified-Since: 304 tratado como acierto (cliente asíncrono)")
+
+        # 3) Los validadores persisten: un fetcher nuevo sobre la misma BD ya envía If-None-Match
+        reopened = ConditionalFetcher(fetcher.db_path)
+        _, status = reopened.get(base + "/air", feed="air_quality_data")
+        assert status == "hit"
+        print("✅ Validadores y cuerpos persistidos en SQLite")
+
+        # 4) AEMET: cada llamada da una URL 'datos' nueva de un solo uso; el cuerpo
+        # de datos se guarda con la clave del endpoint y se revalida en la URL nueva
+        endpoint = "/opendata/api/valores/climatologicos/inventarioestaciones/todasestaciones"
+        ONE_TIME_DATA[endpoint] = "/inventario"
+        set_fixture("/inventario", [{"indicativo": "8416Y", "nombre": "VALÈNCIA"}],
+                    etag='"inv"', encoding="iso-8859-15")
+
+        service = AEMETDataService("test-key", fetcher=fetcher)
+        service.BASE_URL = base + "/opendata"
+        inventory = service.fetch_stations_inventory()
+        assert inventory[0]["nombre"] == "VALÈNCIA"
+        assert service.fetch_station_info("8416Y")["indicativo"] == "8416Y"
+        assert len(ISSUED) == 2 and ISSUED[0] not in FIXTURES
+        assert httpx.get(base + ISSUED[0]).status_code == 404
+        assert fetcher.stats["aemet"]["not_modified"] == 1
+        assert fetcher._load(base + endpoint) is not None
+        assert all(fetcher._load(base + path) is None for path in ISSUED)
+        print("✅ AEMET: URL 'datos' nueva en cada llamada; 304 sobre el cuerpo guardado por endpoint")
+
+        # 5) Poda: como mucho max_entries URLs, y las que caducan se olvidan
+        small = ConditionalFetcher(os.path.join(tmp, "small.sqlite"), max_entries=3)
+        for i in range(6):
+            set_fixture(f"/feed{i}", {"i": i}, etag=f'"{i}"')
+            small.get(base + f"/feed{i}", feed="prune")
+        with small._connect() as conn:
+            keys = {row[0] for row in conn.execute("SELECT key FROM http_cache")}
+        assert keys == {base + f"/feed{i}" for i in (3, 4, 5)} and set(small._memory) == keys
+        small.max_age_s = -1
+        set_fixture("/feed6", {"i": 6}, etag='"6"')
+        small.get(base + "/feed6", feed="prune")
+        with small._connect() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0] == 0
+        assert not small._memory
+        print("✅ Caché HTTP acotada: max_entries y caducidad en SQLite y en memoria")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,91 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.marker_clusters import ClusterIndex, cluster_level
+
+
+def test():
+    rng = np.random.default_rng(11)
+    n = 5000
+    lats = 39.42 + rng.random(n) * 0.1
+    lons = -0.42 + rng.random(n) * 0.1
+    buckets = rng.integers(0, 6, n)
+    index = ClusterIndex(lats, lons, buckets, min_zoom=8, max_zoom=15, cell_px=64)
+
+    # Cada nivel reparte todos los puntos; el valor es el máximo y el centro, la media
+    previous = None
+    for level in range(8, 16):
+        groups = index.clusters(level)
+        ids = index.cluster_ids(level)
+        assert sum(g.count for g in groups) == n
+        for i, group in enumerate(groups[:50]):
+            assert (ids[group.members] == i).all()
+            assert group.value == buckets[group.members].max()
+            assert abs(group.lat - lats[group.members].mean()) < 1e-9
+        # Quadtree: los puntos de un clúster siguen juntos en el nivel anterior
+        if previous is not None:
+            prev_ids = index.cluster_ids(level - 1)
+            assert all(len(set(prev_ids[g.members])) == 1 for g in groups)
+            assert len(groups) >= previous
+        previous = len(groups)
+    print(f"✅ {n} puntos: {len(index.clusters(12))} clústeres a zoom 12 y "
+          f"{len(index.clusters(15))} a zoom 15")
+
+    assert cluster_level(12.4, 8, 15) == 12 and cluster_level(12.6, 8, 15) == 13
+    assert cluster_level(3, 8, 15) == 8 and cluster_level(15.6, 8, 15) is None
+    assert ClusterIndex([], [], min_zoom=8, max_zoom=15).clusters(12) == []
+    print("✅ Niveles de zoom: redondeo, mínimo y puntos sueltos por encima del máximo")
+
+    # MapContainer: a escala de ciudad se montan clústeres y al acercar, los puntos
+    from components.map_container import MapContainer, SEVERITY_COLORS
+    from config.performance import PERFORMANCE
+
+    class LayerStub:
+        markers = []
+
+    container = MapContainer()
+    layer = LayerStub()
+    container.marker_layer_ref.current = layer
+    container.current_layer = "Flujo Tráfico DGT"
+    specs = [container._marker_spec(f"P{i}", lat, lon, SEVERITY_COLORS[2 + b % 4], None,
+                                    {"info": {}}, None)
+             for i, (lat, lon, b) in enumerate(zip(lats, lons, buckets))]
+    container._apply_marker_specs("Flujo Tráfico DGT", specs)
+    container.update_visible_markers()
+    clustered = list(layer.markers)
+    assert 0 < len(clustered) < n
+    counts = {g.key: g.count for g in container._clusters["Flujo Tráfico DGT"][1].clusters(12)}
+    assert sum(counts[k] for k in container._mounted) == n
+
+    # Refresco que quita un punto: solo cambia el marcador de su clúster
+    container._apply_marker_specs("Flujo Tráfico DGT", specs[:-1])
+    container.update_visible_markers()
+    assert sum(1 for m in layer.markers if any(m is c for c in clustered)) == len(clustered) - 1
+
+    camera = SimpleNamespace(center=SimpleNamespace(latitude=39.47, longitude=-0.37),
+                             zoom=PERFORMANCE["cluster_max_zoom"] + 1)
+    container._on_position_change(SimpleNamespace(camera=camera))
+    single = container._marker_index["Flujo Tráfico DGT"]
+    assert all(single[k][1] is m for k, m in container._mounted.items())
+    print(f"✅ Mapa principal: {len(clustered)} clústeres a zoom 12, "
+          f"{len(layer.markers)} marcadores sueltos a zoom {camera.zoom}")
+
+    # Pool del mini-mapa: la misma celda reutiliza su marcador
+    from components.marker_pool import MarkerPool
+
+    pool = MarkerPool()
+    first = pool.cluster_markers("traffic_historical", [("12/1/1", 39.4, -0.4, "#FF0000", 12, None, None)])
+    again = pool.cluster_markers("traffic_historical", [("12/1/1", 39.4, -0.4, "#00FF00", 250, None, None)])
+    assert first[0] is again[0] and again[0].content.content.value == "250"
+    assert again[0].width == 48 and pool.stats == {'created': 1, 'reused': 1}
+    print("✅ MarkerPool reutiliza el marcador de cada celda")
+
+
+if __name__ == "__main__":
+    test()
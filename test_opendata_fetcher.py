@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.opendata_fetcher import OpenDataFetcher, export_url_for
+from utils.RealTimeTrafficValencia import EstacionTrafico
+
+N_RECORDS = 437
+DATASET = "/api/explore/v2.1/catalog/datasets/estat-transit"
+RECORDS = [{"idtramo": i, "denominacion": f"TRAMO {i}", "estado": i % 10,
+            "intensidad": str(i * 3), "geo_point_2d": {"lat": 39.47, "lon": -0.37}}
+           for i in range(N_RECORDS)]
+
+# Peticiones en curso / máximo observado (para comprobar la concurrencia acotada)
+state = {"in_flight": 0, "max_in_flight": 0, "pages": 0, "exports": 0}
+lock = threading.Lock()
+
+
+class OpenDataStub(BaseHTTPRequestHandler):
+    """Imita /records (limit <= 100, total_count) y /exports/json de la Explore API."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with lock:
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            time.sleep(0.05)
+            if url.path == DATASET + "/records":
+                limit = int(query.get("limit", ["10"])[0])
+                offset = int(query.get("offset", ["0"])[0])
+                if limit > 100:
+                    return self._send(400, {"error": "limit > 100"})
+                state["pages"] += 1
+                self._send(200, {"total_count": N_RECORDS,
+                                 "results": RECORDS[offset:offset + limit]})
+            elif url.path == DATASET + "/exports/json":
+                state["exports"] += 1
+                self._send(200, RECORDS)
+            else:
+                self._send(404, {})
+        finally:
+            with lock:
+                state["in_flight"] -= 1
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OpenDataStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    records_url = f"http://127.0.0.1:{server.server_port}{DATASET}/records"
+    assert export_url_for(records_url + "?limit=20").endswith(DATASET + "/exports/json")
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            fetcher = OpenDataFetcher(client, max_concurrency=3)
+
+            start = time.perf_counter()
+            stations = await fetcher.fetch_records(
+                records_url, {"timezone": "Europe/Madrid", "limit": 20},
+                parse=EstacionTrafico.from_record)
+            paged_s = time.perf_counter() - start
+            pages = state["pages"]
+
+            exported = await fetcher.fetch_export(records_url, parse=EstacionTrafico.from_record)
+
+            # Más registros que la ventana de /records → se usa el export
+            fetcher.max_records_window = 200
+            fallback = await fetcher.fetch_records(records_url)
+            return stations, paged_s, pages, exported, fallback
+
+    stations, paged_s, pages, exported, fallback = asyncio.run(run())
+    server.shutdown()
+
+    # Todas las páginas, en orden, ya convertidas en EstacionTrafico
+    assert [s.id for s in stations] == [str(i) for i in range(N_RECORDS)]
+    assert isinstance(stations[0], EstacionTrafico) and stations[7].intensidad == 21.0
+    assert pages == 5  # limit=20 del llamante se ignora: páginas de 100
+    print(f"✅ {len(stations)} tramos en {pages} páginas ({paged_s * 1000:.0f} ms)")
+
+    assert 1 < state["max_in_flight"] <= 3, state
+    print(f"✅ Concurrencia acotada: máximo {state['max_in_flight']} peticiones simultáneas")
+
+    assert [s.id for s in exported] == [s.id for s in stations]
+    assert len(fallback) == N_RECORDS and state["exports"] == 2
+    print("✅ /exports/json: mismo resultado en una petición y como alternativa fuera de la ventana")
+
+
+if __name__ == "__main__":
+    test()
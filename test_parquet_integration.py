@@ -6,26 +6,35 @@ import pandas as pd
 sys.path.append(os.getcwd())
 
 from utils.async_data_loader import AsyncDataLoader
+from utils.traffic_source import LazyTrafficSource
 
 def test():
     loader = AsyncDataLoader()
     parquet_path = os.path.join("data", "trafico_valencia.parquet")
     
     print(f"Testing loading from: {parquet_path}")
-    df = loader.load_traffic_parquet(parquet_path)
+    source = loader.load_traffic_parquet(parquet_path)
     
-    if df is not None:
-        print(f"✅ Loaded {len(df)} records")
-        print("Columns:", df.columns.tolist())
+    if source is not None:
+        print(f"✅ Opened {source.num_rows} records in {source.num_row_groups} row groups")
+        assert source.num_row_groups == len(source.months()), "Se esperaba un row group por mes"
         print("Sample data (2016-03):")
-        # El filtro exacto que el usuario pidió
-        march_data = df[df['FECHA'] == '2016-03']
+        # El filtro exacto que el usuario pidió (se empuja al parquet)
+        march_data = source.month('2016-03')
         print(march_data.head())
         print(f"Total for 2016-03: {len(march_data)} records")
+
+        # Comparar con la lectura completa del fichero
+        df = pd.read_parquet(parquet_path, engine='pyarrow')
+        expected = df[df['FECHA'] == '2016-03']
+        assert len(march_data) == len(expected), "El mes leído no coincide con el filtro completo"
+        assert source.month('2016-03') is march_data, "El segundo acceso debería salir de la caché"
+        assert source.month('1990-01').empty
+        print("✅ Predicate pushdown and month cache verified")
         
-        # Verificar que el lock funciona y get_traffic_data devuelve el df
-        df_cached = loader.get_traffic_data()
-        if df_cached is not None and isinstance(df_cached, pd.DataFrame):
+        # Verificar que el lock funciona y get_traffic_data devuelve la fuente
+        source_cached = loader.get_traffic_data()
+        if source_cached is not None and isinstance(source_cached, LazyTrafficSource):
             print("✅ Cache and thread-safe access verified")
     else:
         print("❌ Failed to load parquet")
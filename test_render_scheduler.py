@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from components.render_scheduler import RenderScheduler
+
+
+class PageStub:
+    """Página que solo registra las llamadas a update()."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def update(self, *controls):
+        with self.lock:
+            self.calls.append(controls)
+
+
+class ControlStub:
+    def __init__(self, parent):
+        self.parent = parent
+
+
+def test():
+    page = PageStub()
+    render = RenderScheduler(page, frame_ms=50)
+    panels = [ControlStub(page) for _ in range(3)]
+
+    # Ráfaga desde varios hilos dentro del mismo frame: un solo volcado
+    def burst(panel):
+        for _ in range(20):
+            render.request_update(panel)
+
+    threads = [threading.Thread(target=burst, args=(p,)) for p in panels]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(0.2)
+    assert render.stats['requested'] == 60, render.stats
+    assert render.stats['flushed'] == 1 and len(page.calls) == 1, render.stats
+    assert {id(c) for c in page.calls[0]} == {id(p) for p in panels}
+    print(f"✅ {render.stats['requested']} peticiones → {render.stats['flushed']} page.update() "
+          f"con {len(page.calls[0])} controles")
+
+    # Peticiones continuas: como mucho un volcado por frame. Solo se acota por
+    # arriba con el tiempo realmente transcurrido (un equipo cargado hace menos)
+    start = time.monotonic()
+    while time.monotonic() - start < 0.5:
+        render.request_update(panels[0])
+        time.sleep(0.002)
+    time.sleep(0.1)
+    elapsed = time.monotonic() - start
+    flushes = len(page.calls) - 1
+    max_flushes = int(elapsed / render.frame_interval) + 1
+    assert 1 <= flushes <= max_flushes, (flushes, max_flushes)
+    print(f"✅ {elapsed:.2f} s de peticiones continuas → {flushes} volcados "
+          f"(máximo {max_flushes} con frame de 50 ms)")
+
+    # Sin controles, o con uno que aún no está en la página, se repinta la página entera
+    render.request_update(panels[1])
+    render.request_update(ControlStub(None))
+    assert render.flush() and page.calls[-1] == ()
+    render.request_update()
+    assert render.flush() and page.calls[-1] == ()
+    assert not render.flush()
+    print("✅ Diálogos y controles sin montar repintan la página completa")
+
+    render.close()
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+# Añadir el directorio raíz al path para importar utils
+sys.path.append(os.getcwd())
+
+from utils.spatial_index import GridIndex, contains, viewport_bounds
+
+
+def test():
+    rng = random.Random(7)
+    points = {f"P{i}": (39.3 + rng.random() * 0.3, -0.55 + rng.random() * 0.4) for i in range(5000)}
+    grid = GridIndex(0.02)
+    for key, (lat, lon) in points.items():
+        grid.insert(key, lat, lon)
+
+    # Mismo resultado que recorrer todos los puntos
+    for _ in range(50):
+        south, west = 39.3 + rng.random() * 0.2, -0.55 + rng.random() * 0.3
+        bounds = (south, west, south + rng.random() * 0.1, west + rng.random() * 0.1)
+        expected = {k for k, (lat, lon) in points.items()
+                    if bounds[0] <= lat <= bounds[2] and bounds[1] <= lon <= bounds[3]}
+        assert grid.query(bounds) == expected
+    grid.remove("P0")
+    grid.insert("P1", 0.0, 0.0)
+    assert "P0" not in grid.query((-90, -180, 90, 180)) and grid.point("P1") == (0.0, 0.0)
+    print(f"✅ GridIndex coincide con la búsqueda exhaustiva ({len(grid)} puntos)")
+
+    # Zoom 12 en Valencia con 1600x900 px: una tesela de 256 px abarca 360/4096 grados
+    view = viewport_bounds(39.4699, -0.3763, 12, 1600, 900)
+    assert abs((view[3] - view[1]) - 1600 / 256 * 360 / 2 ** 12) < 1e-9
+    assert view[0] < 39.4699 < view[2]
+    padded = viewport_bounds(39.4699, -0.3763, 12, 1600, 900, padding=0.5)
+    assert contains(padded, view) and not contains(view, padded)
+    print(f"✅ Viewport a zoom 12: {view[3] - view[1]:.3f}° x {view[2] - view[0]:.3f}°")
+
+    # MapContainer: solo monta lo que cae en la zona consultada y la ajusta al desplazarse
+    from components.map_container import MapContainer
+    from config.performance import PERFORMANCE
+
+    # Sin agrupación: aquí solo se comprueba el recorte por viewport (ver test_marker_clusters.py)
+    PERFORMANCE["cluster_max_zoom"] = 0
+
+    class LayerStub:
+        markers = []
+
+    container = MapContainer()
+    layer = LayerStub()
+    container.marker_layer_ref.current = layer
+    container.current_layer = "Flujo Tráfico DGT"
+    specs = [container._marker_spec(k, lat, lon, "#FF0000", None, {"info": {}}, None)
+             for k, (lat, lon) in points.items()]
+    container._apply_marker_specs("Flujo Tráfico DGT", specs)
+    container.update_visible_markers()
+    assert len(layer.markers) == len(points)  # A zoom 12 cabe toda el área
+
+    # Acercar a zoom 14 cambia de nivel: se desmontan los que quedan fuera
+    camera = SimpleNamespace(center=SimpleNamespace(latitude=39.45, longitude=-0.37), zoom=14)
+    container._on_position_change(SimpleNamespace(camera=camera))
+    first = list(layer.markers)
+    assert 0 < len(first) < len(points)
+
+    # Pequeño desplazamiento dentro del margen: no cambia nada
+    camera.center.longitude = -0.371
+    container._on_position_change(SimpleNamespace(camera=camera))
+    assert layer.markers == first
+
+    # Fuera del margen: los que siguen dentro conservan su sitio y el resto entra al final
+    camera.center.longitude = -0.30
+    container._on_position_change(SimpleNamespace(camera=camera))
+    kept = [m for m in layer.markers if any(m is f for f in first)]
+    assert layer.markers[:len(kept)] == kept and 0 < len(kept) < len(first)
+    print(f"✅ Capa de {len(points)} marcadores: {len(first)} montados, "
+          f"{len(kept)} se mantienen al desplazarse y {len(layer.markers) - len(kept)} entran")
+
+
+if __name__ == "__main__":
+    test()
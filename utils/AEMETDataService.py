@@ -3,16 +3,32 @@ import json
 import time
 from typing import List, Optional, Dict
 
+from conditional_fetch import ConditionalFetcher
+
 
 class AEMETDataService:
     BASE_URL = "https://opendata.aemet.es/opendata"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, fetcher: Optional[ConditionalFetcher] = None):
         self.api_key = api_key
         self.headers = {
             'api_key': self.api_key,
             'cache-control': "no-cache"
         }
+        # Conditional requests on the data files: unchanged payloads come back
+        # as 304 and are served from the local store (see fetcher.stats['aemet'])
+        self.fetcher = fetcher or ConditionalFetcher()
+        self.session = requests.Session()
+
+    @staticmethod
+    def _parse_json(body: bytes):
+        """
+        Decodes a JSON body; AEMET serves the data files as ISO-8859-15.
+        """
+        try:
+            return json.loads(body)
+        except UnicodeDecodeError:
+            return json.loads(body.decode('iso-8859-15'))
 
     def _get_data_from_endpoint(self, endpoint: str) -> Optional[List[Dict]]:
         """
@@ -20,10 +36,12 @@ class AEMETDataService:
         """
         url = f"{self.BASE_URL}{endpoint}"
         try:
-            response = requests.get(url, headers=self.headers, timeout=15)
+            # The first call hands out a fresh single-use 'datos' URL every
+            # time, so it is never cached (a stored one would have expired)
+            response = self.session.get(url, headers=self.headers, timeout=15)
             response.raise_for_status()
 
-            res_json = response.json()
+            res_json = self._parse_json(response.content)
             if res_json.get('estado') != 200:
                 print(f"API Error ({res_json.get('estado')}): {
                       res_json.get('descripcion')}")
@@ -34,10 +52,11 @@ class AEMETDataService:
                 print("No data URL in response")
                 return None
 
-            # Second call to get the actual data
-            data_response = requests.get(data_url, timeout=15)
-            data_response.raise_for_status()
-            return data_response.json()
+            # Second call to get the actual data. The URL changes on every call,
+            # so the body and its validators are stored under the endpoint URL
+            body, _ = self.fetcher.get(data_url, feed="aemet", timeout=15,
+                                       session=self.session, cache_as=url)
+            return self._parse_json(body)
 
         except requests.RequestException as e:
             print(f"Request error: {e}")
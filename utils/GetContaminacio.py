@@ -1,8 +1,32 @@
-import requests
 import os
+import threading
 from typing import Optional
 
-PACKAGE_SEARCH_URL = "https://dadesobertes.gva.es/api/3/action/package_search"
+import requests
+
+from config.performance import PERFORMANCE
+from utils.ckan_downloader import CSV_DIR, PACKAGE_SEARCH_URL, CKANDownloader
+
+_downloader: Optional[CKANDownloader] = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader() -> CKANDownloader:
+    """
+    Devuelve el descargador CKAN compartido (sesión, catálogo de recursos y pool).
+
+    Returns:
+        Instancia única de CKANDownloader
+    """
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = CKANDownloader(
+                CSV_DIR,
+                max_workers=PERFORMANCE["ckan_download_workers"],
+                retries=PERFORMANCE["ckan_download_retries"],
+            )
+        return _downloader
 
 
 def get_download_url(ano: int, mes: int) -> Optional[str]:
@@ -17,26 +41,12 @@ def get_download_url(ano: int, mes: int) -> Optional[str]:
         URL de descarga del CSV o None si no se encuentra.
     """
     try:
-        url = f"{PACKAGE_SEARCH_URL}?q=title:contaminantes+title:atmosf%C3%A9ricos+title:ozono+AND+title:{ano}&rows=100"
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
-        if not data.get("success"):
-            print("⚠️ La API CKAN no devolvió success=true")
-            return None
-        
-        results = data.get("result", {}).get("results", [])
-        if not results:
-            print(f"⚠️ No se encontraron datos para el año {ano}")
-            return None
-        
-        resources = results[0].get("resources", [])
-        if mes - 1 >= len(resources):
+        # Un package_search por año; el resto de meses salen del catálogo en caché
+        resource = get_downloader().catalog.resource_for(ano, mes)
+        if resource is None:
             print(f"⚠️ No hay datos para el mes {mes}")
             return None
-        
-        return resources[mes - 1].get("url", "")
+        return resource["url"]
     
     except requests.RequestException as e:
         print(f"❌ Error al obtener URL de descarga: {e}")
@@ -48,7 +58,7 @@ def get_download_url(ano: int, mes: int) -> Optional[str]:
 
 def download_csv(url: str, output_filename: str) -> bool:
     """
-    Descarga el CSV desde la URL.
+    Descarga el CSV desde la URL (por trozos, reanudando un .part previo).
     
     Args:
         url: URL del CSV
@@ -57,25 +67,8 @@ def download_csv(url: str, output_filename: str) -> bool:
     Returns:
         True si se descargó correctamente, False en caso contrario.
     """
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        output_path = os.path.join("csv_contaminacion", output_filename)
-        os.makedirs("csv_contaminacion", exist_ok=True)
-        
-        with open(output_path, "wb") as f:
-            f.write(response.content)
-
-        print(f"✔ Archivo descargado: {output_path}")
-        return True
-    
-    except requests.RequestException as e:
-        print(f"❌ Error al descargar CSV: {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Error inesperado: {e}")
-        return False
+    output_path = os.path.join(CSV_DIR, output_filename)
+    return get_downloader().download_url(url, output_path)
 
 
 def get_historical_data(year: int, month: int) -> Optional[str]:
@@ -89,21 +82,13 @@ def get_historical_data(year: int, month: int) -> Optional[str]:
     Returns:
         Ruta del archivo descargado o None si falla.
     """
-    url = get_download_url(year, month)
-    if not url:
-        return None
-    
-    filename = f"contaminacion_{year}_{month:02d}.csv"
-    if download_csv(url, filename):
-        return os.path.join("csv_contaminacion", filename)
-    
-    return None
+    return get_downloader().download(year, month)
 
 
 def main():
     """Función principal para testing."""
-    if not os.path.exists("csv_contaminacion"):
-        os.makedirs("csv_contaminacion")
+    if not os.path.exists(CSV_DIR):
+        os.makedirs(CSV_DIR)
         
     year = int(input("Ingrese el año (YYYY): "))
     month = int(input("Ingrese el mes (MM): "))
@@ -1,10 +1,37 @@
-import requests
+import httpx
 import datetime
+from dataclasses import dataclass
 from typing import List, Optional
 
+from utils.opendata_fetcher import fetch_all_records
+from utils.realtime_records import NAN, format_number, parse_number
+
+@dataclass(slots=True)
 class EstacionContaminacionAtmosferica:
-    direccion, no2, pm10, o3, fecha_carg, calidad_am = "-", "-", "-", "-", "-", "-"
-    geo_point_2d = None  # Coordenadas geográficas
+    """Estación de calidad del aire; NO2, PM10 y O3 en µg/m³ como float (NaN si faltan)."""
+
+    direccion: str = "-"
+    no2: float = NAN
+    pm10: float = NAN
+    o3: float = NAN
+    fecha_carg: str = "-"
+    calidad_am: str = "-"
+    geo_point_2d: Optional[dict] = None  # Coordenadas geográficas
+
+    @classmethod
+    def from_record(cls, record: dict) -> "EstacionContaminacionAtmosferica":
+        """Crea la estación a partir de un registro JSON de la API."""
+        get = record.get
+        # Argumentos posicionales, en el orden de los campos
+        return cls(
+            get("direccion") or "-",
+            parse_number(get("no2")),
+            parse_number(get("pm10")),
+            parse_number(get("o3")),
+            get("fecha_carg") or "-",
+            get("calidad_am") or "-",
+            get("geo_point_2d"),  # {lat: X, lon: Y}
+        )
     
     def imprimir_informacion(self):
         print(f"📍 {self.direccion}")
@@ -26,7 +53,27 @@ class EstacionContaminacionAtmosferica:
             return fecha
         
     def format_value(self, value) -> str:
-        return str(value) if value is not None else "-"
+        return format_number(value)
+
+AIR_QUALITY_URL = "https://valencia.opendatasoft.com/api/explore/v2.1/catalog/datasets/estacions-contaminacio-atmosferiques-estaciones-contaminacion-atmosfericas/records"
+
+# Sin "limit": opendata_fetcher pagina hasta total_count
+AIR_QUALITY_PARAMS = {
+    "select": "direccion,no2,pm10,o3,fecha_carg,calidad_am,geo_point_2d"
+}
+
+def parse_air_quality_payload(data: dict) -> List[EstacionContaminacionAtmosferica]:
+    """
+    Convierte la respuesta JSON de la API en objetos EstacionContaminacionAtmosferica.
+    
+    Args:
+        data: JSON de la API (con clave 'results')
+        
+    Returns:
+        Lista de objetos EstacionContaminacionAtmosferica.
+    """
+    return [EstacionContaminacionAtmosferica.from_record(record)
+            for record in data.get("results", [])]
 
 def get_air_quality_data() -> List[EstacionContaminacionAtmosferica]:
     """
@@ -36,29 +83,10 @@ def get_air_quality_data() -> List[EstacionContaminacionAtmosferica]:
         Lista de objetos EstacionContaminacionAtmosferica con datos de estaciones.
     """
     try:
-        URL = "https://valencia.opendatasoft.com/api/explore/v2.1/catalog/datasets/estacions-contaminacio-atmosferiques-estaciones-contaminacion-atmosfericas/records?select=direccion%2Cno2%2Cpm10%2Co3%2Cfecha_carg%2Ccalidad_am%2Cgeo_point_2d&limit=20"
-
-        response = requests.get(URL, timeout=15)
-        response.raise_for_status()
-        json_data = response.json().get("results", [])
-
-        lista_estaciones = []
-
-        for record in json_data:
-            estacion = EstacionContaminacionAtmosferica()
-            estacion.direccion = record.get("direccion", "-")
-            estacion.no2 = record.get("no2", "-")
-            estacion.pm10 = record.get("pm10", "-")
-            estacion.o3 = record.get("o3", "-")
-            estacion.fecha_carg = record.get("fecha_carg", "-")
-            estacion.calidad_am = record.get("calidad_am", "-")
-            estacion.geo_point_2d = record.get("geo_point_2d")  # {lat: X, lon: Y}
-
-            lista_estaciones.append(estacion)
-
-        return lista_estaciones
+        return fetch_all_records(AIR_QUALITY_URL, AIR_QUALITY_PARAMS,
+                                 parse=EstacionContaminacionAtmosferica.from_record, timeout=15)
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error al obtener datos de calidad del aire: {e}")
         return []
     except Exception as e:
@@ -2,74 +2,113 @@
 Script para obtener datos de tráfico en tiempo real de Valencia Open Data.
 """
 
-import requests
+import httpx
+from dataclasses import dataclass
 from typing import List, Optional
 
+from utils.opendata_fetcher import fetch_all_records
+from utils.realtime_records import NAN, EstadoTrafico, format_number, parse_number
 
+
+@dataclass(slots=True)
 class EstacionTrafico:
-    """Clase para representar una estación de tráfico."""
-    
-    def __init__(self, data: dict):
-        self.id = data.get("idtramo", "")
-        self.denominacion = data.get("denominacion", "")
-        self.estado = data.get("estado", "")
-        self.intensidad = data.get("intensidad", "-")
-        self.ocupacion = data.get("ocupacion", "-")
-        self.carga = data.get("carga", "-")
-        self.velocidad = data.get("velocidad", "-")
-        
-        # Coordenadas GPS
-        geo = data.get("geo_point_2d", {})
-        if isinstance(geo, dict):
-            self.geo_point_2d = geo
-        else:
-            self.geo_point_2d = None
+    """Estación (tramo) de tráfico; los valores numéricos ya vienen como float (NaN si faltan)."""
+
+    id: str = ""
+    denominacion: str = ""
+    estado: EstadoTrafico = EstadoTrafico.SIN_INFORMACION
+    intensidad: float = NAN
+    ocupacion: float = NAN
+    carga: float = NAN
+    velocidad: float = NAN
+    geo_point_2d: Optional[dict] = None  # Coordenadas GPS {lat, lon}
+
+    @classmethod
+    def from_record(cls, data: dict) -> "EstacionTrafico":
+        """Crea la estación a partir de un registro JSON de la API."""
+        get = data.get
+        idtramo = get("idtramo")
+        geo = get("geo_point_2d")
+        # Argumentos posicionales (en el orden de los campos): se crean cientos
+        # por refresco y por nombre el constructor cuesta casi el triple
+        return cls(
+            "" if idtramo is None else str(idtramo),
+            get("denominacion") or "",
+            EstadoTrafico.parse(get("estado")),
+            parse_number(get("intensidad")),
+            parse_number(get("ocupacion")),
+            parse_number(get("carga")),
+            parse_number(get("velocidad")),
+            geo if isinstance(geo, dict) else None,
+        )
     
     def imprimir_informacion(self):
         """Imprime la información de la estación de tráfico."""
         print(f"\n{'='*50}")
         print(f"ID: {self.id}")
         print(f"Ubicación: {self.denominacion}")
-        print(f"Estado: {self.estado}")
-        print(f"Intensidad: {self.intensidad} veh/h")
-        print(f"Ocupación: {self.ocupacion}%")
-        print(f"Carga: {self.carga}")
-        print(f"Velocidad: {self.velocidad} km/h")
+        print(f"Estado: {self.estado.name}")
+        print(f"Intensidad: {format_number(self.intensidad)} veh/h")
+        print(f"Ocupación: {format_number(self.ocupacion)}%")
+        print(f"Carga: {format_number(self.carga)}")
+        print(f"Velocidad: {format_number(self.velocidad)} km/h")
         if self.geo_point_2d:
             print(f"Coordenadas: {self.geo_point_2d.get('lat')}, {self.geo_point_2d.get('lon')}")
         print(f"{'='*50}")
 
 
+# Descripción y color sugerido de cada código de estado
+ESTADOS_TRAFICO = {
+    EstadoTrafico.FLUIDO: ("Fluido", "green"),
+    EstadoTrafico.DENSO: ("Denso", "yellow"),
+    EstadoTrafico.CONGESTIONADO: ("Congestionado", "red"),
+    EstadoTrafico.CORTADO: ("Cortado", "red"),
+    EstadoTrafico.SIN_DATOS: ("Sin datos", "gray"),
+    EstadoTrafico.PASO_INFERIOR_FLUIDO: ("Paso inferior fluido", "green"),
+    EstadoTrafico.PASO_INFERIOR_DENSO: ("Paso inferior denso", "yellow"),
+    EstadoTrafico.PASO_INFERIOR_CONGESTIONADO: ("Paso inferior congestionado", "red"),
+    EstadoTrafico.PASO_INFERIOR_CORTADO: ("Paso inferior cortado", "red"),
+    EstadoTrafico.PASO_INFERIOR_SIN_DATOS: ("Sin datos (paso inferior)", "gray"),
+    EstadoTrafico.SIN_INFORMACION: ("Sin información", "gray"),
+}
+
+
 def get_estado_descripcion(codigo_estado):
     """
-    Traduce el código de estado numérico a descripción textual.
+    Traduce el código de estado a descripción textual.
     
     Args:
-        codigo_estado: Código numérico del estado (0-9)
+        codigo_estado: EstadoTrafico o código numérico del estado (0-9)
         
     Returns:
         Tupla (descripción, color_sugerido)
     """
-    estados = {
-        0: ("Fluido", "green"),
-        1: ("Denso", "yellow"),
-        2: ("Congestionado", "red"),
-        3: ("Cortado", "red"),
-        4: ("Sin datos", "gray"),
-        5: ("Paso inferior fluido", "green"),
-        6: ("Paso inferior denso", "yellow"),
-        7: ("Paso inferior congestionado", "red"),
-        8: ("Paso inferior cortado", "red"),
-        9: ("Sin datos (paso inferior)", "gray")
-    }
-    
-    try:
-        codigo = int(codigo_estado)
-        return estados.get(codigo, ("Desconocido", "gray"))
-    except (ValueError, TypeError):
-        return ("Sin información", "gray")
+    descripcion = ESTADOS_TRAFICO.get(codigo_estado)
+    if descripcion is None:
+        descripcion = ESTADOS_TRAFICO.get(EstadoTrafico.parse(codigo_estado), ("Desconocido", "gray"))
+    return descripcion
+
+
+TRAFFIC_URL = "https://valencia.opendatasoft.com/api/explore/v2.1/catalog/datasets/estat-transit-temps-real-estado-trafico-tiempo-real/records"
+
+# Sin "limit": opendata_fetcher pagina hasta total_count (~400 tramos)
+TRAFFIC_PARAMS = {
+    "timezone": "Europe/Madrid"
+}
 
 
+def parse_traffic_payload(data: dict) -> List[EstacionTrafico]:
+    """
+    Convierte la respuesta JSON de la API en objetos EstacionTrafico.
+    
+    Args:
+        data: JSON de la API (con clave 'results')
+        
+    Returns:
+        Lista de objetos EstacionTrafico.
+    """
+    return [EstacionTrafico.from_record(record) for record in data.get("results", [])]
+
 
 def get_traffic_data() -> List[EstacionTrafico]:
     """
@@ -78,27 +117,11 @@ def get_traffic_data() -> List[EstacionTrafico]:
     Returns:
         Lista de objetos EstacionTrafico con datos de tráfico.
     """
-    url = "https://valencia.opendatasoft.com/api/explore/v2.1/catalog/datasets/estat-transit-temps-real-estado-trafico-tiempo-real/records"
-    
-    params = {
-        "limit": 100,
-        "timezone": "Europe/Madrid"
-    }
-    
     try:
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
-        estaciones = []
-        
-        for record in data.get("results", []):
-            estacion = EstacionTrafico(record)
-            estaciones.append(estacion)
-        
-        return estaciones
+        return fetch_all_records(TRAFFIC_URL, TRAFFIC_PARAMS,
+                                 parse=EstacionTrafico.from_record, timeout=15)
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error al obtener datos de tráfico: {e}")
         return []
     except Exception as e:
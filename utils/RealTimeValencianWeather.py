@@ -1,58 +1,237 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Optional
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional
 
+from utils.realtime_records import NAN, format_number, parse_number
+
+@dataclass(slots=True)
 class Clima:
+    """Estación AVAMET; temperaturas, humedad, lluvia y viento como float (NaN si faltan)."""
+
+    estacion: str = ""
+    tmin: float = NAN
+    tmed: float = NAN
+    tmax: float = NAN
+    hr: float = NAN
+    prec: float = NAN
+    vmed: float = NAN
+    vdir: str = ""
+    vmax: float = NAN
+
+WEATHER_URL = "https://www.avamet.org/mx-meteoxarxa.php?territori=c15"
+
+# Tamaño de los trozos con los que se alimenta el parser incremental
+CHUNK_SIZE = 16 * 1024
+
+
+def _clima_from_cells(celdas: List[str]) -> Clima:
+    """Crea un Clima a partir de las 9 celdas de texto de una fila de 'tDades'."""
+    # Argumentos posicionales, en el orden de los campos
+    return Clima(
+        celdas[0],                 # estacion: nombre + barrio
+        parse_number(celdas[1]),   # tmin
+        parse_number(celdas[2]),   # tmed
+        parse_number(celdas[3]),   # tmax
+        parse_number(celdas[4]),   # hr
+        parse_number(celdas[5]),   # prec
+        parse_number(celdas[6]),   # vmed
+        celdas[7],                 # vdir
+        parse_number(celdas[8]),   # vmax
+    )
+
+
+class TablaDadesParser(HTMLParser):
+    """
+    Parser por eventos que solo atiende a la tabla 'tDades'.
+
+    Ignora todo hasta el <table class="tDades">, acumula el texto de cada <td>
+    y deja en self.filas un Clima por fila de 9 celdas. Al cerrar la tabla
+    marca self.terminado para que quien lo alimenta deje de leer.
+    """
+
     def __init__(self):
-        self.estacion = ""
-        self.tmin   = ""
-        self.tmed   = ""
-        self.tmax   = ""
-        self.hr     = ""
-        self.prec   = ""
-        self.vmed   = ""
-        self.vdir   = ""
-        self.vmax   = ""
+        super().__init__(convert_charrefs=True)
+        self.filas: List[Clima] = []
+        self.encontrada = False
+        self.terminado = False
+        self._profundidad = 0        # tablas abiertas dentro de 'tDades' (incluida)
+        self._celdas: Optional[List[str]] = None
+        self._texto: Optional[List[str]] = None
+        # El texto de un nodo puede llegar en varias llamadas a handle_data
+        # (p. ej. cortado entre dos trozos): se une al trozo anterior
+        self._seguido = False
+
+    def handle_starttag(self, tag, attrs):
+        self._seguido = False
+        if self.terminado:
+            return
+        if tag == "table":
+            if self._profundidad:
+                self._profundidad += 1
+            elif "tDades" in (dict(attrs).get("class") or "").split():
+                self.encontrada = True
+                self._profundidad = 1
+            return
+        if not self._profundidad:
+            return
+        if tag == "tr":
+            self._cerrar_fila()
+            self._celdas = []
+        elif tag == "td" and self._celdas is not None:
+            self._cerrar_celda()
+            self._texto = []
+
+    def handle_endtag(self, tag):
+        self._seguido = False
+        if not self._profundidad or self.terminado:
+            return
+        if tag == "td":
+            self._cerrar_celda()
+        elif tag == "tr":
+            self._cerrar_fila()
+        elif tag == "table":
+            self._profundidad -= 1
+            if not self._profundidad:
+                self._cerrar_fila()
+                self.terminado = True
+
+    def handle_data(self, data):
+        if self._texto is not None:
+            if self._seguido and self._texto:
+                self._texto[-1] += data
+            else:
+                self._texto.append(data)
+        self._seguido = True
+
+    def handle_comment(self, data):
+        self._seguido = False
+
+    def _cerrar_celda(self):
+        if self._texto is None:
+            return
+        # Igual que get_text(strip=True): cada trozo sin espacios, sin vacíos
+        trozos = [t.strip() for t in self._texto if t.strip()]
+        # La primera celda (nombre + barrio) se une con espacio, como get_text(" ")
+        sep = " " if not self._celdas else ""
+        self._celdas.append(sep.join(trozos))
+        self._texto = None
+
+    def _cerrar_fila(self):
+        if self._celdas is None:
+            return
+        self._cerrar_celda()
+        if len(self._celdas) == 9:          # saltar cabeceras o filas sin datos
+            self.filas.append(_clima_from_cells(self._celdas))
+        self._celdas = None
+
+
+def iter_weather_rows(chunks: Iterable[str], leidos: Optional[List[str]] = None) -> Iterator[Clima]:
+    """
+    Extrae en streaming las estaciones de la tabla 'tDades'.
+
+    Args:
+        chunks: Trozos de texto del HTML según van llegando
+        leidos: Lista opcional donde se guardan los trozos consumidos (para
+            poder reintentar con BeautifulSoup si la tabla no aparece)
+
+    Yields:
+        Un Clima por fila, en cuanto se cierra la fila; deja de leer en </table>
+    """
+    parser = TablaDadesParser()
+    for chunk in chunks:
+        if leidos is not None:
+            leidos.append(chunk)
+        parser.feed(chunk)
+        if parser.filas:
+            yield from parser.filas
+            parser.filas = []
+        if parser.terminado:
+            break
+    else:
+        parser.close()
+        yield from parser.filas
+
+
+def _trozos(html: str, size: int = CHUNK_SIZE) -> Iterator[str]:
+    for start in range(0, len(html), size):
+        yield html[start:start + size]
+
+
+def parse_weather_html_soup(html: str) -> List[Clima]:
+    """
+    Extrae las estaciones de la tabla 'tDades' construyendo el árbol completo.
+    
+    Args:
+        html: Página de AVAMET como texto
+        
+    Returns:
+        Lista de objetos Clima (vacía si no está la tabla).
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    tabla = soup.find("table", class_="tDades")
+    if not tabla:
+        print("⚠️ No se encontró la tabla con clase 'tDades'")
+        return []
+
+    filas = tabla.select("tr")
+    datos = []
+
+    for tr in filas:
+        celdas = tr.find_all("td")
+        if len(celdas) != 9:          # saltar cabeceras o filas sin datos
+            continue
+
+        datos.append(_clima_from_cells(
+            [celdas[0].get_text(" ", strip=True)] +
+            [celda.get_text(strip=True) for celda in celdas[1:]]
+        ))
+
+    return datos
+
+
+def parse_weather_html(html: str) -> List[Clima]:
+    """
+    Extrae las estaciones de la tabla 'tDades' del HTML de AVAMET.
+
+    Usa el parser por eventos (se detiene al cerrar la tabla); si no
+    encuentra filas, recurre a BeautifulSoup.
+    
+    Args:
+        html: Página de AVAMET como texto
+        
+    Returns:
+        Lista de objetos Clima (vacía si no está la tabla).
+    """
+    datos = list(iter_weather_rows(_trozos(html)))
+    return datos or parse_weather_html_soup(html)
+
 
 def get_weather_data() -> List[Clima]:
     """
     Obtiene datos meteorológicos en tiempo real de AVAMET.
+
+    La respuesta se procesa según llega y la descarga se corta al cerrar la
+    tabla 'tDades'.
     
     Returns:
         Lista de objetos Clima con datos de estaciones meteorológicas.
     """
     try:
-        url = "https://www.avamet.org/mx-meteoxarxa.php?territori=c15"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        tabla = soup.find("table", class_="tDades")
-        if not tabla:
-            print("⚠️ No se encontró la tabla con clase 'tDades'")
-            return []
-
-        filas = tabla.select("tr")
-        datos = []
-
-        for tr in filas:
-            celdas = tr.find_all("td")
-            if len(celdas) != 9:          # saltar cabeceras o filas sin datos
-                continue
-
-            c = Clima()
-            c.estacion = celdas[0].get_text(" ", strip=True)   # nombre + barrio
-            c.tmin     = celdas[1].get_text(strip=True)
-            c.tmed     = celdas[2].get_text(strip=True)
-            c.tmax     = celdas[3].get_text(strip=True)
-            c.hr       = celdas[4].get_text(strip=True)
-            c.prec     = celdas[5].get_text(strip=True)
-            c.vmed     = celdas[6].get_text(strip=True)
-            c.vdir     = celdas[7].get_text(strip=True)
-            c.vmax     = celdas[8].get_text(strip=True)
-            datos.append(c)
-
-        return datos
+        with requests.get(WEATHER_URL, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = "utf-8"
+
+            leidos: List[str] = []
+            chunks = response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True)
+            datos = list(iter_weather_rows(chunks, leidos))
+            if datos:
+                return datos
+
+        # Sin filas (estructura inesperada): árbol completo con BeautifulSoup
+        return parse_weather_html_soup("".join(leidos))
     
     except requests.RequestException as e:
         print(f"❌ Error al obtener datos meteorológicos: {e}")
@@ -70,7 +249,9 @@ def main():
         return
     
     for d in datos:
-        print(f"{d.estacion:60} Tmin: {d.tmin:>5} Tmed: {d.tmed:>5} Tmax: {d.tmax:>5} HR: {d.hr:>5} Prec: {d.prec:>5} Vmed: {d.vmed:>5} Vdir: {d.vdir:>5} Vmax: {d.vmax:>5}")
+        tmin, tmed, tmax, hr, prec, vmed, vmax = (
+            format_number(v) for v in (d.tmin, d.tmed, d.tmax, d.hr, d.prec, d.vmed, d.vmax))
+        print(f"{d.estacion:60} Tmin: {tmin:>5} Tmed: {tmed:>5} Tmax: {tmax:>5} HR: {hr:>5} Prec: {prec:>5} Vmed: {vmed:>5} Vdir: {d.vdir:>5} Vmax: {vmax:>5}")
         
         
 if __name__ == "__main__":
@@ -1,22 +1,32 @@
 """
 Módulo utils para Data Detective.
+
+Las funciones del data service se importan al primer acceso: los procesos
+spawn que solo necesitan utils.historical_pipeline no cargan httpx,
+requests ni los clientes de los feeds en tiempo real.
 """
 
-# Exportar funciones del data service
-from .data_service import (
-    get_cached_weather_data,
-    get_cached_air_quality_data,
-    get_cached_traffic_data,
-    get_latest_sensor_data,
-    clear_cache,
-    get_cache_info
-)
+import importlib
 
+# Exportar funciones del data service
 __all__ = [
     'get_cached_weather_data',
     'get_cached_air_quality_data',
     'get_cached_traffic_data',
     'get_latest_sensor_data',
     'clear_cache',
-    'get_cache_info'
+    'get_cache',
+    'get_cache_info',
+    'get_snapshot',
+    'on_data_refreshed',
+    'preload_realtime_data',
+    'refresh_feeds'
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        value = getattr(importlib.import_module('.data_service', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
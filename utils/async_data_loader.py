@@ -8,7 +8,8 @@ import json
 import os
 from typing import Callable, Optional, Dict, Any
 import traceback
-import pandas as pd
+
+from utils.traffic_source import LazyTrafficSource
 
 
 class AsyncDataLoader:
@@ -89,37 +90,39 @@ class AsyncDataLoader:
         
         return result
 
-    def load_traffic_parquet(self, parquet_path: str) -> Optional[pd.DataFrame]:
+    def load_traffic_parquet(self, parquet_path: str) -> Optional[LazyTrafficSource]:
         """
-        Carga datos históricos de tráfico desde un archivo parquet.
+        Abre el histórico de tráfico en parquet sin cargarlo en memoria.
+        Los meses se leen bajo demanda con LazyTrafficSource.month().
         
         Args:
             parquet_path: Ruta al archivo .parquet
             
         Returns:
-            DataFrame con los datos o None si hay error
+            LazyTrafficSource o None si hay error
         """
         try:
-            self._report_progress("Cargando datos históricos de tráfico (Parquet)...")
+            self._report_progress("Abriendo datos históricos de tráfico (Parquet)...")
             
             if not os.path.exists(parquet_path):
                 print(f"⚠️ Archivo parquet no encontrado: {parquet_path}")
                 return None
 
-            # Leer el archivo completo
-            df = pd.read_parquet(parquet_path, engine='pyarrow')
+            # Solo se leen el esquema y el footer; los datos se leen por mes
+            source = LazyTrafficSource(parquet_path)
             
-            success_msg = f"✅ Datos de tráfico cargados: {len(df)} registros"
+            success_msg = (f"✅ Datos de tráfico disponibles: {source.num_rows} registros "
+                           f"en {source.num_row_groups} row groups")
             print(success_msg)
             self._report_progress(success_msg)
             
             with self._lock:
-                self.traffic_data = df
+                self.traffic_data = source
             
-            return df
+            return source
 
         except Exception as e:
-            error_msg = f"❌ Error al cargar parquet de tráfico: {e}"
+            error_msg = f"❌ Error al abrir parquet de tráfico: {e}"
             print(error_msg)
             print(traceback.format_exc())
             with self._lock:
@@ -0,0 +1,219 @@
+"""
+Capa HTTP asíncrona para los tres feeds en tiempo real.
+
+Un único httpx.AsyncClient compartido (pool de conexiones y keep-alive) vive
+en un bucle de eventos propio en segundo plano, de modo que puede usarse
+desde código síncrono (data_service, splash de main.py) y reutiliza las
+conexiones entre arranque y refrescos. gather_feeds() descarga los feeds en
+paralelo: la latencia total queda acotada por el feed más lento.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from config.performance import PERFORMANCE
+from .RealTimeTrafficValencia import (TRAFFIC_URL, TRAFFIC_PARAMS, EstacionTrafico,
+                                      parse_traffic_payload)
+from .RealTimeAirValencia import (AIR_QUALITY_URL, AIR_QUALITY_PARAMS,
+                                  EstacionContaminacionAtmosferica, parse_air_quality_payload)
+from .RealTimeValencianWeather import (WEATHER_URL, CHUNK_SIZE, TablaDadesParser,
+                                       parse_weather_html, parse_weather_html_soup)
+from .conditional_fetch import ConditionalFetcher
+from .opendata_fetcher import OpenDataFetcher
+
+# Feeds disponibles: URL, parámetros, timeout (s), formato y función de parseo.
+# Los feeds "paginated" (OpenData) se descargan completos página a página,
+# convirtiendo cada registro con "parse_record", y cada página se pide con
+# ETag/If-Modified-Since ("conditional"); el
+# formato "html_stream" (AVAMET) se procesa según llega y se corta en </table>.
+FEEDS: Dict[str, Dict[str, Any]] = {
+    "traffic_data": {
+        "url": TRAFFIC_URL,
+        "params": TRAFFIC_PARAMS,
+        "timeout": 15,
+        "format": "json",
+        "conditional": True,
+        "paginated": True,
+        "parse_record": EstacionTrafico.from_record,
+        "parse": parse_traffic_payload,
+        "label": "tráfico",
+    },
+    "air_quality_data": {
+        "url": AIR_QUALITY_URL,
+        "params": AIR_QUALITY_PARAMS,
+        "timeout": 15,
+        "format": "json",
+        "conditional": True,
+        "paginated": True,
+        "parse_record": EstacionContaminacionAtmosferica.from_record,
+        "parse": parse_air_quality_payload,
+        "label": "calidad del aire",
+    },
+    "weather_data": {
+        "url": WEATHER_URL,
+        "params": None,
+        "timeout": 10,
+        "format": "html_stream",
+        "parse": parse_weather_html,
+        "label": "meteorología",
+    },
+}
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+# Validadores y últimos cuerpos de los feeds condicionales (persisten en disco).
+# Se abre al primer uso para que importar utils no cree el SQLite
+_http_cache: Optional[ConditionalFetcher] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> ConditionalFetcher:
+    """
+    Devuelve la caché HTTP condicional de los feeds, creándola la primera vez.
+
+    Returns:
+        ConditionalFetcher compartido respaldado por data/cache/http_cache.sqlite
+    """
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = ConditionalFetcher()
+        return _http_cache
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Arranca (una vez) el bucle de eventos en segundo plano."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever,
+                                      name="async-http", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Devuelve el cliente compartido (solo desde el bucle en segundo plano)."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5,
+                                keepalive_expiry=300),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def fetch_feed(name: str) -> Any:
+    """
+    Descarga y parsea un feed con el cliente compartido.
+
+    Args:
+        name: Clave del feed en FEEDS
+
+    Returns:
+        Lista de objetos del feed ([] si hay error)
+    """
+    feed = FEEDS[name]
+    try:
+        if feed["format"] == "html_stream":
+            return await _fetch_weather_stream(feed)
+        if feed.get("paginated"):
+            return await _fetch_opendata(name, feed)
+        if feed.get("conditional"):
+            # Un 304 devuelve el cuerpo guardado sin volver a descargarlo
+            body, _ = await get_http_cache().aget(_get_client(), feed["url"], feed=name,
+                                                  params=feed["params"], timeout=feed["timeout"])
+            payload = json.loads(body)
+        else:
+            response = await _get_client().get(
+                feed["url"], params=feed["params"], timeout=feed["timeout"])
+            response.raise_for_status()
+            payload = response.json() if feed["format"] == "json" else response.text
+        # El parseo (BeautifulSoup en AVAMET) no bloquea las otras descargas
+        return await asyncio.to_thread(feed["parse"], payload)
+    except httpx.HTTPError as e:
+        print(f"❌ Error al obtener datos de {feed['label']}: {e!r}")
+        return []
+    except Exception as e:
+        print(f"❌ Error inesperado en {feed['label']}: {e}")
+        return []
+
+
+async def _fetch_opendata(name: str, feed: Dict[str, Any]) -> Any:
+    """Descarga un dataset OpenData completo (páginas en paralelo o export)."""
+    fetcher = OpenDataFetcher(
+        _get_client(),
+        page_size=PERFORMANCE["opendata_page_size"],
+        max_concurrency=PERFORMANCE["opendata_max_concurrency"],
+        http_cache=get_http_cache() if feed.get("conditional") else None,
+        feed=name,
+    )
+    if PERFORMANCE["opendata_bulk_export"]:
+        return await fetcher.fetch_export(feed["url"], feed["params"], feed["parse_record"],
+                                          timeout=feed["timeout"] * 4)
+    return await fetcher.fetch_records(feed["url"], feed["params"], feed["parse_record"],
+                                       timeout=feed["timeout"])
+
+
+async def _fetch_weather_stream(feed: Dict[str, Any]) -> Any:
+    """Descarga AVAMET en streaming, alimentando el parser de 'tDades' por trozos."""
+    parser = TablaDadesParser()
+    leidos = []
+    async with _get_client().stream("GET", feed["url"], params=feed["params"],
+                                    timeout=feed["timeout"]) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_text(CHUNK_SIZE):
+            leidos.append(chunk)
+            parser.feed(chunk)
+            if parser.terminado:
+                break
+    if parser.filas:
+        return parser.filas
+    # Sin filas (estructura inesperada): árbol completo con BeautifulSoup
+    return await asyncio.to_thread(parse_weather_html_soup, "".join(leidos))
+
+
+async def gather_feeds(names: Optional[Iterable[str]] = None,
+                       on_done: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Descarga varios feeds en paralelo.
+
+    Args:
+        names: Feeds a descargar (por defecto todos)
+        on_done: Callback(nombre, datos) al terminar cada feed
+
+    Returns:
+        Dict {nombre_feed: datos}
+    """
+    names = list(names) if names is not None else list(FEEDS)
+
+    async def run(name):
+        data = await fetch_feed(name)
+        if on_done:
+            on_done(name, data)
+        return name, data
+
+    results = await asyncio.gather(*(run(name) for name in names))
+    return dict(results)
+
+
+def fetch_feeds(names: Optional[Iterable[str]] = None,
+                on_done: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """Versión síncrona de gather_feeds (bloquea hasta que terminan todos)."""
+    future = asyncio.run_coroutine_threadsafe(gather_feeds(names, on_done), _get_loop())
+    return future.result()
+
+
+def fetch_feed_sync(name: str) -> Any:
+    """Versión síncrona de fetch_feed para un único feed."""
+    future = asyncio.run_coroutine_threadsafe(fetch_feed(name), _get_loop())
+    return future.result()
@@ -0,0 +1,386 @@
+"""
+Descarga masiva y reanudable de los CSV históricos de contaminación (CKAN GVA).
+
+Cada año es un paquete CKAN con un recurso (CSV) por mes. CKANCatalog hace un
+único package_search por año y guarda la lista de recursos en memoria y en
+data/cache/ckan_resources.json (solo los años cerrados, que ya no cambian).
+
+CKANDownloader escribe cada CSV por trozos en un fichero .part: si la descarga
+se corta, la siguiente continúa con una cabecera Range desde el último byte.
+Las descargas van por un pool de hilos con sesión HTTP compartida, se
+reintentan con espera exponencial y el tamaño final se comprueba contra
+Content-Length / Content-Range antes de renombrar el .part.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PACKAGE_SEARCH_URL = "https://dadesobertes.gva.es/api/3/action/package_search"
+PACKAGE_QUERY = "title:contaminantes title:atmosféricos title:ozono AND title:{year}"
+
+CSV_DIR = "csv_contaminacion"
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "data", "cache", "ckan_resources.json")
+
+# Estados que merece la pena reintentar (el servidor de la GVA devuelve 502/503 a ráfagas)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class DownloadError(Exception):
+    """Descarga incompleta o con un tamaño distinto del anunciado."""
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """Sesión requests con un pool de conexiones del tamaño del pool de hilos."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CKANCatalog:
+    """Recursos CSV de cada año, resueltos con un único package_search por año."""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 cache_path: Optional[str] = DEFAULT_CATALOG_PATH,
+                 search_url: str = PACKAGE_SEARCH_URL, timeout: float = 15):
+        """
+        Args:
+            session: Sesión requests compartida (opcional)
+            cache_path: JSON donde se guardan los recursos de los años cerrados
+                (None para no persistir)
+            search_url: Endpoint package_search de CKAN
+            timeout: Timeout de la búsqueda en segundos
+        """
+        self.session = session or requests.Session()
+        self.cache_path = cache_path
+        self.search_url = search_url
+        self.timeout = timeout
+        self.searches = 0
+
+        self._resources: Dict[int, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._year_locks: Dict[int, threading.Lock] = {}
+        self._load()
+
+    def _load(self):
+        """Carga los recursos guardados de ejecuciones anteriores."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self._resources = {int(year): resources for year, resources in stored.items()}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Catálogo CKAN en caché no válido, se ignora: {e}")
+
+    def _save(self):
+        """Persiste los años cerrados (el año en curso aún recibe meses nuevos)."""
+        if not self.cache_path:
+            return
+        current_year = datetime.now().year
+        with self._lock:
+            closed = {str(year): resources for year, resources in self._resources.items()
+                      if year < current_year and resources}
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(closed, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def resources(self, year: int) -> List[Dict[str, Any]]:
+        """
+        Devuelve los recursos (url, size...) del paquete de un año.
+
+        Los doce meses de un año comparten la búsqueda: el primer hilo que lo
+        pide hace la petición y el resto espera su resultado.
+
+        Args:
+            year: Año (YYYY)
+
+        Returns:
+            Lista de recursos en el orden del paquete ([] si no hay paquete)
+
+        Raises:
+            requests.RequestException: Si la búsqueda falla
+        """
+        with self._lock:
+            if year in self._resources:
+                return self._resources[year]
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+
+        with year_lock:
+            with self._lock:
+                if year in self._resources:
+                    return self._resources[year]
+
+            response = self.session.get(
+                self.search_url,
+                params={"q": PACKAGE_QUERY.format(year=year), "rows": 100},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            self.searches += 1
+
+            data = response.json()
+            if not data.get("success"):
+                print("⚠️ La API CKAN no devolvió success=true")
+                return []
+
+            results = data.get("result", {}).get("results", [])
+            if not results:
+                print(f"⚠️ No se encontraron datos para el año {year}")
+            resources = [{"url": r.get("url", ""), "size": r.get("size")}
+                         for r in (results[0].get("resources", []) if results else [])]
+
+            with self._lock:
+                self._resources[year] = resources
+            if resources:
+                self._save()
+            return resources
+
+    def resource_for(self, year: int, month: int) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve el recurso CSV de un mes (None si el paquete no lo tiene).
+
+        Args:
+            year: Año (YYYY)
+            month: Mes (1-12)
+        """
+        resources = self.resources(year)
+        if month - 1 >= len(resources) or not resources[month - 1].get("url"):
+            return None
+        return resources[month - 1]
+
+
+class CKANDownloader:
+    """Descarga concurrente y reanudable de los CSV mensuales de contaminación."""
+
+    def __init__(self, output_dir: str = CSV_DIR, catalog: Optional[CKANCatalog] = None,
+                 max_workers: int = 4, retries: int = 4, backoff: float = 0.5,
+                 chunk_size: int = CHUNK_SIZE, timeout: float = 30,
+                 session: Optional[requests.Session] = None):
+        """
+        Args:
+            output_dir: Carpeta de los CSV (contaminacion_YYYY_MM.csv)
+            catalog: Catálogo CKAN (se crea uno con la misma sesión si no se indica)
+            max_workers: Descargas simultáneas
+            retries: Reintentos por fichero tras el primer intento
+            backoff: Espera base en segundos (se duplica en cada reintento)
+            chunk_size: Bytes por trozo escrito en disco
+            timeout: Timeout de conexión/lectura en segundos
+            session: Sesión requests (por defecto una con pool de max_workers conexiones)
+        """
+        self.output_dir = output_dir
+        self.max_workers = max(1, max_workers)
+        self.session = session or make_session(self.max_workers)
+        self.catalog = catalog or CKANCatalog(self.session)
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"downloaded": 0, "skipped": 0, "resumed": 0, "retries": 0,
+                      "failed": 0, "bytes": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def path_for(self, year: int, month: int) -> str:
+        """Ruta local del CSV de un mes."""
+        return os.path.join(self.output_dir, f"contaminacion_{year}_{month:02d}.csv")
+
+    def download(self, year: int, month: int) -> Optional[str]:
+        """
+        Descarga el CSV de un mes (o lo reutiliza si ya está completo en disco).
+
+        Args:
+            year: Año (YYYY)
+            month: Mes (1-12)
+
+        Returns:
+            Ruta del CSV o None si no hay datos o la descarga falla
+        """
+        path = self.path_for(year, month)
+        if os.path.exists(path):
+            self._count("skipped")
+            return path
+
+        try:
+            resource = self._retrying(lambda: self.catalog.resource_for(year, month))
+        except requests.RequestException as e:
+            print(f"❌ Error al obtener URL de descarga {year}-{month:02d}: {e}")
+            self._count("failed")
+            return None
+        if resource is None:
+            return None
+
+        if self.download_url(resource["url"], path, expected_size=resource.get("size")):
+            return path
+        return None
+
+    def download_url(self, url: str, path: str, expected_size: Optional[int] = None) -> bool:
+        """
+        Descarga una URL a disco por trozos, con reanudación y reintentos.
+
+        Args:
+            url: URL del fichero
+            path: Ruta final (se escribe en path + '.part' y se renombra al terminar)
+            expected_size: Tamaño anunciado por CKAN; solo se usa si el servidor
+                no envía Content-Length
+
+        Returns:
+            True si el fichero quedó completo y con el tamaño esperado
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            self._retrying(lambda: self._fetch_to_part(url, path, expected_size))
+        except (requests.RequestException, DownloadError, OSError) as e:
+            print(f"❌ Error al descargar {os.path.basename(path)}: {e}")
+            self._count("failed")
+            return False
+
+        os.replace(path + ".part", path)
+        self._count("downloaded")
+        print(f"✔ Archivo descargado: {path}")
+        return True
+
+    def _retrying(self, operation: Callable[[], Any]) -> Any:
+        """Ejecuta operation con reintentos y espera exponencial con jitter."""
+        for attempt in range(self.retries + 1):
+            try:
+                return operation()
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, DownloadError) as e:
+                # Conexión cortada a media descarga: el .part guarda lo recibido
+                error, wait = e, None
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUS:
+                    raise
+                error = e
+                retry_after = e.response.headers.get("Retry-After", "")
+                wait = float(retry_after) if retry_after.isdigit() else None
+            if attempt == self.retries:
+                raise error
+            self._count("retries")
+            time.sleep(wait if wait is not None
+                       else self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def _fetch_to_part(self, url: str, path: str, expected_size: Optional[int]):
+        """Un intento de descarga: continúa el .part existente si lo hay."""
+        part_path = path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        # Sin compresión: los bytes en disco deben coincidir con Content-Length y Range
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # El .part ya tiene todo el fichero (o está corrupto): se valida abajo
+                total = _range_total(response.headers.get("Content-Range")) or _as_int(expected_size)
+                if total == offset:
+                    return
+                os.remove(part_path)
+                raise DownloadError(f"rango no satisfacible con {offset} bytes parciales")
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                total = _range_total(response.headers.get("Content-Range"))
+                self._count("resumed")
+                mode = "ab"
+            else:
+                # 200: el servidor ignora Range, se empieza de cero
+                total = _as_int(response.headers.get("Content-Length"))
+                offset, mode = 0, "wb"
+            if total is None:
+                total = _as_int(expected_size)
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+                    self._count("bytes", len(chunk))
+
+        size = os.path.getsize(part_path)
+        if total is not None and size != total:
+            # El .part se conserva: el siguiente intento pide solo lo que falta
+            raise DownloadError(f"{size} de {total} bytes")
+
+    def iter_downloads(self, months: Iterable[Tuple[int, int]]
+                       ) -> Iterator[Tuple[int, int, Optional[str]]]:
+        """
+        Descarga varios meses en el pool y los devuelve según van terminando.
+
+        Args:
+            months: Pares (año, mes)
+
+        Yields:
+            (año, mes, ruta o None)
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.download, year, month): (year, month)
+                       for year, month in months}
+            for future in as_completed(futures):
+                year, month = futures[future]
+                yield year, month, future.result()
+
+    def download_many(self, months: Iterable[Tuple[int, int]],
+                      on_done: Optional[Callable[[int, int, Optional[str]], None]] = None
+                      ) -> Dict[Tuple[int, int], Optional[str]]:
+        """
+        Descarga varios meses y devuelve sus rutas.
+
+        Args:
+            months: Pares (año, mes)
+            on_done: Callback(año, mes, ruta) al terminar cada mes
+
+        Returns:
+            Diccionario (año, mes) → ruta (None si falló o no hay datos)
+        """
+        results = {}
+        for year, month, path in self.iter_downloads(months):
+            results[(year, month)] = path
+            if on_done:
+                on_done(year, month, path)
+        return results
+
+
+def month_range(start_year: int, start_month: int,
+                end_year: int, end_month: int) -> List[Tuple[int, int]]:
+    """Pares (año, mes) entre dos meses, ambos incluidos."""
+    months = []
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        months.append((year, month))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return months
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _range_total(content_range: Optional[str]) -> Optional[int]:
+    """Tamaño total de una cabecera 'bytes 100-199/2000' (None si es '*')."""
+    if not content_range or "/" not in content_range:
+        return None
+    return _as_int(content_range.rsplit("/", 1)[1])
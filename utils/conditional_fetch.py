@@ -0,0 +1,234 @@
+"""
+Peticiones HTTP condicionales (ETag / Last-Modified) con cuerpo guardado.
+
+Por cada URL se guardan en SQLite los validadores que envía el servidor y el
+último cuerpo descargado. Las siguientes peticiones llevan If-None-Match /
+If-Modified-Since: si el servidor responde 304 Not Modified se devuelve el
+cuerpo guardado sin volver a descargarlo y se contabilizan los bytes ahorrados
+por feed. Las entradas que llevan más de max_age_s sin usarse y las que
+exceden max_entries (las menos recientes) se borran al guardar una nueva.
+
+Funciona tanto con requests (AEMETDataService, scripts síncronos) como con
+httpx.AsyncClient (utils/async_http.py). No usa imports relativos para que
+los scripts de utils/ puedan importarlo directamente.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "data", "cache", "http_cache.sqlite")
+# Límites de la caché: entradas sin usar durante 30 días o más allá de las 256 más recientes
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_AGE_S = 30 * 24 * 3600
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Clave de caché: URL con los parámetros de consulta ordenados."""
+    if not params:
+        return url
+    query = urlencode(sorted(params.items()), doseq=True)
+    return f"{url}{'&' if '?' in url else '?'}{query}"
+
+
+class ConditionalFetcher:
+    """Descarga URLs con validadores HTTP y trata el 304 como acierto de caché."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age_s: float = DEFAULT_MAX_AGE_S):
+        """
+        Args:
+            db_path: Ruta del fichero SQLite donde se guardan validadores y cuerpos
+            max_entries: Número máximo de URLs guardadas
+            max_age_s: Segundos sin usarse tras los que una URL se olvida
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        # Copia en memoria: clave → (etag, last_modified, cuerpo)
+        self._memory: Dict[str, Tuple[Optional[str], Optional[str], bytes]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "body BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión nueva (una por operación: seguro entre hilos)."""
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _load(self, key: str) -> Optional[Tuple[Optional[str], Optional[str], bytes]]:
+        """Devuelve (etag, last_modified, cuerpo) guardados para la clave."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT etag, last_modified, body FROM http_cache WHERE key = ?",
+                    (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Error leyendo caché HTTP: {e}")
+            return None
+        if row is None:
+            return None
+
+        entry = (row[0], row[1], bytes(row[2]))
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Cabeceras If-None-Match / If-Modified-Since para la clave (si las hay)."""
+        entry = self._load(key)
+        if entry is None:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _store(self, key: str, response_headers, body: bytes) -> None:
+        """Guarda cuerpo y validadores (solo si el servidor envía alguno)."""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        with self._lock:
+            self._memory[key] = (etag, last_modified, body)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO http_cache "
+                    "(key, etag, last_modified, body, stored_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, etag, last_modified, body, time.time()))
+                self._prune(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo guardar '{key}' en caché HTTP: {e}")
+
+    def _touch(self, key: str) -> None:
+        """Marca una entrada como usada ahora (un 304 la mantiene viva)."""
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE http_cache SET stored_at = ? WHERE key = ?",
+                             (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"⚠️ Error actualizando caché HTTP: {e}")
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Borra las entradas caducadas y las que exceden max_entries (de SQLite y memoria)."""
+        stale = [row[0] for row in conn.execute(
+            "SELECT key FROM http_cache WHERE stored_at < ? OR key NOT IN "
+            "(SELECT key FROM http_cache ORDER BY stored_at DESC LIMIT ?)",
+            (time.time() - self.max_age_s, self.max_entries))]
+        if not stale:
+            return
+        conn.executemany("DELETE FROM http_cache WHERE key = ?", [(key,) for key in stale])
+        with self._lock:
+            for key in stale:
+                self._memory.pop(key, None)
+
+    def _count(self, feed: str, **deltas: int) -> None:
+        with self._lock:
+            feed_stats = self.stats.setdefault(feed, {
+                'requests': 0,
+                'not_modified': 0,
+                'bytes_downloaded': 0,
+                'bytes_saved': 0,
+            })
+            for stat, delta in deltas.items():
+                feed_stats[stat] += delta
+
+    def _handle(self, feed: str, key: str, status_code: int,
+                response_headers, content: bytes) -> Tuple[bytes, str]:
+        """Resuelve la respuesta: 304 → cuerpo guardado, 200 → guardar y devolver."""
+        if status_code == 304:
+            entry = self._load(key)
+            if entry is not None:
+                body = entry[2]
+                self._touch(key)
+                self._count(feed, requests=1, not_modified=1, bytes_saved=len(body))
+                return body, 'hit'
+
+        self._count(feed, requests=1, bytes_downloaded=len(content))
+        self._store(key, response_headers, content)
+        return content, 'miss'
+
+    def get(self, url: str, feed: str = "default", params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: float = 15,
+            session: Any = None, cache_as: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Petición GET condicional síncrona (requests).
+
+        Args:
+            url: URL a descargar
+            feed: Nombre del feed para las estadísticas
+            params: Parámetros de consulta
+            headers: Cabeceras adicionales
+            timeout: Timeout en segundos
+            session: requests.Session opcional (por defecto el módulo requests)
+            cache_as: Clave con la que se guarda la respuesta (por defecto la URL con
+                sus parámetros); para URLs que cambian en cada petición aunque el
+                contenido sea el mismo
+
+        Returns:
+            (cuerpo, estado) con estado 'hit' (304) o 'miss' (descargado)
+
+        Raises:
+            requests.RequestException: Si la petición falla o el estado es de error
+        """
+        key = cache_as or cache_key(url, params)
+        request_headers = {**(headers or {}), **self.conditional_headers(key)}
+        response = (session or requests).get(url, params=params, headers=request_headers,
+                                             timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return self._handle(feed, key, response.status_code, response.headers, response.content)
+
+    async def aget(self, client, url: str, feed: str = "default",
+                   params: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None,
+                   timeout: float = 15) -> Tuple[bytes, str]:
+        """
+        Petición GET condicional asíncrona con un httpx.AsyncClient.
+
+        Returns:
+            (cuerpo, estado) con estado 'hit' (304) o 'miss' (descargado)
+
+        Raises:
+            httpx.HTTPError: Si la petición falla o el estado es de error
+        """
+        key = cache_key(url, params)
+        request_headers = {**(headers or {}), **self.conditional_headers(key)}
+        response = await client.get(url, params=params, headers=request_headers,
+                                    timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return self._handle(feed, key, response.status_code, response.headers, response.content)
+
+    def clear(self) -> None:
+        """Borra validadores y cuerpos guardados."""
+        with self._lock:
+            self._memory.clear()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM http_cache")
+        except sqlite3.Error as e:
+            print(f"⚠️ Error limpiando caché HTTP: {e}")
@@ -2,44 +2,64 @@
 Servicio centralizado para obtener datos de sensores y APIs externas.
 """
 
-import time
-from typing import List, Optional, Dict, Any
+import os
+import threading
+from typing import List, Optional, Dict, Any, Callable
 from datetime import datetime, timedelta
 
-from .RealTimeValencianWeather import get_weather_data, Clima
-from .RealTimeAirValencia import get_air_quality_data, EstacionContaminacionAtmosferica
+from .RealTimeValencianWeather import Clima
+from .RealTimeAirValencia import EstacionContaminacionAtmosferica
 from .GetContaminacio import get_historical_data
-from .RealTimeTrafficValencia import get_traffic_data, EstacionTrafico
+from .RealTimeTrafficValencia import EstacionTrafico
+from .persistent_cache import PersistentCache
+from .realtime_records import Snapshot
+from .async_http import FEEDS, fetch_feed_sync, fetch_feeds, get_http_cache
 
 
-class DataCache:
-    """Caché simple para evitar requests excesivos."""
-    
-    def __init__(self, ttl_seconds: int = 300):
-        self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, tuple[Any, float]] = {}
-    
-    def get(self, key: str) -> Optional[Any]:
-        """Obtiene un valor del caché si no ha expirado."""
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp < self.ttl_seconds:
-                return value
-            else:
-                del self._cache[key]
-        return None
-    
-    def set(self, key: str, value: Any) -> None:
-        """Guarda un valor en el caché."""
-        self._cache[key] = (value, time.time())
-    
-    def clear(self) -> None:
-        """Limpia todo el caché."""
-        self._cache.clear()
+CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                             "data", "cache", "realtime_cache.sqlite")
+
+# Caché global persistente con TTL de 5 minutos; al arrancar se sirven los
+# últimos datos guardados y se refrescan en segundo plano. Se abre al primer
+# uso: importar el módulo (p. ej. en los procesos spawn) no crea el SQLite
+_cache: Optional[PersistentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> PersistentCache:
+    """
+    Devuelve la caché persistente de los feeds en tiempo real, creándola la primera vez.
+
+    Returns:
+        PersistentCache compartida respaldada por CACHE_DB_PATH
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PersistentCache(CACHE_DB_PATH, ttl_seconds=300, stale_while_revalidate=True)
+        return _cache
+
+
+def _get_cached(key: str, fetch: Callable[[], Any], label: str) -> Any:
+    """
+    Obtiene datos de la caché persistente o de la API.
 
+    Args:
+        key: Clave de la caché
+        fetch: Función que descarga los datos frescos
+        label: Descripción para los mensajes de consola
 
-# Caché global con TTL de 5 minutos
-_cache = DataCache(ttl_seconds=300)
+    Returns:
+        Datos cacheados (posiblemente caducados mientras se refrescan) o frescos
+    """
+    data, status = get_cache().get_or_fetch(key, fetch)
+    if status == 'hit':
+        print(f"📦 Usando {label} en caché")
+    elif status == 'stale':
+        print(f"♻️ Usando {label} guardados, actualizando en segundo plano...")
+    else:
+        print(f"🌐 Obtenidos {label} frescos")
+    return data
 
 
 def get_cached_weather_data() -> List[Clima]:
@@ -49,16 +69,8 @@ def get_cached_weather_data() -> List[Clima]:
     Returns:
         Lista de objetos Clima con datos de estaciones meteorológicas.
     """
-    cached = _cache.get("weather_data")
-    if cached is not None:
-        print("📦 Usando datos meteorológicos en caché")
-        return cached
-    
-    print("🌐 Obteniendo datos meteorológicos frescos...")
-    data = get_weather_data()
-    if data:
-        _cache.set("weather_data", data)
-    return data
+    return _get_cached("weather_data", lambda: fetch_feed_sync("weather_data"),
+                       "datos meteorológicos")
 
 
 def get_cached_air_quality_data() -> List[EstacionContaminacionAtmosferica]:
@@ -68,16 +80,8 @@ def get_cached_air_quality_data() -> List[EstacionContaminacionAtmosferica]:
     Returns:
         Lista de objetos EstacionContaminacionAtmosferica.
     """
-    cached = _cache.get("air_quality_data")
-    if cached is not None:
-        print("📦 Usando datos de calidad del aire en caché")
-        return cached
-    
-    print("🌐 Obteniendo datos de calidad del aire frescos...")
-    data = get_air_quality_data()
-    if data:
-        _cache.set("air_quality_data", data)
-    return data
+    return _get_cached("air_quality_data", lambda: fetch_feed_sync("air_quality_data"),
+                       "datos de calidad del aire")
 
 
 def get_cached_traffic_data() -> List[EstacionTrafico]:
@@ -87,16 +91,118 @@ def get_cached_traffic_data() -> List[EstacionTrafico]:
     Returns:
         Lista de objetos EstacionTrafico.
     """
-    cached = _cache.get("traffic_data")
-    if cached is not None:
-        print("📦 Usando datos de tráfico en caché")
-        return cached
-    
-    print("🌐 Obteniendo datos de tráfico frescos...")
-    data = get_traffic_data()
-    if data:
-        _cache.set("traffic_data", data)
-    return data
+    return _get_cached("traffic_data", lambda: fetch_feed_sync("traffic_data"),
+                       "datos de tráfico")
+
+
+_FEED_GETTERS: Dict[str, Callable[[], Any]] = {
+    "weather_data": get_cached_weather_data,
+    "air_quality_data": get_cached_air_quality_data,
+    "traffic_data": get_cached_traffic_data,
+}
+
+# Último Snapshot de cada feed; se reconstruye solo cuando la caché entrega
+# una lista de registros nueva (una vez por ingesta)
+_snapshots: Dict[str, Snapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(key: str) -> Snapshot:
+    """
+    Vista columnar de los registros cacheados de un feed.
+
+    Las columnas ya construidas se conservan mientras el feed no se refresque.
+
+    Args:
+        key: weather_data, air_quality_data o traffic_data
+
+    Returns:
+        Snapshot de los registros actuales del feed
+    """
+    records = _FEED_GETTERS[key]()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None or snapshot.records is not records:
+            snapshot = _snapshots[key] = Snapshot(records or [])
+        return snapshot
+
+
+def preload_realtime_data(on_progress: Optional[Callable[[str, int, int], None]] = None
+                          ) -> Dict[str, Any]:
+    """
+    Carga los tres feeds en tiempo real para el arranque.
+
+    Las entradas frescas o caducadas de la caché se sirven al momento (las
+    caducadas se refrescan en segundo plano); solo los feeds sin datos se
+    descargan, todos a la vez con el cliente HTTP compartido.
+
+    Args:
+        on_progress: Callback(clave, completados, total) tras cada feed
+
+    Returns:
+        Dict {clave: datos} con weather_data, air_quality_data y traffic_data
+    """
+    results: Dict[str, Any] = {}
+    total = len(FEEDS)
+
+    def done(key: str, data: Any):
+        results[key] = data
+        if on_progress:
+            on_progress(key, len(results), total)
+
+    cache = get_cache()
+    missing = []
+    for key in FEEDS:
+        value, status = cache.lookup(key)
+        if status == 'miss':
+            missing.append(key)
+            continue
+        if status == 'hit':
+            cache.record('hits')
+        else:
+            cache.record('stale_hits')
+            cache.refresh_async(key, lambda key=key: fetch_feed_sync(key))
+        done(key, value)
+
+    if missing:
+        print(f"🌐 Descargando en paralelo: {', '.join(missing)}")
+        for key in missing:
+            cache.record('misses')
+
+        def store(key: str, data: Any):
+            if data:
+                cache.set(key, data)
+            done(key, data)
+
+        fetch_feeds(missing, on_done=store)
+
+    return results
+
+
+def refresh_feeds(keys: List[str]) -> Dict[str, Any]:
+    """
+    Descarga ya (en paralelo) los feeds indicados y actualiza la caché.
+
+    Args:
+        keys: Claves de los feeds (weather_data, air_quality_data, traffic_data)
+
+    Returns:
+        Dict {clave: datos} solo con los feeds que devolvieron datos
+    """
+    fresh = {key: data for key, data in fetch_feeds(keys).items() if data}
+    cache = get_cache()
+    for key, data in fresh.items():
+        cache.set(key, data)
+        cache.record('refreshes')
+    return fresh
+
+
+def on_data_refreshed(callback: Callable[[str, Any], None]) -> None:
+    """
+    Registra callback(clave, datos) para cuando una actualización en segundo
+    plano termina (claves: weather_data, air_quality_data, traffic_data).
+    """
+    get_cache().add_refresh_listener(callback)
 
 
 def get_latest_sensor_data() -> Dict[str, Any]:
@@ -116,7 +222,8 @@ def get_latest_sensor_data() -> Dict[str, Any]:
 
 def clear_cache() -> None:
     """Limpia el caché de datos."""
-    _cache.clear()
+    get_cache().clear()
+    get_http_cache().clear()
     print("🗑️ Caché limpiado")
 
 
@@ -125,10 +232,18 @@ def get_cache_info() -> Dict[str, Any]:
     Obtiene información sobre el estado del caché.
     
     Returns:
-        Diccionario con información del caché.
+        Diccionario con información del caché (claves, aciertos, fallos y antigüedad).
     """
+    cache = get_cache()
+    ages = cache.ages()
     return {
-        "ttl_seconds": _cache.ttl_seconds,
-        "cached_keys": list(_cache._cache.keys()),
-        "cache_size": len(_cache._cache)
+        "ttl_seconds": cache.ttl_seconds,
+        "stale_while_revalidate": cache.stale_while_revalidate,
+        "db_path": cache.db_path,
+        "cached_keys": list(ages.keys()),
+        "cache_size": len(ages),
+        "age_seconds": ages,
+        **cache.stats,
+        # Peticiones condicionales por feed (304 y bytes ahorrados)
+        "http": {feed: dict(stats) for feed, stats in get_http_cache().stats.items()},
     }
@@ -107,7 +107,7 @@ def show_download_dialog(page: ft.Page, csv_path: str, data_dir: str):
 
                 # Cargar la UI principal automáticamente
                 page.clean()
-                from main import DataDetectiveUI
+                from components import DataDetectiveUI
                 ui = DataDetectiveUI(page)
                 page.add(ui)
                 ui.right_panel.setup_event_handlers()
@@ -197,7 +197,7 @@ def show_generation_dialog(page: ft.Page, csv_path: str, data_dir: str):
 
                 # Cargar la UI principal automáticamente
                 page.clean()
-                from main import DataDetectiveUI
+                from components import DataDetectiveUI
                 ui = DataDetectiveUI(page)
                 page.add(ui)
                 ui.right_panel.setup_event_handlers()
@@ -1,23 +1,29 @@
 """
 Script para convertir valencia_pollution_consolidated.csv a formato JSON fragmentado.
-Genera un archivo JSON por año para búsquedas ultra-rápidas.
+Genera un archivo JSON por año (formato de exportación) y el almacén columnar
+pollution_store.parquet que usa la aplicación para búsquedas ultra-rápidas.
+Cada año se escribe en cuanto termina, sin cargar el CSV completo en memoria.
 """
 
 import csv
-import json
 import os
-from collections import defaultdict
-from datetime import datetime
 
+from utils.historical_pipeline import YearPartitionWriter, append_values
 
-def csv_to_json_fragmented():
-    """Convierte el CSV consolidado a archivos JSON fragmentados por año."""
+
+def csv_to_json_fragmented(csv_path=None, output_dir=None):
+    """
+    Convierte el CSV consolidado a archivos JSON fragmentados por año.
+
+    Args:
+        csv_path: CSV consolidado (por defecto valencia_pollution_consolidated.csv)
+        output_dir: Directorio de salida (por defecto data/pollution_historical)
+    """
 
     # Rutas
-    csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
-                            "valencia_pollution_consolidated.csv")
-    output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)),
-                              "data", "pollution_historical")
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    csv_path = csv_path or os.path.join(project_root, "valencia_pollution_consolidated.csv")
+    output_dir = output_dir or os.path.join(project_root, "data", "pollution_historical")
 
     # Crear directorio si no existe
     os.makedirs(output_dir, exist_ok=True)
@@ -28,24 +34,9 @@ def csv_to_json_fragmented():
         print(f"❌ Archivo CSV no encontrado: {csv_path}")
         return False
 
-    # Estructura: {año: {mes: {cod_estacion: {datos}}}}
-    years_data = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
-        'nombre': '',
-        'lat': '',
-        'lon': '',
-        'no2_values': [],
-        'o3_values': [],
-        'pm10_values': []
-    })))
-
-    # Metadata
-    metadata = {
-        'generated_at': datetime.now().isoformat(),
-        'total_records': 0,
-        'years': set(),
-        'year_month_ranges': {}
-    }
-
+    # Solo el año en curso vive en memoria: al cambiar de año se vuelca
+    # su JSON y sus row groups (el CSV consolidado está ordenado por fecha)
+    partitions = YearPartitionWriter(output_dir)
     record_count = 0
 
     try:
@@ -71,11 +62,8 @@ def csv_to_json_fragmented():
                 if not cod_estacion:
                     continue
 
-                # Agregar a metadata
-                metadata['years'].add(year)
-
                 # Inicializar sensor si no existe
-                sensor = years_data[year][month][cod_estacion]
+                sensor = partitions.sensor(year, month, cod_estacion)
 
                 if not sensor['nombre']:
                     sensor['nombre'] = row.get('NOM_ESTACION', '')
@@ -83,68 +71,12 @@ def csv_to_json_fragmented():
                     sensor['lon'] = row.get('LONGITUD', '')
 
                 # Agregar valores
-                no2 = row.get('NO2', '-')
-                if no2 and no2 != '-':
-                    try:
-                        sensor['no2_values'].append(float(no2))
-                    except ValueError:
-                        pass
-
-                o3 = row.get('O3', '-')
-                if o3 and o3 != '-':
-                    try:
-                        sensor['o3_values'].append(float(o3))
-                    except ValueError:
-                        pass
-
-                pm10 = row.get('PM10', '-')
-                if pm10 and pm10 != '-':
-                    try:
-                        sensor['pm10_values'].append(float(pm10))
-                    except ValueError:
-                        pass
+                append_values(sensor, row)
 
         print(f"✅ Procesados {record_count} registros")
-        print(f"📊 Años encontrados: {sorted(metadata['years'])}")
-
-        # Guardar cada año en un archivo separado
-        for year in sorted(metadata['years']):
-            year_file = os.path.join(output_dir, f"{year}.json")
-
-            # Convertir defaultdict a dict normal para JSON
-            year_structure = {
-                'year': year,
-                'months': {}
-            }
-
-            # Calcular rango de meses para este año
-            months_in_year = sorted(years_data[year].keys())
-            metadata['year_month_ranges'][str(year)] = {
-                'min': min(months_in_year),
-                'max': max(months_in_year)
-            }
-
-            for month in months_in_year:
-                year_structure['months'][str(month)] = dict(
-                    years_data[year][month])
-
-            # Guardar archivo JSON
-            with open(year_file, 'w', encoding='utf-8') as f:
-                json.dump(year_structure, f, ensure_ascii=False, indent=2)
-
-            month_count = len(year_structure['months'])
-            sensor_count = sum(len(sensors)
-                               for sensors in year_structure['months'].values())
-            print(f"  ✅ {year}.json creado: {
-                  month_count} meses, {sensor_count} sensores")
-
-        # Guardar metadata
-        metadata['total_records'] = record_count
-        metadata['years'] = sorted(list(metadata['years']))
-
-        metadata_file = os.path.join(output_dir, 'metadata.json')
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        # Último año, almacén columnar y metadata
+        metadata = partitions.close(total_records=record_count)
 
         print(f"\n✅ Conversión completada!")
         print(f"📁 Archivos generados en: {output_dir}")
@@ -154,6 +86,7 @@ def csv_to_json_fragmented():
         return True
 
     except Exception as e:
+        partitions.abort()
         print(f"❌ Error durante la conversión: {e}")
         import traceback
         traceback.print_exc()
@@ -0,0 +1,192 @@
+"""
+Conversión en streaming de los CSV de contaminación a JSON anuales + almacén.
+
+Los generadores construían un years_data con los 30 años completos antes de
+escribir nada. YearPartitionWriter mantiene en memoria solo el año en curso:
+cuando el año termina (o llega una fila del siguiente) escribe su {año}.json,
+añade sus meses como row groups al almacén Parquet y libera los valores
+diarios. El pico de memoria queda acotado por un año. Igual que el almacén,
+los JSON se escriben como {año}.json.tmp y solo se publican en close(): si la
+conversión se interrumpe, los ficheros anteriores siguen intactos.
+
+La entrada tiene que llegar ordenada por año (los CSV mensuales en orden
+cronológico o el CSV consolidado, que se escribe en ese orden).
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from utils.pollution_store import StoreWriter
+
+POLLUTANT_COLUMNS = [('NO2', 'no2_values'), ('O3', 'o3_values'), ('PM10', 'pm10_values')]
+
+
+def new_sensor() -> Dict[str, Any]:
+    """Sensor vacío con el formato del JSON anual."""
+    return {
+        'nombre': '',
+        'lat': '',
+        'lon': '',
+        'no2_values': [],
+        'o3_values': [],
+        'pm10_values': []
+    }
+
+
+def append_values(sensor: Dict[str, Any], row: Dict[str, str]):
+    """
+    Añade al sensor los valores NO2/O3/PM10 válidos de una fila del CSV.
+
+    Args:
+        sensor: Sensor con el formato del JSON anual
+        row: Fila de csv.DictReader ('-' o '' si falta el dato)
+    """
+    for column, key in POLLUTANT_COLUMNS:
+        value = (row.get(column) or '-').strip()
+        if value != '-':
+            try:
+                sensor[key].append(float(value))
+            except ValueError:
+                pass
+
+
+class YearPartitionWriter:
+    """Acumula un año de sensores y lo vuelca a disco en cuanto se completa."""
+
+    def __init__(self, output_dir: str, write_json: bool = True):
+        """
+        Args:
+            output_dir: Directorio de salida (normalmente data/pollution_historical)
+            write_json: Escribir también {año}.json (formato de exportación)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.write_json = write_json
+        self.store = StoreWriter(output_dir)
+
+        self.current_year: Optional[int] = None
+        self._months: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._finished = set()
+        # JSON anuales ya escritos como .tmp, pendientes de publicar en close()
+        self._pending_json = []
+        self.metadata = {
+            'generated_at': datetime.now().isoformat(),
+            'total_records': 0,
+            'years': [],
+            'year_month_ranges': {}
+        }
+
+    def _start_year(self, year: int):
+        if year == self.current_year:
+            return
+        if year in self._finished:
+            raise ValueError(f"El año {year} ya se volcó: la entrada debe venir ordenada por año")
+        if self.current_year is not None:
+            self.finish_year()
+        self.current_year = year
+
+    def sensor(self, year: int, month: int, cod: str) -> Dict[str, Any]:
+        """
+        Devuelve (creándolo si hace falta) el sensor de una estación en un mes.
+
+        Si el año cambia, el anterior se vuelca antes de continuar.
+
+        Args:
+            year: Año
+            month: Mes 1-12
+            cod: Código de estación
+        """
+        self._start_year(year)
+        sensors = self._months.setdefault(month, {})
+        sensor = sensors.get(cod)
+        if sensor is None:
+            sensor = sensors[cod] = new_sensor()
+        return sensor
+
+    def add_month(self, year: int, month: int, sensors: Dict[str, Dict[str, Any]]):
+        """
+        Añade un mes ya agregado (p. ej. el resultado de procesar un CSV mensual).
+
+        Args:
+            year: Año
+            month: Mes 1-12
+            sensors: Dict {cod_estacion: sensor}
+        """
+        self._start_year(year)
+        month_sensors = self._months.setdefault(month, {})
+        for cod, partial in sensors.items():
+            sensor = month_sensors.get(cod)
+            if sensor is None:
+                # El parcial pasa a ser del writer sin copiar sus listas
+                month_sensors[cod] = partial
+                continue
+            if not sensor['nombre']:
+                sensor['nombre'], sensor['lat'], sensor['lon'] = (
+                    partial['nombre'], partial['lat'], partial['lon'])
+            for _, key in POLLUTANT_COLUMNS:
+                sensor[key].extend(partial[key])
+
+    def finish_year(self):
+        """Escribe el año en curso (JSON + row groups) y libera su memoria."""
+        year, months = self.current_year, self._months
+        self.current_year, self._months = None, {}
+        if year is None:
+            return
+        self._finished.add(year)
+        months = {m: sensors for m, sensors in months.items() if sensors}
+        if not months:
+            return
+
+        for month in sorted(months):
+            self.store.write_month(year, month, months[month])
+
+        if self.write_json:
+            year_structure = {
+                'year': year,
+                'months': {str(month): months[month] for month in sorted(months)}
+            }
+            json_path = os.path.join(self.output_dir, f"{year}.json")
+            with open(json_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(year_structure, f, ensure_ascii=False, indent=2)
+            self._pending_json.append(json_path)
+
+        sensor_count = sum(len(sensors) for sensors in months.values())
+        self.metadata['years'].append(year)
+        self.metadata['year_month_ranges'][str(year)] = {'min': min(months), 'max': max(months)}
+        self.metadata['total_records'] += sensor_count
+        print(f"  ✅ {year} volcado: {len(months)} meses, {sensor_count} sensores")
+
+    def close(self, total_records: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Vuelca el último año, cierra el almacén y escribe metadata.json.
+
+        Args:
+            total_records: Total a guardar en metadata (por defecto, estaciones-mes)
+
+        Returns:
+            Metadata escrita
+        """
+        self.finish_year()
+        self.store.close()
+        for json_path in self._pending_json:
+            os.replace(json_path + ".tmp", json_path)
+        self._pending_json = []
+
+        self.metadata['years'] = sorted(self.metadata['years'])
+        if total_records is not None:
+            self.metadata['total_records'] = total_records
+        metadata_path = os.path.join(self.output_dir, 'metadata.json')
+        with open(metadata_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        return self.metadata
+
+    def abort(self):
+        """Descarta el almacén y los JSON a medio escribir (los anteriores quedan intactos)."""
+        self.store.abort()
+        for json_path in self._pending_json:
+            if os.path.exists(json_path + ".tmp"):
+                os.remove(json_path + ".tmp")
+        self._pending_json = []
@@ -0,0 +1,136 @@
+"""
+Agrupación de marcadores por nivel de zoom.
+
+Con cientos de ATAs de tráfico (o miles de puntos) el mapa se satura a escala
+de ciudad. ClusterIndex reparte los puntos en una rejilla de celdas de
+cell_px píxeles en la proyección Web Mercator de cada nivel de zoom; como el
+tamaño de la celda se divide por dos en cada nivel, las celdas forman un
+quadtree y cada clúster se parte en (como mucho) cuatro al acercar el mapa.
+Los arrays de cada nivel se calculan de una vez con numpy al crear el índice;
+los clústeres de un nivel se materializan la primera vez que se piden.
+"""
+
+import math
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from config.performance import PERFORMANCE
+from utils.spatial_index import MAX_LATITUDE, TILE_SIZE
+
+
+class Cluster(NamedTuple):
+    """Grupo de puntos de una celda (count == 1 es un punto suelto)."""
+    key: str              # "zoom/columna/fila" de la celda
+    lat: float            # Centroide de los puntos
+    lon: float
+    count: int
+    value: int            # Máximo de los valores de sus puntos (p. ej. tramo de IMD)
+    members: np.ndarray   # Posiciones de los puntos en los arrays de entrada
+
+
+def cluster_level(zoom: float, min_zoom: Optional[int] = None,
+                  max_zoom: Optional[int] = None) -> Optional[int]:
+    """
+    Nivel de agrupación que corresponde a un zoom del mapa.
+
+    Args:
+        zoom: Zoom actual (puede ser fraccionario)
+        min_zoom: Nivel más alejado precalculado (por defecto PERFORMANCE["cluster_min_zoom"])
+        max_zoom: Último nivel agrupado (por defecto PERFORMANCE["cluster_max_zoom"])
+
+    Returns:
+        Nivel entero o None si a ese zoom se muestran los puntos sin agrupar
+    """
+    if min_zoom is None:
+        min_zoom = PERFORMANCE["cluster_min_zoom"]
+    if max_zoom is None:
+        max_zoom = PERFORMANCE["cluster_max_zoom"]
+    level = math.floor(zoom + 0.5)
+    if level > max_zoom:
+        return None
+    return max(min_zoom, level)
+
+
+class ClusterIndex:
+    """Clústeres precalculados de un conjunto de puntos para cada nivel de zoom."""
+
+    def __init__(self, lats, lons, values=None, min_zoom: Optional[int] = None,
+                 max_zoom: Optional[int] = None, cell_px: Optional[int] = None):
+        """
+        Args:
+            lats: Latitudes de los puntos
+            lons: Longitudes de los puntos
+            values: Valor entero de cada punto que se agrega con el máximo (por defecto 0)
+            min_zoom: Nivel más alejado (por defecto PERFORMANCE["cluster_min_zoom"])
+            max_zoom: Último nivel agrupado (por defecto PERFORMANCE["cluster_max_zoom"])
+            cell_px: Lado de la celda en píxeles (por defecto PERFORMANCE["cluster_cell_px"])
+        """
+        self.min_zoom = PERFORMANCE["cluster_min_zoom"] if min_zoom is None else min_zoom
+        self.max_zoom = PERFORMANCE["cluster_max_zoom"] if max_zoom is None else max_zoom
+        self.cell_px = PERFORMANCE["cluster_cell_px"] if cell_px is None else cell_px
+
+        self._lats = np.asarray(lats, dtype=np.float64)
+        self._lons = np.asarray(lons, dtype=np.float64)
+        self._values = (np.zeros(len(self._lats), dtype=np.int64) if values is None
+                        else np.asarray(values, dtype=np.int64))
+
+        # Coordenadas Mercator normalizadas (0-1), comunes a todos los niveles
+        x = (self._lons + 180) / 360
+        sin = np.sin(np.radians(np.clip(self._lats, -MAX_LATITUDE, MAX_LATITUDE)))
+        y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)
+
+        self._levels = {}
+        self._clusters = {}
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            self._levels[zoom] = self._build_level(x, y, TILE_SIZE * 2 ** zoom / self.cell_px)
+
+    def _build_level(self, x, y, cells_per_unit):
+        """Celdas ocupadas de un nivel: (celdas, id de celda de cada punto, recuentos)."""
+        col = np.floor(x * cells_per_unit).astype(np.int64)
+        row = np.floor(y * cells_per_unit).astype(np.int64)
+        cells, inverse, counts = np.unique((col << 32) | row, return_inverse=True,
+                                           return_counts=True)
+        return cells, inverse.reshape(-1), counts
+
+    def level(self, zoom: float) -> Optional[int]:
+        """Nivel de este índice para un zoom del mapa (None: puntos sin agrupar)."""
+        return cluster_level(zoom, self.min_zoom, self.max_zoom)
+
+    def cluster_ids(self, level: int) -> np.ndarray:
+        """Posición en clusters(level) del clúster de cada punto."""
+        return self._levels[level][1]
+
+    def clusters(self, level: int) -> List[Cluster]:
+        """
+        Clústeres de un nivel, en orden de celda.
+
+        Args:
+            level: Nivel devuelto por level()
+
+        Returns:
+            Lista de Cluster
+        """
+        result = self._clusters.get(level)
+        if result is not None:
+            return result
+
+        cells, inverse, counts = self._levels[level]
+        lat = np.bincount(inverse, weights=self._lats, minlength=len(cells)) / counts
+        lon = np.bincount(inverse, weights=self._lons, minlength=len(cells)) / counts
+        value = np.full(len(cells), np.iinfo(np.int64).min)
+        np.maximum.at(value, inverse, self._values)
+        # Posiciones de los puntos ordenadas por clúster: cada clúster es un tramo
+        order = np.argsort(inverse, kind='stable')
+        ends = np.cumsum(counts).tolist()
+
+        result = [
+            Cluster(f"{level}/{cell >> 32}/{cell & 0xFFFFFFFF}", la, lo, n, v, order[end - n:end])
+            for cell, la, lo, n, v, end in zip(cells.tolist(), lat.tolist(), lon.tolist(),
+                                               counts.tolist(), value.tolist(), ends)
+        ]
+        self._clusters[level] = result
+        return result
+
+    def __len__(self) -> int:
+        return len(self._lats)
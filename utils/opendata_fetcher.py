@@ -0,0 +1,156 @@
+"""
+Descarga completa de datasets de Valencia OpenData (Explore API v2.1).
+
+El endpoint /records devuelve como mucho 100 registros por petición. Este
+módulo pide la primera página para conocer total_count y lanza el resto de
+offsets en paralelo (con un máximo de peticiones simultáneas); cada página se
+convierte a objetos de estación en cuanto llega. Como alternativa, el endpoint
+/exports/json devuelve el dataset entero en una sola respuesta.
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+# La Explore API limita limit a 100 y offset + limit a 10.000 en /records
+MAX_PAGE_SIZE = 100
+MAX_RECORDS_WINDOW = 10_000
+
+
+def export_url_for(records_url: str) -> str:
+    """Devuelve la URL /exports/json equivalente a una URL /records."""
+    base = records_url.split("?")[0].rstrip("/")
+    if base.endswith("/records"):
+        base = base[:-len("/records")]
+    return f"{base}/exports/json"
+
+
+class OpenDataFetcher:
+    """Descarga datasets paginados de OpenData con concurrencia acotada."""
+
+    def __init__(self, client: httpx.AsyncClient, page_size: int = MAX_PAGE_SIZE,
+                 max_concurrency: int = 4, http_cache: Any = None, feed: str = "opendata"):
+        """
+        Args:
+            client: Cliente httpx asíncrono (compartido, con pool de conexiones)
+            page_size: Registros por página (máximo 100)
+            max_concurrency: Peticiones de página simultáneas
+            http_cache: ConditionalFetcher opcional para peticiones condicionales
+            feed: Nombre del feed para las estadísticas de http_cache
+        """
+        self.client = client
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.max_concurrency = max(1, max_concurrency)
+        self.http_cache = http_cache
+        self.feed = feed
+        self.max_records_window = MAX_RECORDS_WINDOW
+
+    async def _get_json(self, url: str, params: Optional[Dict[str, Any]],
+                        timeout: float) -> Any:
+        """GET que devuelve JSON (condicional si hay http_cache)."""
+        if self.http_cache is not None:
+            body, _ = await self.http_cache.aget(self.client, url, feed=self.feed,
+                                                 params=params, timeout=timeout)
+            return json.loads(body)
+        response = await self.client.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_records(self, records_url: str, params: Optional[Dict[str, Any]] = None,
+                            parse: Optional[Callable[[dict], Any]] = None,
+                            timeout: float = 15) -> List[Any]:
+        """
+        Descarga todos los registros de un dataset página a página.
+
+        Args:
+            records_url: URL del endpoint /records del dataset
+            params: Parámetros de consulta (select, where, timezone...); limit y
+                offset los gestiona el fetcher
+            parse: Función registro → objeto (p. ej. EstacionTrafico.from_record)
+            timeout: Timeout por petición en segundos
+
+        Returns:
+            Lista de objetos (o de dicts si no hay parse) en el orden del dataset
+        """
+        base_params = {k: v for k, v in (params or {}).items() if k not in ("limit", "offset")}
+        convert = parse or (lambda record: record)
+
+        first = await self._get_json(
+            records_url, {**base_params, "limit": self.page_size, "offset": 0}, timeout)
+        total = int(first.get("total_count") or 0)
+
+        if total > self.max_records_window:
+            # Fuera de la ventana de /records: el export no tiene ese límite
+            print(f"ℹ️ {total} registros superan la ventana de /records, usando /exports/json")
+            return await self.fetch_export(records_url, params=base_params, parse=parse,
+                                           timeout=timeout * 4)
+
+        offsets = list(range(self.page_size, total, self.page_size))
+        pages: List[List[Any]] = [[] for _ in range(len(offsets) + 1)]
+        pages[0] = [convert(record) for record in first.get("results", [])]
+        if not offsets:
+            return pages[0]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_page(index: int, offset: int):
+            async with semaphore:
+                page = await self._get_json(
+                    records_url, {**base_params, "limit": self.page_size, "offset": offset},
+                    timeout)
+            # Cada página se convierte en cuanto llega y su JSON se libera
+            pages[index] = [convert(record) for record in page.get("results", [])]
+
+        await asyncio.gather(*(fetch_page(i, offset) for i, offset in enumerate(offsets, 1)))
+        return [item for page in pages for item in page]
+
+    async def fetch_export(self, records_url: str, params: Optional[Dict[str, Any]] = None,
+                           parse: Optional[Callable[[dict], Any]] = None,
+                           timeout: float = 60) -> List[Any]:
+        """
+        Descarga el dataset completo en una sola petición a /exports/json.
+
+        Args:
+            records_url: URL /records del dataset (se deriva la de export)
+            params: Parámetros de consulta (select, where...)
+            parse: Función registro → objeto
+            timeout: Timeout de la petición en segundos
+
+        Returns:
+            Lista de objetos (o de dicts si no hay parse)
+        """
+        base_params = {k: v for k, v in (params or {}).items() if k not in ("limit", "offset")}
+        records = await self._get_json(export_url_for(records_url), base_params, timeout)
+        if parse is None:
+            return records
+        return [parse(record) for record in records]
+
+
+def fetch_all_records(records_url: str, params: Optional[Dict[str, Any]] = None,
+                      parse: Optional[Callable[[dict], Any]] = None,
+                      bulk_export: bool = False, timeout: float = 15,
+                      max_concurrency: int = 4) -> List[Any]:
+    """
+    Versión síncrona para scripts: descarga un dataset completo con un cliente temporal.
+
+    Args:
+        records_url: URL del endpoint /records
+        params: Parámetros de consulta
+        parse: Función registro → objeto
+        bulk_export: Usar /exports/json en vez de paginar
+        timeout: Timeout por petición en segundos
+        max_concurrency: Peticiones de página simultáneas
+
+    Returns:
+        Lista de objetos (o de dicts si no hay parse)
+    """
+    async def run():
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            fetcher = OpenDataFetcher(client, max_concurrency=max_concurrency)
+            if bulk_export:
+                return await fetcher.fetch_export(records_url, params, parse, timeout * 4)
+            return await fetcher.fetch_records(records_url, params, parse, timeout)
+
+    return asyncio.run(run())
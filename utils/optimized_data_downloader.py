@@ -1,16 +1,18 @@
 """
 Optimized data downloader that converts directly to JSON without intermediate CSV.
-Uses multithreading for faster processing.
+Downloads run in threads and CSV parsing in a process pool.
 """
 
 import csv
-import json
+import multiprocessing
 import os
-import time
+import queue
 import threading
-from datetime import datetime
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+from utils.historical_pipeline import POLLUTANT_COLUMNS, YearPartitionWriter, append_values, new_sensor
 
 # Coordenadas aproximadas de estaciones de Valencia
 STATION_COORDINATES = {
@@ -30,6 +32,15 @@ STATION_COORDINATES = {
 }
 
 
+# Palabras clave de las estaciones de Valencia en NOM_ESTACION
+VALENCIA_KEYWORDS = ['VALENCIA', 'VLC', 'PISTA', 'MOLÍ', 'POLITÈCNIC', 'VIVERS', 'FRANÇA', 'BULEVARD']
+
+VALENCIA_PATTERN = '|'.join(VALENCIA_KEYWORDS)
+
+# Únicas columnas que se leen de los CSV mensuales de la GVA
+PARSE_COLUMNS = ['NOM_ESTACION', 'COD_ESTACION', 'FECHA', 'NO2', 'O3', 'PM10']
+
+
 def get_station_coords(station_name):
     """Obtiene coordenadas para una estación basándose en su nombre."""
     name_upper = station_name.upper()
@@ -43,205 +54,258 @@ def get_station_coords(station_name):
     return {'lat': 39.4700, 'lon': -0.3700}
 
 
-def download_and_convert_to_json(progress_callback=None):
+def parse_month_csv(filepath):
     """
-    Descarga datos históricos y los convierte directamente a JSON.
+    Parsea un CSV mensual de la GVA en un resultado parcial propio.
+
+    No toca ningún estado compartido: cada hilo construye su diccionario y lo
+    devuelve para que un único agregador lo incorpore.
 
     Args:
-        progress_callback: Función callback(current, total, message) para actualizar progreso
+        filepath: Ruta del CSV mensual (separado por ';')
 
     Returns:
-        bool: True si fue exitoso, False en caso contrario
+        Dict {cod_estacion: sensor} con el formato del JSON anual
     """
-    from utils.GetContaminacio import get_historical_data
+    sensors = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter=';')
 
-    # Configuración
-    START_YEAR = 1994
-    START_MONTH = 4
-    END_YEAR = 2025
-    END_MONTH = 11
+        for row in reader:
+            # Filtrar solo Valencia
+            station_name = row.get('NOM_ESTACION', '').strip().upper()
+            if not any(kw in station_name for kw in VALENCIA_KEYWORDS):
+                continue
 
-    # Calcular total de meses
-    total_months = (END_YEAR - START_YEAR) * 12 + (END_MONTH - START_MONTH) + 1
-
-    # Estructura para almacenar datos por año
-    years_data = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
-        'nombre': '',
-        'lat': '',
-        'lon': '',
-        'no2_values': [],
-        'o3_values': [],
-        'pm10_values': []
-    })))
-
-    # Metadata
-    metadata = {
-        'generated_at': datetime.now().isoformat(),
-        'total_records': 0,
-        'years': set(),
-        'year_month_ranges': {}
-    }
-
-    # Lock para thread-safe operations
-    data_lock = threading.Lock()
-    downloaded_count = 0
-
-    def process_month(year, month):
-        """Descarga y procesa un mes específico."""
-        nonlocal downloaded_count
-
-        # Verificar si ya existe
-        expected_filename = f"contaminacion_{year}_{month:02d}.csv"
-        csv_dir = "csv_contaminacion"
-        filepath = os.path.join(csv_dir, expected_filename)
+            # Verificar si tiene datos relevantes
+            has_data = False
+            for pollutant in ['NO2', 'O3', 'PM10']:
+                value = row.get(pollutant, '').strip()
+                if value and value != '-':
+                    has_data = True
+                    break
 
-        try:
-            # Descargar si no existe
-            if not os.path.exists(filepath):
-                filepath = get_historical_data(year, month)
-                time.sleep(0.3)  # Pequeña pausa para no saturar el servidor
-
-            if not filepath or not os.path.exists(filepath):
-                return None
-
-            # Procesar el archivo CSV
-            month_records = 0
-            with open(filepath, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f, delimiter=';')
-
-                for row in reader:
-                    # Filtrar solo Valencia
-                    station_name = row.get('NOM_ESTACION', '').strip().upper()
-                    if not any(kw in station_name for kw in ['VALENCIA', 'VLC', 'PISTA', 'MOLÍ', 'POLITÈCNIC', 'VIVERS', 'FRANÇA', 'BULEVARD']):
-                        continue
-
-                    # Verificar si tiene datos relevantes
-                    has_data = False
-                    for pollutant in ['NO2', 'O3', 'PM10']:
-                        value = row.get(pollutant, '').strip()
-                        if value and value != '-':
-                            has_data = True
-                            break
-
-                    if not has_data:
-                        continue
-
-                    cod_estacion = row.get('COD_ESTACION', '').strip()
-                    if not cod_estacion:
-                        continue
-
-                    # Agregar a estructura de datos (thread-safe)
-                    with data_lock:
-                        sensor = years_data[year][month][cod_estacion]
-
-                        if not sensor['nombre']:
-                            station_name = row.get('NOM_ESTACION', '').strip()
-                            sensor['nombre'] = station_name
-
-                            # Obtener coordenadas basadas en el nombre
-                            coords = get_station_coords(station_name)
-                            sensor['lat'] = coords['lat']
-                            sensor['lon'] = coords['lon']
-
-                        # Agregar valores
-                        for pollutant, key in [('NO2', 'no2_values'), ('O3', 'o3_values'), ('PM10', 'pm10_values')]:
-                            value = row.get(pollutant, '-').strip()
-                            if value and value != '-':
-                                try:
-                                    sensor[key].append(float(value))
-                                except ValueError:
-                                    pass
-
-                        metadata['years'].add(year)
-                        month_records += 1
-
-            # Actualizar progreso
-            with data_lock:
-                downloaded_count += 1
-                if progress_callback:
-                    progress_callback(downloaded_count, total_months, f"Procesado {
-                                      year}-{month:02d}")
+            if not has_data:
+                continue
 
-            return month_records
+            cod_estacion = row.get('COD_ESTACION', '').strip()
+            if not cod_estacion:
+                continue
 
-        except Exception as e:
-            print(f"Error procesando {year}-{month:02d}: {e}")
-            with data_lock:
-                downloaded_count += 1
-                if progress_callback:
-                    progress_callback(downloaded_count, total_months, f"Error en {
-                                      year}-{month:02d}")
-            return None
+            sensor = sensors.get(cod_estacion)
+            if sensor is None:
+                sensor = sensors[cod_estacion] = new_sensor()
+                station_name = row.get('NOM_ESTACION', '').strip()
+                sensor['nombre'] = station_name
 
-    # Generar lista de meses a procesar
-    months_to_process = []
-    current_year = START_YEAR
-    current_month = START_MONTH
+                # Obtener coordenadas basadas en el nombre
+                coords = get_station_coords(station_name)
+                sensor['lat'] = coords['lat']
+                sensor['lon'] = coords['lon']
 
-    while current_year < END_YEAR or (current_year == END_YEAR and current_month <= END_MONTH):
-        months_to_process.append((current_year, current_month))
-        current_month += 1
-        if current_month > 12:
-            current_month = 1
-            current_year += 1
+            # Agregar valores
+            append_values(sensor, row)
 
-    print(f"📥 Procesando {len(months_to_process)} meses con multithreading...")
+    return sensors
 
-    # Procesar en paralelo con ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {executor.submit(process_month, year, month): (year, month)
-                   for year, month in months_to_process}
 
-        for future in as_completed(futures):
-            result = future.result()
-            # El progreso ya se actualiza dentro de process_month
+def parse_month_table(filepath):
+    """
+    Versión vectorizada de parse_month_csv con pandas.
 
-    print(f"\n✅ Descarga completada: {
-          downloaded_count}/{total_months} meses procesados")
+    Lee solo las seis columnas necesarias y filtra/convierte por columnas en
+    lugar de fila a fila; el resultado es idéntico al de parse_month_csv.
+    Es una función de módulo para poder ejecutarse en un pool de procesos.
 
-    # Guardar archivos JSON por año
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    output_dir = os.path.join(project_root, "data", "pollution_historical")
-    os.makedirs(output_dir, exist_ok=True)
+    Args:
+        filepath: Ruta del CSV mensual (separado por ';')
 
-    if progress_callback:
-        progress_callback(total_months, total_months,
-                          "💾 Guardando archivos JSON...")
+    Returns:
+        Dict {cod_estacion: sensor} con el formato del JSON anual
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(filepath, sep=';', encoding='utf-8', dtype=object,
+                     keep_default_na=False, usecols=lambda c: c in PARSE_COLUMNS)
+    if len(df) == 0:
+        return {}
+
+    def column(name):
+        if name not in df.columns:
+            return pd.Series('', index=df.index, dtype=object)
+        return df[name].fillna('').str.strip()
+
+    names = column('NOM_ESTACION')
+    cods = column('COD_ESTACION')
+    raw = [column(name) for name, _ in POLLUTANT_COLUMNS]
+
+    has_data = np.zeros(len(df), dtype=bool)
+    for values in raw:
+        has_data |= ((values != '') & (values != '-')).to_numpy()
+    mask = (names.str.upper().str.contains(VALENCIA_PATTERN, regex=True).to_numpy()
+            & has_data & (cods != '').to_numpy())
+    if not mask.any():
+        return {}
+
+    # Estaciones en el orden de su primera fila, como parse_month_csv
+    codes, uniques = pd.factorize(cods[mask])
+    first_rows = names[mask].to_numpy()
+    numbers = [pd.to_numeric(values[mask], errors='coerce').to_numpy(dtype=np.float64)
+               for values in raw]
+
+    sensors = {}
+    for i, cod in enumerate(uniques):
+        rows = codes == i
+        station_name = first_rows[np.argmax(rows)]
+        coords = get_station_coords(station_name)
+        sensor = {'nombre': station_name, 'lat': coords['lat'], 'lon': coords['lon']}
+        for (_, key), values in zip(POLLUTANT_COLUMNS, numbers):
+            station_values = values[rows]
+            sensor[key] = station_values[~np.isnan(station_values)].tolist()
+        sensors[cod] = sensor
+    return sensors
+
+
+def _parsed_month(filepath, future):
+    """Resultado de un mes: del pool de procesos o parseado aquí mismo."""
+    if filepath is None:
+        return None
+    if future is not None:
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # Sin procesos disponibles (p. ej. ejecutable empaquetado): en este hilo
+            pass
+    return parse_month_table(filepath)
+
+
+def download_and_convert_to_json(progress_callback=None, parse_workers=None):
+    """
+    Descarga datos históricos y los convierte directamente a JSON.
+
+    Las descargas van por el pool de hilos del descargador CKAN (E/S) y cada
+    CSV descargado pasa en cuanto llega a un pool de procesos que lo parsea
+    con parse_month_table, así el parseo no compite por el GIL. El hilo que
+    llama recoge los meses parseados, informa del progreso y los incorpora en
+    orden cronológico, volcando cada año en cuanto tiene todos sus meses.
 
-    for year in sorted(metadata['years']):
-        year_file = os.path.join(output_dir, f"{year}.json")
+    Args:
+        progress_callback: Función callback(current, total, message) para actualizar progreso
+        parse_workers: Procesos de parseo (por defecto PERFORMANCE['historical_parse_workers'];
+            1 = parsear en el hilo que llama, sin pool de procesos)
+
+    Returns:
+        bool: True si fue exitoso, False en caso contrario
+    """
+    from config.performance import PERFORMANCE
+    from utils.GetContaminacio import get_downloader
+    from utils.ckan_downloader import month_range
 
-        year_structure = {
-            'year': year,
-            'months': {}
-        }
+    # Sesión, catálogo CKAN (un package_search por año) y pool compartidos
+    downloader = get_downloader()
+    parse_workers = parse_workers or PERFORMANCE["historical_parse_workers"]
 
-        months_in_year = sorted(years_data[year].keys())
-        metadata['year_month_ranges'][str(year)] = {
-            'min': min(months_in_year) if months_in_year else 1,
-            'max': max(months_in_year) if months_in_year else 12
-        }
+    # Configuración
+    START_YEAR = 1994
+    START_MONTH = 4
+    END_YEAR = 2025
+    END_MONTH = 11
 
-        for month in months_in_year:
-            year_structure['months'][str(month)] = dict(
-                years_data[year][month])
+    # Generar lista de meses a procesar
+    months_to_process = month_range(START_YEAR, START_MONTH, END_YEAR, END_MONTH)
+    total_months = len(months_to_process)
 
-        with open(year_file, 'w', encoding='utf-8') as f:
-            json.dump(year_structure, f, ensure_ascii=False, indent=2)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output_dir = os.path.join(project_root, "data", "pollution_historical")
+    partitions = YearPartitionWriter(output_dir)
+
+    # Eventos (año, mes, ruta, future de parseo) de los meses ya descargados
+    events = queue.Queue()
+
+    def on_downloaded(year, month, filepath):
+        """Se ejecuta en el hilo de descargas: encola el parseo del mes."""
+        if not filepath or not os.path.exists(filepath):
+            events.put((year, month, None, None))
+        elif parse_pool is None:
+            events.put((year, month, filepath, None))
+        else:
+            try:
+                future = parse_pool.submit(parse_month_table, filepath)
+            except (BrokenProcessPool, RuntimeError):
+                # Pool roto (un proceso murió) o ya cerrado: se parsea en el hilo que llama
+                events.put((year, month, filepath, None))
+                return
+            future.add_done_callback(
+                lambda f, y=year, m=month, p=filepath: events.put((y, m, p, f)))
+
+    def run_downloads():
+        try:
+            # Reutiliza los CSV completos; el resto se descarga por trozos
+            # (reanudando el .part) con reintentos y espera exponencial
+            downloader.download_many(months_to_process, on_done=on_downloaded)
+        except Exception as e:
+            events.put(e)
+
+    print(f"📥 Procesando {total_months} meses: descargas con {downloader.max_workers} hilos, "
+          f"parseo con {parse_workers} procesos...")
+
+    # Meses terminados a la espera de que acaben los anteriores
+    pending = {}
+    next_index = 0
+    processed = 0
+
+    # spawn: el proceso principal tiene hilos (Flet, descargas) y fork no es seguro
+    pool_context = (ProcessPoolExecutor(max_workers=parse_workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+                    if parse_workers > 1 else nullcontext())
+    try:
+        with pool_context as parse_pool:
+            threading.Thread(target=run_downloads, daemon=True).start()
+
+            while processed < total_months:
+                event = events.get()
+                if isinstance(event, Exception):
+                    raise event
+                year, month, filepath, future = event
+                processed += 1
+                try:
+                    pending[(year, month)] = _parsed_month(filepath, future)
+                    message = f"Procesado {year}-{month:02d}"
+                except Exception as e:
+                    print(f"Error procesando {year}-{month:02d}: {e}")
+                    pending[(year, month)] = None
+                    message = f"Error en {year}-{month:02d}"
 
-        print(f"  ✅ {year}.json creado")
+                if progress_callback:
+                    progress_callback(processed, total_months, message)
+
+                # Incorporar en orden los meses contiguos ya terminados
+                while next_index < total_months and months_to_process[next_index] in pending:
+                    y, m = months_to_process[next_index]
+                    sensors = pending.pop((y, m))
+                    if sensors:
+                        partitions.add_month(y, m, sensors)
+                    next_index += 1
+                    # Último mes del año: JSON y row groups a disco
+                    if next_index == total_months or months_to_process[next_index][0] != y:
+                        partitions.finish_year()
+    except BaseException:
+        partitions.abort()
+        raise
+
+    print(f"\n✅ Descarga completada: {processed}/{total_months} meses procesados")
+    stats = downloader.stats
+    print(f"📦 CKAN: {downloader.catalog.searches} búsquedas, {stats['downloaded']} descargados, "
+          f"{stats['skipped']} ya en disco, {stats['resumed']} reanudados, "
+          f"{stats['retries']} reintentos, {stats['bytes'] / 1024 / 1024:.1f} MB")
 
-    # Guardar metadata
-    metadata['years'] = sorted(list(metadata['years']))
-    metadata['total_records'] = sum(
-        len(years_data[y][m])
-        for y in years_data
-        for m in years_data[y]
-    )
+    if progress_callback:
+        progress_callback(total_months, total_months,
+                          "💾 Guardando archivos JSON...")
 
-    metadata_file = os.path.join(output_dir, 'metadata.json')
-    with open(metadata_file, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    # Almacén columnar (lectura por mes sin parsear el año) y metadata
+    metadata = partitions.close()
 
     print(f"\n✅ Conversión completada!")
     print(f"📁 Archivos generados en: {output_dir}")
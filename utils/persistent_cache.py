@@ -0,0 +1,216 @@
+"""
+Caché persistente en disco (SQLite) para las respuestas de las APIs en tiempo real.
+
+Cada entrada guarda el valor serializado con pickle y la hora en que se obtuvo,
+de modo que sobrevive entre ejecuciones. Con stale-while-revalidate, una entrada
+caducada se devuelve al instante (la app pinta los últimos datos conocidos al
+arrancar) mientras se lanza una actualización en segundo plano.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class PersistentCache:
+    """Caché clave → valor respaldada por SQLite con TTL y stale-while-revalidate."""
+
+    def __init__(self, db_path: str, ttl_seconds: int = 300,
+                 stale_while_revalidate: bool = True,
+                 max_stale_seconds: int = 24 * 3600):
+        """
+        Args:
+            db_path: Ruta del fichero SQLite (se crea si no existe)
+            ttl_seconds: Segundos durante los que una entrada se considera fresca
+            stale_while_revalidate: Devolver entradas caducadas y refrescarlas en segundo plano
+            max_stale_seconds: Antigüedad máxima de una entrada caducada que aún se sirve
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale_seconds = max_stale_seconds
+
+        # Copia en memoria para no deserializar en cada acceso
+        self._memory: Dict[str, Tuple[Any, float]] = {}
+        self._refreshing: set = set()
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._lock = threading.Lock()
+
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+        }
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión nueva (una por operación: seguro entre hilos)."""
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _load(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Devuelve (valor, hora de guardado) desde memoria o disco, sin mirar el TTL."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Error leyendo caché persistente: {e}")
+            return None
+        if row is None:
+            return None
+
+        try:
+            entry = (pickle.loads(row[0]), row[1])
+        except Exception as e:
+            # Formato antiguo o clase cambiada: se trata como fallo de caché
+            print(f"⚠️ Entrada de caché '{key}' ilegible, se descarta: {e}")
+            return None
+
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtiene un valor si existe y no ha expirado."""
+        entry = self._load(key)
+        if entry is not None and time.time() - entry[1] < self.ttl_seconds:
+            return entry[0]
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Guarda un valor en memoria y en disco."""
+        stored_at = time.time()
+        with self._lock:
+            self._memory[key] = (value, stored_at)
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, blob, stored_at))
+        except Exception as e:
+            print(f"⚠️ No se pudo persistir '{key}' en caché: {e}")
+
+    def lookup(self, key: str) -> Tuple[Optional[Any], str]:
+        """
+        Consulta una entrada sin descargar nada (no cuenta en las estadísticas).
+
+        Returns:
+            (valor, estado) con estado 'hit', 'stale' o 'miss' (valor None)
+        """
+        entry = self._load(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl_seconds:
+                return value, 'hit'
+            if self.stale_while_revalidate and age < self.max_stale_seconds:
+                return value, 'stale'
+        return None, 'miss'
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Devuelve el valor de la caché o lo obtiene con fetch().
+
+        Args:
+            key: Clave de la entrada
+            fetch: Función que obtiene datos frescos (solo se guardan si no están vacíos)
+
+        Returns:
+            (valor, estado) con estado 'hit', 'stale' o 'miss'
+        """
+        value, status = self.lookup(key)
+        if status == 'hit':
+            self.record('hits')
+            return value, 'hit'
+        if status == 'stale':
+            self.record('stale_hits')
+            self.refresh_async(key, fetch)
+            return value, 'stale'
+
+        self.record('misses')
+        value = fetch()
+        if value:
+            self.set(key, value)
+        return value, 'miss'
+
+    def refresh_async(self, key: str, fetch: Callable[[], Any]) -> bool:
+        """
+        Lanza una actualización en segundo plano (una sola a la vez por clave).
+
+        Returns:
+            False si ya había una actualización en curso para la clave
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def worker():
+            try:
+                value = fetch()
+                if value:
+                    self.set(key, value)
+                    self.record('refreshes')
+                    self._notify(key, value)
+            except Exception as e:
+                print(f"⚠️ Error actualizando '{key}' en segundo plano: {e}")
+                self.record('refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
+        return True
+
+    def add_refresh_listener(self, callback: Callable[[str, Any], None]) -> None:
+        """Registra callback(clave, valor) que se llama al completar una actualización."""
+        self._listeners.append(callback)
+
+    def _notify(self, key: str, value: Any) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(key, value)
+            except Exception as e:
+                print(f"⚠️ Error en listener de caché: {e}")
+
+    def record(self, stat: str) -> None:
+        """Suma uno a una estadística (p. ej. 'hits' si el llamador sirve la entrada de lookup())."""
+        with self._lock:
+            self.stats[stat] += 1
+
+    def clear(self) -> None:
+        """Limpia la caché en memoria y en disco."""
+        with self._lock:
+            self._memory.clear()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache")
+        except sqlite3.Error as e:
+            print(f"⚠️ Error limpiando caché persistente: {e}")
+
+    def ages(self) -> Dict[str, float]:
+        """Devuelve la antigüedad en segundos de cada entrada guardada."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT key, stored_at FROM cache").fetchall()
+        except sqlite3.Error:
+            rows = []
+        now = time.time()
+        return {key: round(now - stored_at, 1) for key, stored_at in rows}
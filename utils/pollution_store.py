@@ -0,0 +1,385 @@
+"""
+Almacén columnar (Parquet) para el histórico de contaminación.
+
+Guarda una fila por estación y mes con los valores diarios como listas,
+ordenado por año → mes → estación y con un row group por mes. Así, consultar
+un mes solo descomprime su row group en lugar de parsear el JSON del año
+completo. Los JSON por año se siguen generando como formato de exportación.
+
+Junto al almacén se genera una tabla de agregados mensuales por estación
+(media, mínimo, máximo, recuento, p50 y p95 de cada contaminante) para que
+los resúmenes se sirvan sin recorrer los valores diarios.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_FILENAME = "pollution_store.parquet"
+AGGREGATES_FILENAME = "pollution_aggregates.parquet"
+
+POLLUTANTS = ['no2', 'o3', 'pm10']
+POLLUTANT_KEYS = [f"{p}_values" for p in POLLUTANTS]
+STATS = ['avg', 'min', 'max', 'count', 'p50', 'p95']
+
+STORE_SCHEMA = pa.schema([
+    ('year', pa.int16()),
+    ('month', pa.int8()),
+    ('cod', pa.string()),
+    ('nombre', pa.string()),
+    ('lat', pa.float64()),
+    ('lon', pa.float64()),
+    ('no2_values', pa.list_(pa.float64())),
+    ('o3_values', pa.list_(pa.float64())),
+    ('pm10_values', pa.list_(pa.float64())),
+])
+
+
+AGGREGATES_SCHEMA = pa.schema(
+    [
+        ('year', pa.int16()),
+        ('month', pa.int8()),
+        ('cod', pa.string()),
+        ('nombre', pa.string()),
+        ('lat', pa.float64()),
+        ('lon', pa.float64()),
+    ] + [
+        (f"{p}_{stat}", pa.int32() if stat == 'count' else pa.float64())
+        for p in POLLUTANTS for stat in STATS
+    ]
+)
+
+
+def summarize_values(values) -> Dict[str, Any]:
+    """
+    Calcula media, mínimo, máximo, recuento, p50 y p95 de una lista de valores.
+
+    Returns:
+        Dict {estadístico: valor}; todo None (recuento 0) si la lista está vacía
+    """
+    if not values:
+        return {stat: (0 if stat == 'count' else None) for stat in STATS}
+
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p95 = np.percentile(arr, [50, 95])
+    return {
+        'avg': float(arr.mean()),
+        'min': float(arr.min()),
+        'max': float(arr.max()),
+        'count': int(arr.size),
+        'p50': float(p50),
+        'p95': float(p95),
+    }
+
+
+def summarize_sensor(cod: str, sensor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resume un sensor (formato JSON con arrays diarios) en una fila plana.
+
+    Returns:
+        Dict con cod, nombre, lat, lon y {contaminante}_{estadístico}
+    """
+    summary = {
+        'cod': cod,
+        'nombre': sensor.get('nombre', ''),
+        'lat': sensor.get('lat', ''),
+        'lon': sensor.get('lon', ''),
+    }
+    for p in POLLUTANTS:
+        for stat, value in summarize_values(sensor.get(f"{p}_values")).items():
+            summary[f"{p}_{stat}"] = value
+    return summary
+
+
+def _to_float(value) -> Optional[float]:
+    """Convierte coordenadas ('' o número) a float o None."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _month_table(year: int, month: int, sensors: Dict[str, Dict[str, Any]]) -> pa.Table:
+    """Construye la tabla Arrow de un mes (una fila por estación)."""
+    cods = sorted(sensors.keys())
+    columns = {
+        'year': [year] * len(cods),
+        'month': [month] * len(cods),
+        'cod': cods,
+        'nombre': [sensors[c].get('nombre', '') for c in cods],
+        'lat': [_to_float(sensors[c].get('lat')) for c in cods],
+        'lon': [_to_float(sensors[c].get('lon')) for c in cods],
+    }
+    for key in POLLUTANT_KEYS:
+        columns[key] = [list(sensors[c].get(key, [])) for c in cods]
+    return pa.table(columns, schema=STORE_SCHEMA)
+
+
+def _aggregate_rows(year: int, month: int, sensors: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas de agregados (una por estación) de un mes."""
+    rows = []
+    for cod in sorted(sensors):
+        row = summarize_sensor(cod, sensors[cod])
+        row['year'] = int(year)
+        row['month'] = int(month)
+        row['lat'] = _to_float(row['lat'])
+        row['lon'] = _to_float(row['lon'])
+        rows.append(row)
+    return rows
+
+
+def _write_aggregate_rows(rows: List[Dict[str, Any]], output_dir: str) -> str:
+    aggregates_path = os.path.join(output_dir, AGGREGATES_FILENAME)
+    table = pa.Table.from_pylist(rows, schema=AGGREGATES_SCHEMA)
+    pq.write_table(table, aggregates_path, compression='zstd')
+    print(f"  ✅ {AGGREGATES_FILENAME} creado ({len(rows)} estaciones-mes)")
+    return aggregates_path
+
+
+class StoreWriter:
+    """
+    Escritura incremental del almacén: un row group por mes en cuanto se entrega.
+
+    Solo se retienen las filas de agregados (una por estación-mes), así que la
+    memoria no depende del número de años escritos. Los meses deben llegar en
+    orden cronológico.
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        Args:
+            output_dir: Directorio de salida (normalmente data/pollution_historical)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.store_path = os.path.join(output_dir, STORE_FILENAME)
+        self._tmp_path = self.store_path + ".tmp"
+        self._writer = pq.ParquetWriter(self._tmp_path, STORE_SCHEMA, compression='zstd')
+        self._aggregates: List[Dict[str, Any]] = []
+        self.months_written = 0
+
+    def write_month(self, year: int, month: int, sensors: Dict[str, Dict[str, Any]]):
+        """
+        Añade un mes al almacén y sus agregados.
+
+        Args:
+            year: Año
+            month: Mes 1-12
+            sensors: Dict {cod_estacion: sensor} con el formato del JSON anual
+        """
+        if not sensors:
+            return
+        # Un write_table por mes → un row group por mes
+        self._writer.write_table(_month_table(int(year), int(month), sensors))
+        self._aggregates.extend(_aggregate_rows(year, month, sensors))
+        self.months_written += 1
+
+    def close(self) -> str:
+        """Cierra el Parquet, lo publica y escribe la tabla de agregados."""
+        self._writer.close()
+        os.replace(self._tmp_path, self.store_path)
+        print(f"  ✅ {STORE_FILENAME} creado")
+        _write_aggregate_rows(self._aggregates, self.output_dir)
+        return self.store_path
+
+    def abort(self):
+        """Descarta el fichero temporal (el almacén anterior queda intacto)."""
+        self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_store(years_data: Dict[Any, Dict[Any, Dict[str, Dict[str, Any]]]],
+                output_dir: str) -> str:
+    """
+    Escribe el almacén columnar a partir de la estructura {año: {mes: {cod: sensor}}}.
+
+    Args:
+        years_data: Datos anidados tal y como los construyen los generadores JSON
+        output_dir: Directorio de salida (normalmente data/pollution_historical)
+
+    Returns:
+        Ruta del fichero Parquet generado
+    """
+    with StoreWriter(output_dir) as writer:
+        for year in sorted(years_data, key=int):
+            months = years_data[year]
+            for month in sorted(months, key=int):
+                writer.write_month(int(year), int(month), months[month])
+    return writer.store_path
+
+
+def write_aggregates(years_data: Dict[Any, Dict[Any, Dict[str, Dict[str, Any]]]],
+                     output_dir: str) -> str:
+    """
+    Escribe la tabla de agregados mensuales por estación.
+
+    Args:
+        years_data: Datos anidados {año: {mes: {cod: sensor}}}
+        output_dir: Directorio de salida
+
+    Returns:
+        Ruta del fichero Parquet de agregados
+    """
+    rows = []
+    for year in sorted(years_data, key=int):
+        months = years_data[year]
+        for month in sorted(months, key=int):
+            rows.extend(_aggregate_rows(int(year), int(month), months[month]))
+    return _write_aggregate_rows(rows, output_dir)
+
+
+def json_to_store(json_dir: str) -> Optional[str]:
+    """
+    Genera el almacén columnar a partir de los JSON anuales ya existentes.
+
+    Args:
+        json_dir: Directorio con los ficheros {año}.json
+
+    Returns:
+        Ruta del fichero Parquet generado o None si no hay JSON
+    """
+    years_data = {}
+    for filename in sorted(os.listdir(json_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext != ".json" or not name.isdigit():
+            continue
+        with open(os.path.join(json_dir, filename), 'r', encoding='utf-8') as f:
+            years_data[int(name)] = json.load(f).get('months', {})
+
+    if not years_data:
+        print(f"⚠️ No se encontraron JSON anuales en {json_dir}")
+        return None
+
+    return write_store(years_data, json_dir)
+
+
+class PollutionStore:
+    """Lector del almacén columnar con acceso directo al row group de cada mes."""
+
+    def __init__(self, base_path: str):
+        """
+        Args:
+            base_path: Directorio que contiene pollution_store.parquet
+        """
+        self.path = os.path.join(base_path, STORE_FILENAME)
+        self.aggregates_path = os.path.join(base_path, AGGREGATES_FILENAME)
+        self._file: Optional[pq.ParquetFile] = None
+        self._row_groups: Dict[Tuple[int, int], int] = {}
+        self._summaries: Optional[Dict[Tuple[int, int], List[Dict[str, Any]]]] = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """Indica si el almacén existe en disco."""
+        return self._file is not None or os.path.exists(self.path)
+
+    def has_aggregates(self) -> bool:
+        """Indica si la tabla de agregados mensuales existe en disco."""
+        return self._summaries is not None or os.path.exists(self.aggregates_path)
+
+    def _load_summaries(self) -> Dict[Tuple[int, int], List[Dict[str, Any]]]:
+        """Carga la tabla de agregados (pequeña) indexada por (año, mes)."""
+        if self._summaries is None:
+            summaries = {}
+            table = pq.read_table(self.aggregates_path)
+            for row in table.to_pylist():
+                key = (row.pop('year'), row.pop('month'))
+                if row['lat'] is None:
+                    row['lat'] = ''
+                if row['lon'] is None:
+                    row['lon'] = ''
+                summaries.setdefault(key, []).append(row)
+            self._summaries = summaries
+        return self._summaries
+
+    def month_summary(self, year, month) -> Optional[List[Dict[str, Any]]]:
+        """
+        Devuelve el resumen de cada estación en un mes sin tocar los valores diarios.
+
+        Args:
+            year: Año (int o str)
+            month: Mes 1-12 (int o str)
+
+        Returns:
+            Lista de dicts planos (ver summarize_sensor) o None si el mes no existe
+        """
+        with self._lock:
+            rows = self._load_summaries().get((int(year), int(month)))
+        if rows is None:
+            return None
+        return [dict(row) for row in rows]
+
+    def _open(self) -> pq.ParquetFile:
+        """Abre el fichero (memory-mapped) e indexa los row groups por (año, mes)."""
+        if self._file is None:
+            parquet_file = pq.ParquetFile(self.path, memory_map=True)
+            year_idx = parquet_file.schema_arrow.get_field_index('year')
+            month_idx = parquet_file.schema_arrow.get_field_index('month')
+
+            # Solo se leen las estadísticas del footer, no los datos
+            for i in range(parquet_file.metadata.num_row_groups):
+                rg = parquet_file.metadata.row_group(i)
+                year = rg.column(year_idx).statistics.min
+                month = rg.column(month_idx).statistics.min
+                self._row_groups[(int(year), int(month))] = i
+
+            self._file = parquet_file
+        return self._file
+
+    def months(self):
+        """Devuelve las claves (año, mes) disponibles en el almacén."""
+        with self._lock:
+            self._open()
+            return sorted(self._row_groups)
+
+    def read_month(self, year, month) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Lee los sensores de un mes con el mismo formato que el JSON anual.
+
+        Args:
+            year: Año (int o str)
+            month: Mes 1-12 (int o str)
+
+        Returns:
+            Dict {cod_estacion: sensor} o None si el mes no existe
+        """
+        key = (int(year), int(month))
+        with self._lock:
+            parquet_file = self._open()
+            rg_index = self._row_groups.get(key)
+            if rg_index is None:
+                return None
+            table = parquet_file.read_row_group(rg_index)
+
+        sensors = {}
+        for row in table.to_pylist():
+            sensors[row['cod']] = {
+                'nombre': row['nombre'],
+                'lat': row['lat'] if row['lat'] is not None else '',
+                'lon': row['lon'] if row['lon'] is not None else '',
+                'no2_values': row['no2_values'],
+                'o3_values': row['o3_values'],
+                'pm10_values': row['pm10_values'],
+            }
+        return sensors
+
+
+if __name__ == "__main__":
+    base = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                        "data", "pollution_historical")
+    print("🚀 Generando almacén columnar desde los JSON anuales\n")
+    json_to_store(base)
@@ -0,0 +1,142 @@
+"""
+Precarga especulativa de periodos vecinos al navegar por el histórico.
+
+Observa la dirección en la que el usuario recorre el MonthYearPicker y, en un
+pool de hilos, calienta los datos del siguiente mes/año en esa dirección
+(año de contaminación, mes de tráfico, registro AEMET). Cada cambio de periodo
+abre una nueva generación: las precargas pendientes de generaciones anteriores
+se cancelan y las que ya no son relevantes se descartan antes de ejecutarse.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _to_index(month: int, year: int) -> int:
+    """Convierte (mes, año) a un índice lineal de meses."""
+    return int(year) * 12 + int(month) - 1
+
+
+def _from_index(index: int) -> Tuple[int, int]:
+    """Convierte un índice lineal de meses a (mes, año)."""
+    return index % 12 + 1, index // 12
+
+
+class Prefetcher:
+    """Precargador en segundo plano guiado por la dirección de navegación."""
+
+    def __init__(self, max_workers: int = 2, lookahead: int = 1):
+        """
+        Args:
+            max_workers: Hilos del pool de precarga
+            lookahead: Cuántos meses/años por delante se precargan
+        """
+        self.lookahead = lookahead
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="prefetch")
+        self._month_warmers: List[Tuple[str, Callable[[int, int], Any]]] = []
+        self._year_warmers: List[Tuple[str, Callable[[int], Any]]] = []
+        self._pending: List[Future] = []
+        self._last_index: Optional[int] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.stats: Dict[str, int] = {
+            'scheduled': 0,
+            'completed': 0,
+            'cancelled': 0,
+            'stale': 0,
+            'errors': 0,
+        }
+
+    def register_month(self, name: str, warmer: Callable[[int, int], Any]):
+        """Registra una función warmer(mes, año) que calienta los datos de un mes."""
+        self._month_warmers.append((name, warmer))
+
+    def register_year(self, name: str, warmer: Callable[[int], Any]):
+        """Registra una función warmer(año) que calienta los datos de un año."""
+        self._year_warmers.append((name, warmer))
+
+    def notify(self, month, year,
+               limits: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None) -> int:
+        """
+        Informa del periodo seleccionado y programa la precarga de sus vecinos.
+
+        Args:
+            month: Mes seleccionado (1-12)
+            year: Año seleccionado
+            limits: ((mes_inicio, año_inicio), (mes_fin, año_fin)) válidos, opcional
+
+        Returns:
+            Dirección detectada: 1 (adelante), -1 (atrás) o 0 (sin historial)
+        """
+        index = _to_index(month, year)
+        direction = 0
+        if self._last_index is not None and index != self._last_index:
+            direction = 1 if index > self._last_index else -1
+        self._last_index = index
+
+        # Sin dirección conocida se precargan ambos lados
+        steps = [direction] if direction else [1, -1]
+
+        low = _to_index(*limits[0]) if limits else None
+        high = _to_index(*limits[1]) if limits else None
+
+        month_targets = []
+        year_targets = []
+        for step in steps:
+            for k in range(1, self.lookahead + 1):
+                target = index + step * k
+                if (low is None or target >= low) and (high is None or target <= high):
+                    month_targets.append(_from_index(target))
+
+                target_year = int(year) + step * k
+                if ((low is None or target_year >= low // 12) and
+                        (high is None or target_year <= high // 12)):
+                    year_targets.append(target_year)
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+            # Cancelar lo que aún no ha empezado de generaciones anteriores
+            for future in self._pending:
+                if future.cancel():
+                    self.stats['cancelled'] += 1
+            self._pending = []
+
+            for target_year in year_targets:
+                for name, warmer in self._year_warmers:
+                    self._submit(generation, name, warmer, target_year)
+            for target_month, target_year in month_targets:
+                for name, warmer in self._month_warmers:
+                    self._submit(generation, name, warmer, target_month, target_year)
+
+        return direction
+
+    def _submit(self, generation: int, name: str, warmer: Callable, *args):
+        """Encola una precarga (llamar con el lock tomado)."""
+        future = self._executor.submit(self._run, generation, name, warmer, *args)
+        self._pending.append(future)
+        self.stats['scheduled'] += 1
+
+    def _run(self, generation: int, name: str, warmer: Callable, *args):
+        """Ejecuta una precarga si su generación sigue vigente."""
+        if generation != self._generation:
+            with self._lock:
+                self.stats['stale'] += 1
+            return
+
+        try:
+            warmer(*args)
+            with self._lock:
+                self.stats['completed'] += 1
+        except Exception as e:
+            print(f"⚠️ Error en precarga '{name}' {args}: {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+
+    def shutdown(self):
+        """Cancela las precargas pendientes y cierra el pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,184 @@
+"""
+Utilidades comunes de los registros en tiempo real (AVAMET, calidad del aire, tráfico).
+
+Los valores numéricos se convierten a float una sola vez al ingerir cada feed
+(NaN si falta el dato), de modo que mapa y paneles ya no repiten float() dentro
+de try/except. Snapshot ofrece los mismos registros en columnas NumPy para los
+consumidores que recorren todo el feed (rankings, filtros por estado...).
+"""
+
+from dataclasses import fields
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+NAN = float("nan")
+
+
+def parse_number(value: Any) -> float:
+    """
+    Convierte un valor del feed a float.
+
+    Los feeds repiten mucho los mismos valores ('-', '0', '12,5'...), así que
+    cada conversión se memoriza: un valor ya visto cuesta una búsqueda en un dict.
+
+    Args:
+        value: Número, cadena ('12,5', '-', '') o None
+
+    Returns:
+        El valor como float, o NaN si no es numérico
+    """
+    try:
+        return _numbers[value]
+    except TypeError:  # Valor no hashable
+        return _to_float(value)
+
+
+def _to_float(value: Any) -> float:
+    """Conversión de parse_number sin memorizar."""
+    if value is None:
+        return NAN
+    if type(value) is str:
+        # Centinelas "-" / "" y decimales con coma (AVAMET)
+        if value in ("-", ""):
+            return NAN
+        if "," in value:
+            value = value.replace(",", ".")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+class _NumberCache(dict):
+    """Memo valor del feed → float; se vacía al llegar a max_size entradas."""
+
+    max_size = 4096
+
+    def __missing__(self, value: Any) -> float:
+        if len(self) >= self.max_size:
+            self.clear()
+        number = self[value] = _to_float(value)
+        return number
+
+
+_numbers = _NumberCache()
+
+
+def has_value(value: float) -> bool:
+    """True si el valor numérico existe (no es NaN)."""
+    return value == value  # NaN es el único valor distinto de sí mismo
+
+
+def format_number(value: float, decimals: int = 1) -> str:
+    """
+    Formatea un valor numérico para la interfaz.
+
+    Args:
+        value: Valor (NaN si falta)
+        decimals: Decimales máximos; los enteros se muestran sin decimales
+
+    Returns:
+        Texto del valor, o '-' si falta
+    """
+    if value != value:  # NaN
+        return "-"
+    if value.is_integer():
+        return str(int(value))
+    return f"{value:.{decimals}f}"
+
+
+class EstadoTrafico(IntEnum):
+    """Códigos de estado de los tramos de tráfico de Valencia OpenData."""
+
+    SIN_INFORMACION = -1      # Código ausente o no numérico
+    DESCONOCIDO = -2          # Código numérico fuera de la tabla
+    FLUIDO = 0
+    DENSO = 1
+    CONGESTIONADO = 2
+    CORTADO = 3
+    SIN_DATOS = 4
+    PASO_INFERIOR_FLUIDO = 5
+    PASO_INFERIOR_DENSO = 6
+    PASO_INFERIOR_CONGESTIONADO = 7
+    PASO_INFERIOR_CORTADO = 8
+    PASO_INFERIOR_SIN_DATOS = 9
+
+    @classmethod
+    def parse(cls, value: Any) -> "EstadoTrafico":
+        """Convierte el código del feed (int, '2', None...) en un EstadoTrafico."""
+        estado = _ESTADOS_POR_CODIGO.get(value)
+        if estado is not None:
+            return estado
+        try:
+            codigo = int(value)
+        except (ValueError, TypeError):
+            return cls.SIN_INFORMACION
+        return _ESTADOS_POR_CODIGO.get(codigo, cls.DESCONOCIDO)
+
+
+# Búsqueda directa por código (más rápida que EstadoTrafico(codigo))
+_ESTADOS_POR_CODIGO = {estado.value: estado for estado in EstadoTrafico}
+
+
+class Snapshot:
+    """Vista columnar (un array NumPy por campo) de una lista de registros."""
+
+    def __init__(self, records: Sequence[Any]):
+        """
+        Args:
+            records: Registros dataclass de un mismo tipo (Clima, EstacionTrafico...);
+                una lista se guarda sin copiar
+        """
+        self.records = records if isinstance(records, list) else list(records)
+        self._fields = {f.name: f for f in fields(self.records[0])} if self.records else {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Devuelve la columna (se construye la primera vez que se pide)."""
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = self._build_column(name)
+        return column
+
+    def _build_column(self, name: str) -> np.ndarray:
+        if name in ("lat", "lon") and "geo_point_2d" in self._fields:
+            # Coordenadas como columnas numéricas
+            return np.array([parse_number((r.geo_point_2d or {}).get(name))
+                             for r in self.records], dtype=np.float64)
+
+        field = self._fields[name]
+        values = [getattr(r, name) for r in self.records]
+        if field.type in (float, "float"):
+            return np.array(values, dtype=np.float64)
+        if values and isinstance(values[0], IntEnum):
+            return np.array(values, dtype=np.int64)
+        return np.array(values, dtype=object)
+
+    def top(self, name: str, n: int, mask: Optional[np.ndarray] = None) -> List[Any]:
+        """
+        Devuelve los n registros con mayor valor en la columna (sin NaN).
+
+        Args:
+            name: Columna numérica
+            n: Número de registros
+            mask: Filtro booleano adicional (opcional)
+        """
+        if not self.records:
+            return []
+        values = self[name]
+        valid = ~np.isnan(values)
+        if mask is not None:
+            valid &= mask
+        idx = np.flatnonzero(valid)
+        # Orden estable descendente: en empate se mantiene el orden del feed
+        order = idx[np.argsort(-values[idx], kind="stable")[:n]]
+        return [self.records[i] for i in order]
+
+    def where(self, mask: np.ndarray) -> List[Any]:
+        """Devuelve los registros que cumplen el filtro booleano."""
+        return [self.records[i] for i in np.flatnonzero(mask)]
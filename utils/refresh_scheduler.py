@@ -0,0 +1,96 @@
+"""
+Planificador de refresco en segundo plano para los feeds en tiempo real.
+
+Cada feed tiene su propia cadencia (p. ej. tráfico cada 3 min, aire cada
+15 min). Un único hilo duerme hasta el siguiente vencimiento, descarga de una
+vez todos los feeds que tocan y entrega los resultados a un callback, que
+aplica los cambios a la interfaz con un solo page.update() por ciclo.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class RefreshScheduler:
+    """Refresca periódicamente varios feeds, cada uno con su cadencia."""
+
+    def __init__(self, intervals: Dict[str, float],
+                 refresh: Callable[[List[str]], Dict[str, Any]],
+                 on_refresh: Callable[[Dict[str, Any]], None]):
+        """
+        Args:
+            intervals: Segundos entre refrescos por clave de feed
+            refresh: Función que descarga una lista de feeds y devuelve {clave: datos}
+            on_refresh: Callback con los feeds refrescados en cada ciclo
+        """
+        self.intervals = dict(intervals)
+        self._refresh = refresh
+        self._on_refresh = on_refresh
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_due: Dict[str, float] = {}
+
+        self.stats: Dict[str, int] = {'cycles': 0, 'feeds_refreshed': 0, 'errors': 0}
+
+    def start(self) -> None:
+        """Arranca el hilo; el primer refresco de cada feed llega tras su intervalo."""
+        if self._thread is not None:
+            return
+        now = time.monotonic()
+        self._next_due = {key: now + interval for key, interval in self.intervals.items()}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo (espera al ciclo en curso)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def due_feeds(self, now: float) -> List[str]:
+        """Devuelve los feeds cuyo refresco ha vencido en el instante dado."""
+        return [key for key, due in self._next_due.items() if due <= now]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            wait = max(0.0, min(self._next_due.values()) - time.monotonic())
+            if self._stop.wait(wait):
+                break
+
+            now = time.monotonic()
+            due = self.due_feeds(now)
+            for key in due:
+                self._next_due[key] = now + self.intervals[key]
+            if due:
+                self.run_cycle(due)
+
+    def run_cycle(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Refresca los feeds indicados y notifica el resultado.
+
+        Args:
+            keys: Claves de los feeds a refrescar
+
+        Returns:
+            Dict {clave: datos} con los feeds que devolvieron datos
+        """
+        self.stats['cycles'] += 1
+        try:
+            results = self._refresh(keys)
+        except Exception as e:
+            print(f"⚠️ Error refrescando {', '.join(keys)}: {e}")
+            self.stats['errors'] += 1
+            return {}
+
+        if results:
+            self.stats['feeds_refreshed'] += len(results)
+            try:
+                self._on_refresh(results)
+            except Exception as e:
+                print(f"⚠️ Error aplicando datos refrescados: {e}")
+                self.stats['errors'] += 1
+        return results
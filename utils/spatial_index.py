@@ -0,0 +1,141 @@
+"""
+Índice espacial en rejilla y cálculo del viewport del mapa.
+
+El mapa principal solo debe tener montados los marcadores que caen dentro de
+la zona visible (con un margen). GridIndex reparte las coordenadas en celdas
+de tamaño fijo en grados, de modo que consultar un rectángulo solo recorre
+las celdas que lo cubren y no todos los marcadores de la capa.
+viewport_bounds estima ese rectángulo a partir del centro y el zoom que
+informa flet_map (proyección Web Mercator, teselas de 256 px).
+"""
+
+import math
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# (sur, oeste, norte, este) en grados
+Bounds = Tuple[float, float, float, float]
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+
+
+def _lat_to_y(lat: float) -> float:
+    """Latitud → coordenada Mercator normalizada (0 arriba, 1 abajo)."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    return 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+def _y_to_lat(y: float) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def viewport_bounds(lat: float, lon: float, zoom: float,
+                    width_px: float, height_px: float, padding: float = 0.0) -> Bounds:
+    """
+    Rectángulo visible de un mapa Web Mercator.
+
+    Args:
+        lat: Latitud del centro
+        lon: Longitud del centro
+        zoom: Nivel de zoom (puede ser fraccionario)
+        width_px: Ancho del mapa en píxeles lógicos
+        height_px: Alto del mapa en píxeles lógicos
+        padding: Margen añadido a cada lado, como fracción del tamaño visible
+
+    Returns:
+        (sur, oeste, norte, este) en grados
+    """
+    world = TILE_SIZE * 2 ** zoom
+    half_w = width_px * (0.5 + padding) / world
+    half_h = height_px * (0.5 + padding) / world
+
+    x = (lon + 180) / 360
+    y = _lat_to_y(lat)
+    west = (x - half_w) * 360 - 180
+    east = (x + half_w) * 360 - 180
+    north = _y_to_lat(max(0.0, y - half_h))
+    south = _y_to_lat(min(1.0, y + half_h))
+    return south, max(-180.0, west), north, min(180.0, east)
+
+
+def contains(outer: Bounds, inner: Bounds) -> bool:
+    """True si inner queda completamente dentro de outer."""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[2] >= inner[2] and outer[3] >= inner[3])
+
+
+class GridIndex:
+    """Índice de puntos por celdas regulares de cell_deg grados."""
+
+    def __init__(self, cell_deg: float = 0.02):
+        """
+        Args:
+            cell_deg: Lado de cada celda en grados (0.02° ≈ 2 km en Valencia)
+        """
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def insert(self, key: Hashable, lat: float, lon: float):
+        """Añade (o mueve) un punto."""
+        if key in self._points:
+            self.remove(key)
+        lat, lon = float(lat), float(lon)
+        self._points[key] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Quita un punto (si existe)."""
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def query(self, bounds: Bounds) -> Set[Hashable]:
+        """
+        Claves de los puntos dentro de un rectángulo.
+
+        Args:
+            bounds: (sur, oeste, norte, este) en grados
+
+        Returns:
+            Conjunto de claves
+        """
+        south, west, north, east = bounds
+        row0, col0 = self._cell(south, west)
+        row1, col1 = self._cell(north, east)
+
+        # Si el rectángulo cubre más celdas de las que hay ocupadas, recorrer solo las ocupadas
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self._cells):
+            cells: Iterable[Set[Hashable]] = self._cells.values()
+        else:
+            cells = [self._cells[c] for c in ((r, q) for r in range(row0, row1 + 1)
+                                              for q in range(col0, col1 + 1))
+                     if c in self._cells]
+
+        result = set()
+        for keys in cells:
+            for key in keys:
+                lat, lon = self._points[key]
+                if south <= lat <= north and west <= lon <= east:
+                    result.add(key)
+        return result
+
+    def point(self, key: Hashable) -> Optional[Tuple[float, float]]:
+        """(lat, lon) de una clave o None."""
+        return self._points.get(key)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._points)
+
+    def __len__(self) -> int:
+        return len(self._points)
@@ -0,0 +1,84 @@
+"""
+Índice mensual del histórico de tráfico.
+
+Ordena la tabla de tráfico por mes una sola vez al cargarla y guarda el
+rango de filas [inicio, fin) de cada mes. Consultar un mes es entonces un
+corte posicional (iloc) sobre filas contiguas: sin máscara booleana sobre
+toda la tabla, sin copiar el DataFrame y sin volver a parsear fechas.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def month_keys(fechas: pd.Series) -> pd.Series:
+    """
+    Normaliza la columna FECHA a claves 'YYYY-MM'.
+
+    Args:
+        fechas: Serie de fechas (texto 'YYYY-MM[-DD]', datetime o Period)
+
+    Returns:
+        Serie de texto con el mes de cada fila
+    """
+    if isinstance(fechas.dtype, pd.PeriodDtype):
+        return fechas.dt.strftime('%Y-%m')
+    if pd.api.types.is_datetime64_any_dtype(fechas):
+        return fechas.dt.strftime('%Y-%m')
+    return fechas.astype(str).str.slice(0, 7)
+
+
+class TrafficMonthIndex:
+    """Tabla de tráfico ordenada por mes con desplazamientos precalculados."""
+
+    def __init__(self, df: pd.DataFrame, date_column: str = 'FECHA'):
+        """
+        Args:
+            df: Tabla de tráfico (ATA, IMD, FECHA, ...)
+            date_column: Columna con la fecha del registro
+        """
+        keys = month_keys(df[date_column]).to_numpy(dtype=object)
+
+        # Orden estable: dentro de cada mes se conserva el orden original
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        table = df.iloc[order].reset_index(drop=True)
+        table[date_column] = sorted_keys
+        self.df = table
+
+        unique, starts = np.unique(sorted_keys, return_index=True)
+        stops = np.append(starts[1:], len(sorted_keys))
+        self._offsets: Dict[str, Tuple[int, int]] = {
+            key: (int(start), int(stop))
+            for key, start, stop in zip(unique, starts, stops)
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._offsets
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def months(self) -> List[str]:
+        """Devuelve los meses disponibles ('YYYY-MM') en orden."""
+        return list(self._offsets)
+
+    def month(self, key: str) -> pd.DataFrame:
+        """
+        Devuelve las filas de un mes como corte de la tabla ordenada.
+
+        Args:
+            key: Mes en formato 'YYYY-MM'
+
+        Returns:
+            DataFrame (vista, sin copia) vacío si el mes no existe
+        """
+        start, stop = self._offsets.get(key, (0, 0))
+        return self.df.iloc[start:stop]
+
+    def month_of(self, year, month) -> pd.DataFrame:
+        """Atajo de month() a partir de año y mes numéricos."""
+        return self.month(f"{int(year)}-{int(month):02}")
@@ -0,0 +1,85 @@
+"""
+Preparación vectorizada de los marcadores de tráfico histórico.
+
+Las coordenadas de cada ATA se unen a la tabla de tráfico una sola vez al
+cargarla; después, para cada mes, el tramo de color se calcula con
+np.digitize sobre la IMD y las especificaciones de los marcadores salen como
+arrays columnares. Solo la creación final de cada mapa.Marker queda en Python.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Límites de IMD (veh/día) entre tramos de color: <5k, <15k, <30k, <50k, <80k, resto
+IMD_BINS = np.array([5000, 15000, 30000, 50000, 80000])
+
+SPEC_COLUMNS = ['ata', 'lat', 'lon', 'imd', 'bucket', 'desc']
+
+
+def merge_coordinates(traffic_df: pd.DataFrame,
+                      coords_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Añade LAT, LON (numéricas) y DESCRIPCION de cada ATA a la tabla de tráfico.
+
+    Args:
+        traffic_df: Tabla de tráfico (ATA, IMD, FECHA, ...)
+        coords_df: Tabla de coordenadas (ATA, DESCRIPCION, LON, LAT) o None
+
+    Returns:
+        Nueva tabla con las columnas LAT, LON y DESCRIPCION (NaN si no hay datos)
+    """
+    if coords_df is None:
+        return traffic_df.assign(LAT=np.nan, LON=np.nan, DESCRIPCION=None)
+
+    coords = pd.DataFrame({
+        'ATA': coords_df['ATA'],
+        'LAT': pd.to_numeric(coords_df['LAT'], errors='coerce'),
+        'LON': pd.to_numeric(coords_df['LON'], errors='coerce'),
+        'DESCRIPCION': coords_df['DESCRIPCION'],
+    }).drop_duplicates('ATA')
+
+    base = traffic_df.drop(columns=['LAT', 'LON', 'DESCRIPCION'], errors='ignore')
+    return base.merge(coords, on='ATA', how='left', sort=False)
+
+
+def imd_buckets(imd: np.ndarray) -> np.ndarray:
+    """Devuelve el tramo de color (0-5) de cada valor de IMD."""
+    return np.digitize(imd, IMD_BINS)
+
+
+def marker_specs(month_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Calcula las especificaciones de los marcadores de un mes.
+
+    Args:
+        month_df: Filas del mes con ATA, IMD, LAT, LON y DESCRIPCION
+
+    Returns:
+        Dict de arrays alineados (ata, lat, lon, imd, bucket, desc) solo con
+        las filas que tienen coordenadas e IMD válidas
+    """
+    lat = month_df['LAT'].to_numpy(dtype=np.float64)
+    lon = month_df['LON'].to_numpy(dtype=np.float64)
+    imd = month_df['IMD'].to_numpy(dtype=np.float64)
+
+    valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(imd))
+    ata = month_df['ATA'].to_numpy(dtype=object)[valid]
+    desc = month_df['DESCRIPCION'].to_numpy(dtype=object)[valid]
+
+    # Sin descripción se usa el identificador del ATA
+    missing = pd.isna(desc)
+    if missing.any():
+        desc = desc.copy()
+        desc[missing] = ["ATA " + str(a) for a in ata[missing]]
+
+    imd_int = imd[valid].astype(np.int64)
+    return {
+        'ata': ata,
+        'lat': lat[valid],
+        'lon': lon[valid],
+        'imd': imd_int,
+        'bucket': imd_buckets(imd_int),
+        'desc': desc,
+    }
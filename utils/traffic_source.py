@@ -0,0 +1,150 @@
+"""
+Fuente perezosa del histórico de tráfico (Parquet).
+
+En lugar de leer trafico_valencia.parquet completo al arrancar, mantiene el
+dataset abierto y lee un mes bajo demanda con un filtro FECHA == 'YYYY-MM'.
+Como el normalizador escribe el fichero ordenado por FECHA con un row group
+por mes, las estadísticas de cada row group permiten a pyarrow descartar el
+resto del fichero sin descomprimirlo. Los meses leídos quedan en una caché
+LRU acotada por memoria.
+"""
+
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.traffic_index import month_keys
+from utils.traffic_markers import merge_coordinates
+from utils.year_cache import YearCache
+
+
+def write_traffic_parquet(df: pd.DataFrame, output_path: str) -> str:
+    """
+    Escribe la tabla de tráfico ordenada por FECHA con un row group por mes.
+
+    Args:
+        df: Tabla de tráfico (ATA, IMD, FECHA 'YYYY-MM', ...)
+        output_path: Ruta del .parquet de salida
+
+    Returns:
+        Ruta del fichero escrito
+    """
+    df = df.assign(FECHA=month_keys(df['FECHA']))
+    df = df.sort_values('FECHA', kind='stable').reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = output_path + ".tmp"
+
+    with pq.ParquetWriter(tmp_path, table.schema, compression='zstd') as writer:
+        for key in pd.unique(df['FECHA']):
+            # Un write_table por mes → un row group por mes
+            mask = pc.equal(table['FECHA'], key)
+            writer.write_table(table.filter(mask))
+
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def resolve_traffic_path(parquet_path: str, partitions_dir: str) -> str:
+    """
+    Elige entre el parquet único y el directorio de particiones por año.
+
+    El directorio (normalizerODS --incremental) solo se usa si tiene alguna
+    partición .parquet y es al menos tan reciente como el fichero único: una
+    ejecución completa posterior reescribe solo el fichero y las particiones
+    quedarían desfasadas.
+
+    Args:
+        parquet_path: Ruta a trafico_valencia.parquet
+        partitions_dir: Ruta al directorio de particiones
+
+    Returns:
+        Ruta a usar en LazyTrafficSource
+    """
+    if not os.path.isdir(partitions_dir):
+        return parquet_path
+    partitions = [os.path.join(partitions_dir, name) for name in os.listdir(partitions_dir)
+                  if name.endswith(".parquet")]
+    if not partitions:
+        return parquet_path
+    if os.path.exists(parquet_path):
+        if max(os.path.getmtime(p) for p in partitions) < os.path.getmtime(parquet_path):
+            print(f"⚠️ Particiones de tráfico anteriores a {os.path.basename(parquet_path)}; "
+                  f"se usa el fichero completo")
+            return parquet_path
+    return partitions_dir
+
+
+class LazyTrafficSource:
+    """Lee meses del parquet de tráfico bajo demanda (predicate pushdown)."""
+
+    def __init__(self, parquet_path: str, coords_df: Optional[pd.DataFrame] = None,
+                 cache_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            parquet_path: Ruta a trafico_valencia.parquet o al directorio de
+                particiones por año que genera normalizerODS --incremental
+            coords_df: Coordenadas por ATA para unir a cada mes leído (opcional)
+            cache_bytes: Presupuesto de la caché de meses
+        """
+        self.path = parquet_path
+        self._dataset = ds.dataset(parquet_path, format='parquet')
+        self._coords_df = coords_df
+        self._months: Optional[List[str]] = None
+        self.cache = YearCache(
+            cache_bytes, sizeof=lambda df: int(df.memory_usage(deep=True).sum()))
+
+    @property
+    def num_rows(self) -> int:
+        """Número total de registros (leído del footer, sin cargar datos)."""
+        return self._dataset.count_rows()
+
+    @property
+    def num_row_groups(self) -> int:
+        """Número de row groups (sumando todas las particiones si es un directorio)."""
+        return sum(fragment.metadata.num_row_groups
+                   for fragment in self._dataset.get_fragments())
+
+    def set_coordinates(self, coords_df: Optional[pd.DataFrame]):
+        """Fija las coordenadas que se unen a cada mes y vacía la caché."""
+        self._coords_df = coords_df
+        self.cache.clear()
+
+    def months(self) -> List[str]:
+        """Devuelve los meses disponibles ('YYYY-MM') leyendo solo la columna FECHA."""
+        if self._months is None:
+            fechas = self._dataset.to_table(columns=['FECHA']).column('FECHA')
+            self._months = sorted(pc.unique(fechas).to_pylist())
+        return self._months
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.months()
+
+    def month(self, key: str) -> pd.DataFrame:
+        """
+        Devuelve las filas de un mes (con LAT, LON y DESCRIPCION unidas).
+
+        Args:
+            key: Mes en formato 'YYYY-MM'
+
+        Returns:
+            DataFrame del mes (vacío si no hay datos)
+        """
+        df = self.cache.get(key)
+        if df is not None:
+            return df
+
+        table = self._dataset.to_table(filter=ds.field('FECHA') == key)
+        df = merge_coordinates(table.to_pandas(), self._coords_df)
+
+        self.cache.put(key, df)
+        return df
+
+    def month_of(self, year, month) -> pd.DataFrame:
+        """Atajo de month() a partir de año y mes numéricos."""
+        return self.month(f"{int(year)}-{int(month):02}")
@@ -0,0 +1,138 @@
+"""
+Caché LRU con presupuesto de memoria para los años de contaminación.
+
+Los JSON anuales se cargan como dicts anidados con floats en caja, que en
+memoria ocupan varias veces su tamaño en disco. Esta caché estima los bytes
+de cada año cargado y expulsa los menos usados recientemente cuando se supera
+el presupuesto configurado (PERFORMANCE['year_cache_max_mb']).
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Estima los bytes que ocupa un objeto Python recorriendo dicts, listas y tuplas.
+
+    Los objetos compartidos (p. ej. cadenas internadas) se cuentan una sola vez.
+
+    Args:
+        obj: Objeto a medir (normalmente el dict de un JSON anual)
+
+    Returns:
+        Tamaño estimado en bytes
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+
+    while stack:
+        current = stack.pop()
+        obj_id = id(current)
+        if obj_id in seen:
+            continue
+        seen.add(obj_id)
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set)):
+            stack.extend(current)
+
+    return total
+
+
+class YearCache:
+    """
+    Caché LRU acotada por bytes estimados.
+
+    Cualquier objeto con get/put/clear/stats puede sustituirla en RightPanel.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = estimate_size):
+        """
+        Args:
+            max_bytes: Presupuesto de memoria en bytes
+            sizeof: Función que estima el tamaño de un valor
+        """
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve el valor cacheado (marcándolo como reciente) o None."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """
+        Guarda un valor y expulsa los menos recientes hasta cumplir el presupuesto.
+
+        Returns:
+            False si el valor por sí solo supera el presupuesto (no se cachea)
+        """
+        size = self._sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes.pop(key)
+                del self._entries[key]
+
+            if size > self.max_bytes:
+                return False
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            return True
+
+    def clear(self):
+        """Vacía la caché (las estadísticas se conservan)."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict con hits, misses, evictions, entries, bytes y max_bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }